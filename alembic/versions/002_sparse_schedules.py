@@ -0,0 +1,30 @@
+"""Sparse schedules — purge materialized empty cells
+
+Пусті комірки графіку (00:00-00:00 без коду) більше не зберігаються:
+/schedule/month синтезує їх при читанні. Видаляємо накопичені placeholder-рядки.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM schedules "
+        "WHERE start_hhmm = '00:00' AND end_hhmm = '00:00' "
+        "AND (code IS NULL OR code = '')"
+    )
+
+
+def downgrade() -> None:
+    # Placeholder-рядки не несуть даних — відновлювати нічого.
+    # Старий код все одно створить їх заново при першому запиті місяця.
+    pass
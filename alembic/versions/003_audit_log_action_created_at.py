@@ -0,0 +1,26 @@
+"""Composite index on audit_logs (action, created_at)
+
+Журнал дій фільтрується по action і сортується за created_at —
+композитний індекс дозволяє читати сторінку без filesort.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_audit_logs_action_created_at', 'audit_logs', ['action', 'created_at'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_logs_action_created_at', table_name='audit_logs')
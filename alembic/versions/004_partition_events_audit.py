@@ -0,0 +1,111 @@
+"""Monthly RANGE partitioning of events and audit_logs (MySQL only)
+
+Таблиці events (по ts) і audit_logs (по created_at) розбиваються на
+помісячні партиції pYYYYMM + pmax. Старі місяці видаляються цілою
+партицією (app/services/retention.py), а запити за останні дні читають
+лише свіжі партиції (partition pruning).
+
+Обмеження MySQL, які ця міграція змушена врахувати:
+- колонка партиціювання має входити в кожен унікальний ключ, тому
+  PRIMARY KEY стає (id, ts) / (id, created_at). id лишається AUTO_INCREMENT
+  і унікальним на практиці; ORM і далі адресує рядки по id;
+- партиційовані InnoDB-таблиці не підтримують FOREIGN KEY, тому FK з
+  events (employee_id, terminal_id, created_by_user_id) і audit_logs
+  (admin_id) видаляються. Цілісність тримає застосунок: ORM обнуляє
+  посилання при видаленні користувача, працівники не видаляються.
+  ForeignKey в моделях лишаються — вони потрібні для relationship();
+- audit_logs.created_at стає NOT NULL (порожні значення заповнюються).
+
+На SQLite/PostgreSQL міграція нічого не робить.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Скільки майбутніх місяців створити одразу (далі — ensure_future_partitions)
+MONTHS_AHEAD = 3
+
+TABLES = {"events": "ts", "audit_logs": "created_at"}
+
+# FK, які відновлює downgrade: (таблиця, ім'я, колонка, ціль, ondelete)
+FOREIGN_KEYS = [
+    ("events",     "fk_events_employee",        "employee_id",        "employees", None),
+    ("events",     "fk_events_terminal",        "terminal_id",        "terminals", None),
+    ("events",     "fk_events_created_by_user", "created_by_user_id", "users",     None),
+    ("audit_logs", "fk_audit_logs_admin",       "admin_id",           "users",     "SET NULL"),
+]
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _partitions_sql(first: date, last: date) -> str:
+    parts = []
+    cur = first.replace(day=1)
+    while cur <= last:
+        nxt = _next_month(cur)
+        parts.append(f"PARTITION p{cur:%Y%m} VALUES LESS THAN (TO_DAYS('{nxt.isoformat()}'))")
+        cur = nxt
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ",\n  ".join(parts)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+
+    today = datetime.now(timezone.utc).date()
+    last = today.replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+
+    op.execute("UPDATE audit_logs SET created_at = UTC_TIMESTAMP() WHERE created_at IS NULL")
+    op.execute("ALTER TABLE audit_logs MODIFY created_at DATETIME NOT NULL")
+
+    for table, column in TABLES.items():
+        # FK імена в 001 частково автоматичні (events_ibfk_N) — беремо з information_schema
+        fk_names = bind.execute(sa.text(
+            "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t "
+            "AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+        ), {"t": table}).scalars().all()
+        for name in fk_names:
+            op.execute(f"ALTER TABLE {table} DROP FOREIGN KEY `{name}`")
+
+        # ix_<table>_id тримає AUTO_INCREMENT-колонку проіндексованою на час заміни PK
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, {column})")
+
+        first = bind.execute(sa.text(f"SELECT MIN({column}) FROM {table}")).scalar()
+        first = first.date() if first else today
+        op.execute(
+            f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS({column})) (\n  "
+            f"{_partitions_sql(first, last)}\n)"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "mysql":
+        return
+
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+    for table, name, column, target, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, target, [column], ["id"], ondelete=ondelete)
+
+    op.execute("ALTER TABLE audit_logs MODIFY created_at DATETIME NULL")
@@ -0,0 +1,44 @@
+"""terminal_scan_ids — idempotency keys for terminal scans
+
+Термінали надсилають scan_id з кожним сканом (пакетне завантаження після
+офлайну, повтори при нестабільній мережі). Унікальний ключ
+(terminal_id, scan_id) гарантує, що повтор не створить другу подію.
+
+Ключ живе в окремій таблиці: events партиціюється по ts (004), а MySQL
+вимагає колонку партиціювання в кожному унікальному ключі. Старі рядки
+видаляє app/services/retention.py (TERMINAL_SCAN_ID_RETENTION_DAYS).
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'terminal_scan_ids',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('terminal_id', sa.Integer(), sa.ForeignKey('terminals.id'), nullable=False),
+        sa.Column('scan_id', sa.String(64), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=True),
+        sa.Column('event_id', sa.Integer(), nullable=True),
+        sa.Column('direction', sa.String(8), nullable=True),
+        sa.Column('message', sa.String(160), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('terminal_id', 'scan_id', name='uq_terminal_scan_ids_terminal_scan'),
+    )
+    op.create_index('ix_terminal_scan_ids_created_at', 'terminal_scan_ids', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_terminal_scan_ids_created_at', table_name='terminal_scan_ids')
+    op.drop_table('terminal_scan_ids')
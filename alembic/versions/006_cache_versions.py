@@ -0,0 +1,34 @@
+"""cache_versions — version counters for cross-worker cache invalidation
+
+Кожен gunicorn-воркер тримає в пам'яті мапу UID → працівник
+(app/services/employee_uids.py), щоб термінальні ендпоінти не читали
+employees на кожен скан. Зміни працівників збільшують cache_versions.version
+для "employees" у тій самій транзакції; воркери звіряють версію не частіше
+ніж раз на EMPLOYEE_UID_CACHE_CHECK_SECONDS і перебудовують мапу.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    cache_versions = op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(64), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.bulk_insert(cache_versions, [{'name': 'employees', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
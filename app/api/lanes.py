@@ -0,0 +1,85 @@
+"""
+Traffic lanes: terminal, dashboard, reports.
+
+Кожен роутер належить до однієї смуги (app/api/router.py):
+- terminal  — скани і реєстрація з терміналів; без ліміту і без відмов;
+- dashboard — адмінка (працівники, статистика, ручні події, аудит...);
+- reports   — експорт і PDF графіків (секунди на запит).
+
+Смуга задає:
+- окремий пул з'єднань БД (get_db бере сесію з request.state.lane);
+- власний ліміт одночасних запитів (<lane>_concurrency_limit) — запит
+  чекає на слот на event loop, ще не займаючи потік threadpool;
+- контроль допуску: коли черга смуги повна (<lane>_queue_max), слот не
+  звільнився за LANE_QUEUE_TIMEOUT_SECONDS, або (для reports) sync-виклики
+  вже чекають на вільний потік — відповідь 503 з Retry-After. Звіти
+  відкидаються першими, тож латентність сканів не росте під час
+  місячної звітності.
+"""
+from __future__ import annotations
+
+import logging
+
+import anyio
+from fastapi import HTTPException, Request, status
+
+from app.core import metrics, threadpool
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Смуги, які відкидаються при насиченні threadpool (у порядку пріоритету відкидання)
+SHED_ON_THREADPOOL_SATURATION = ("reports",)
+
+RETRY_AFTER_SECONDS = 5
+
+SHED = metrics.counter(
+    "lane_requests_shed_total", "Requests rejected with 503 by lane admission control.", ("lane", "reason"),
+)
+
+
+def _queue_max(name: str) -> int:
+    return int(getattr(settings, f"{name}_queue_max", 0) or 0)
+
+
+def _reject(name: str, reason: str) -> HTTPException:
+    SHED.inc(lane=name, reason=reason)
+    logger.warning(f"Lane {name}: request shed ({reason})")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Сервер перевантажений, спробуйте пізніше",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def lane(name: str):
+    """Залежність роутера: смуга запиту + ліміт і контроль допуску."""
+    async def _dependency(request: Request):
+        request.state.lane = name
+
+        if name in SHED_ON_THREADPOOL_SATURATION and threadpool.default_waiting() > 0:
+            raise _reject(name, "threadpool_saturated")
+
+        group = threadpool.limiter(name)
+        if group is None:
+            yield
+            return
+
+        queue_max = _queue_max(name)
+        if queue_max and group.statistics().tasks_waiting >= queue_max:
+            raise _reject(name, "queue_full")
+
+        # Teardown може виконатися в іншій задачі, ніж setup — позичаємо слот на токен
+        token = object()
+        try:
+            with anyio.fail_after(settings.lane_queue_timeout_seconds):
+                await group.acquire_on_behalf_of(token)
+        except TimeoutError:
+            raise _reject(name, "queue_timeout")
+        try:
+            yield
+        finally:
+            group.release_on_behalf_of(token)
+
+    _dependency.__name__ = f"lane_{name}"
+    return _dependency
@@ -0,0 +1,91 @@
+"""
+Lean list endpoints: column-only SELECT + direct JSON serialization.
+
+Довідники (працівники, термінали, користувачі, посади) віддаються без
+гідрації ORM-об'єктів і без валідації Pydantic по кожному полю:
+SELECT тільки потрібних колонок → dict → JSON (orjson, якщо встановлено).
+
+Спільні параметри запиту:
+- fields=id,full_name — проєкція (лише ці поля, і лише їх колонки в SELECT);
+- limit / offset — пагінація (за замовчуванням — весь список, як раніше).
+"""
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see requirements.txt
+    orjson = None
+
+LIST_MAX_LIMIT = 10_000
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse через orjson (з фолбеком на stdlib json)."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def parse_fields(fields: str | None, available: Iterable[str]) -> list[str]:
+    """'id,full_name' → ['id', 'full_name']; порожньо → всі поля. Невідоме поле — 400."""
+    available = list(available)
+    if not fields:
+        return available
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Невідомі поля: {', '.join(unknown)}. Доступні: {', '.join(available)}",
+        )
+    return list(dict.fromkeys(requested))
+
+
+def lean_list(
+    db: Session,
+    columns: dict[str, Any],
+    *,
+    fields: str | None = None,
+    where: Iterable[Any] = (),
+    order_by: Iterable[Any] = (),
+    limit: int | None = None,
+    offset: int = 0,
+) -> FastJSONResponse:
+    """
+    SELECT лише запитаних колонок і відповідь списком dict'ів.
+
+    columns — відображення "поле відповіді → колонка/вираз SQLAlchemy".
+    """
+    names = parse_fields(fields, columns)
+    stmt = select(*(columns[n].label(n) for n in names)).where(*where).order_by(*order_by)
+    if offset:
+        stmt = stmt.offset(offset)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = db.execute(stmt).all()
+    return FastJSONResponse([dict(zip(names, row)) for row in rows])
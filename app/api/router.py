@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api.lanes import lane
 from app.api.routes import (
     auth, employees, events, schedules, stats,
     terminals, register, manual_events, audit_log,
@@ -8,36 +9,43 @@ from app.api.routes import (
 
 api_router = APIRouter()
 
+# Смуги трафіку (app/api/lanes.py): окремий пул БД і ліміт на кожну.
+# Залежність смуги на include_router виконується раніше за залежності роутера.
+TERMINAL = [Depends(lane("terminal"))]
+DASHBOARD = [Depends(lane("dashboard"))]
+REPORTS = [Depends(lane("reports"))]
+
 # Auth
-api_router.include_router(auth.router)
+api_router.include_router(auth.router, dependencies=DASHBOARD)
 
 # Core resources
-api_router.include_router(employees.router)
-api_router.include_router(events.router)
-api_router.include_router(schedules.router)
-api_router.include_router(stats.router)
+api_router.include_router(employees.router, dependencies=DASHBOARD)
+api_router.include_router(events.router, dependencies=TERMINAL)
+api_router.include_router(schedules.router, dependencies=DASHBOARD)
+api_router.include_router(schedules.router_reports, dependencies=REPORTS)
+api_router.include_router(stats.router, dependencies=DASHBOARD)
 
 # Terminal management
-api_router.include_router(terminals.router,        prefix="/terminals", tags=["terminals-admin"])
-api_router.include_router(terminals.router_public, prefix="/terminal",  tags=["terminal-public"])
+api_router.include_router(terminals.router,        prefix="/terminals", tags=["terminals-admin"], dependencies=DASHBOARD)
+api_router.include_router(terminals.router_public, prefix="/terminal",  tags=["terminal-public"], dependencies=TERMINAL)
 
 # Register (first scan)
-api_router.include_router(register.router, prefix="/register", tags=["register"])
+api_router.include_router(register.router, prefix="/register", tags=["register"], dependencies=TERMINAL)
 
 # Manual events (admin)
-api_router.include_router(manual_events.router)
+api_router.include_router(manual_events.router, dependencies=DASHBOARD)
 
 # Audit log (admin) — persistent DB
-api_router.include_router(audit_log.router)
+api_router.include_router(audit_log.router, dependencies=DASHBOARD)
 
 # Users / admin management
-api_router.include_router(users.router)
+api_router.include_router(users.router, dependencies=DASHBOARD)
 
 # Positions directory
-api_router.include_router(positions.router)
+api_router.include_router(positions.router, dependencies=DASHBOARD)
 
 # Export reports (CSV / XLSX)
-api_router.include_router(export.router)
+api_router.include_router(export.router, dependencies=REPORTS)
 
 # Live search
-api_router.include_router(search.router)
+api_router.include_router(search.router, dependencies=DASHBOARD)
@@ -1,10 +1,21 @@
-"""Audit log API — читання з БД з фільтрами."""
+"""Audit log API — читання з БД з фільтрами.
+
+Пагінація:
+- cursor (keyset по (created_at, id)) — для гортання вглиб великої таблиці:
+  кожна сторінка — індексний range scan, без OFFSET;
+- offset — старий API, лишається для сумісності.
+
+Загальна кількість (count): exact — COUNT(*), estimate — дешева оцінка
+(статистика InnoDB без фільтрів або COUNT з верхньою межею), none — без неї.
+"""
+import base64
 import json
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, func, or_, text
 
 from app.api.deps import require_admin
 from app.db.session import get_db
@@ -14,17 +25,79 @@ from app.security.audit import get_action_types, _ACTION_LABELS
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
+# Поріг для count=estimate: далі рядки не рахуються, total позначається як оцінка
+ESTIMATE_COUNT_CAP = 10_000
+
 
 def _get_action_label(action: str) -> str:
     return _ACTION_LABELS.get(action, action)
 
 
+def _encode_cursor(created_at: datetime | None, row_id: int) -> str:
+    # created_at може бути NULL (стовпець nullable поза server default MySQL)
+    ts_str = created_at.isoformat() if created_at is not None else ""
+    raw = f"{ts_str}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts_str, id_str = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(ts_str) if ts_str else None), int(id_str)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Невірний cursor")
+
+
+def _after_cursor(cur_ts: datetime | None, cur_id: int):
+    """
+    Рядки після курсора в порядку (created_at DESC, id DESC). NULL у
+    created_at MySQL і SQLite ставлять у кінець такого порядку.
+    """
+    if cur_ts is None:
+        return and_(AuditLog.created_at.is_(None), AuditLog.id < cur_id)
+    return or_(
+        AuditLog.created_at < cur_ts,
+        and_(AuditLog.created_at == cur_ts, AuditLog.id < cur_id),
+        AuditLog.created_at.is_(None),
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _estimate_total(db: Session, q, has_filters: bool) -> tuple[int, bool]:
+    """
+    Дешева оцінка кількості рядків → (total, is_estimate).
+
+    Без фільтрів на MySQL — TABLE_ROWS зі статистики InnoDB (без сканування).
+    Інакше — COUNT по підзапиту з LIMIT: не більше ESTIMATE_COUNT_CAP рядків.
+    """
+    if not has_filters and db.get_bind().dialect.name == "mysql":
+        rows = db.execute(text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'"
+        )).scalar()
+        if rows is not None:
+            return int(rows), True
+
+    capped = q.with_entities(AuditLog.id).limit(ESTIMATE_COUNT_CAP + 1).subquery()
+    n = db.query(func.count()).select_from(capped).scalar() or 0
+    if n > ESTIMATE_COUNT_CAP:
+        return ESTIMATE_COUNT_CAP, True
+    return n, False
+
+
 @router.get("/log")
 def read_audit_log(
     limit: int = Query(default=50, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="Курсор наступної сторінки (next_cursor); якщо задано — offset ігнорується"),
+    count: Literal["exact", "estimate", "none"] = Query(default="exact", description="Як рахувати total"),
     action: str | None = Query(default=None, description="Фільтр по типу дії"),
     admin_username: str | None = Query(default=None, description="Фільтр по адміністратору"),
+    admin_match: Literal["prefix", "exact"] = Query(default="prefix", description="Збіг імені адміністратора: з початку або точний"),
     date_from: date | None = Query(default=None, description="Дата від (РРРР-ММ-ДД)"),
     date_to: date | None = Query(default=None, description="Дата до (РРРР-ММ-ДД)"),
     entity_type: str | None = Query(default=None, description="Тип сутності"),
@@ -37,16 +110,40 @@ def read_audit_log(
     if action:
         q = q.filter(AuditLog.action == action)
     if admin_username:
-        q = q.filter(AuditLog.admin_username.ilike(f"%{admin_username}%"))
+        # Точний або префіксний збіг — обидва використовують індекс admin_username
+        # (на відміну від '%x%')
+        if admin_match == "exact":
+            q = q.filter(AuditLog.admin_username == admin_username)
+        else:
+            q = q.filter(AuditLog.admin_username.like(f"{_escape_like(admin_username)}%", escape="\\"))
     if entity_type:
         q = q.filter(AuditLog.entity_type == entity_type)
     if date_from:
         q = q.filter(AuditLog.created_at >= datetime(date_from.year, date_from.month, date_from.day, tzinfo=timezone.utc))
     if date_to:
-        q = q.filter(AuditLog.created_at < datetime(date_to.year, date_to.month, date_to.day + 1, tzinfo=timezone.utc))
+        day_after = date_to + timedelta(days=1)
+        q = q.filter(AuditLog.created_at < datetime(day_after.year, day_after.month, day_after.day, tzinfo=timezone.utc))
+
+    has_filters = any([action, admin_username, entity_type, date_from, date_to])
+
+    total: int | None = None
+    total_is_estimate = False
+    if count == "exact":
+        total = q.count()
+    elif count == "estimate":
+        total, total_is_estimate = _estimate_total(db, q, has_filters)
+
+    page_q = q
+    if cursor:
+        page_q = page_q.filter(_after_cursor(*_decode_cursor(cursor)))
+    page_q = page_q.order_by(desc(AuditLog.created_at), desc(AuditLog.id))
+    if not cursor and offset:
+        page_q = page_q.offset(offset)
+    rows = page_q.limit(limit + 1).all()
 
-    total = q.count()
-    rows = q.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more and rows else None
 
     entries = []
     for r in rows:
@@ -71,7 +168,15 @@ def read_audit_log(
             "created_at": ts_str,
         })
 
-    return {"entries": entries, "total": total, "limit": limit, "offset": offset}
+    return {
+        "entries": entries,
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "limit": limit,
+        "offset": 0 if cursor else offset,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/actions")
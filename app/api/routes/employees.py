@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.api.deps import require_admin
+from app.api.listing import LIST_MAX_LIMIT, FastJSONResponse, lean_list
 from app.db.session import get_db
 from app.models.employee import Employee
 from app.models.user import User
 from app.schemas.employee import EmployeeCreate, EmployeeOut, EmployeeUpdate
 from app.crud import employee as employee_crud
 from app.security.audit import audit_log
+from app.services import employee_search, employee_uids
 
 # БАГ №1 ВИПРАВЛЕНО: вилучено get_current_user — require_admin тепер повертає User
 router = APIRouter(prefix="/employees", tags=["employees"])
@@ -20,23 +22,27 @@ def create_employee(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin),
 ):
+    # UID зберігається в тому ж вигляді, що й від терміналу (strip + upper)
+    nfc_uid = employee_uids.normalize_uid(payload.nfc_uid)
+
     # Перевірка унікальності NFC UID перед INSERT
-    if payload.nfc_uid:
-        existing = db.query(Employee).filter(Employee.nfc_uid == payload.nfc_uid).first()
+    if nfc_uid:
+        existing = db.query(Employee).filter(Employee.nfc_uid == nfc_uid).first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Співробітник з NFC UID '{payload.nfc_uid}' вже існує (ID: {existing.id}, {existing.full_name})"
+                detail=f"Співробітник з NFC UID '{nfc_uid}' вже існує (ID: {existing.id}, {existing.full_name})"
             )
 
     emp = Employee(
         full_name=payload.full_name,
-        nfc_uid=payload.nfc_uid,
+        nfc_uid=nfc_uid,
         position=getattr(payload, "position", None),
         comment=getattr(payload, "comment", None),
         is_active=True,
     )
     db.add(emp)
+    employee_uids.bump(db)
     try:
         db.commit()
     except IntegrityError as e:
@@ -45,23 +51,40 @@ def create_employee(
         if "nfc_uid" in err_str or "Duplicate entry" in err_str:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"NFC UID '{payload.nfc_uid}' вже використовується іншим співробітником"
+                detail=f"NFC UID '{nfc_uid}' вже використовується іншим співробітником"
             )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Помилка БД: {err_str}")
 
     db.refresh(emp)
+    employee_search.index.upsert(emp)
+    employee_uids.upsert(emp)
     audit_log("employee_create", current_user.username, details={
         "employee_id": emp.id, "full_name": emp.full_name, "nfc_uid": emp.nfc_uid,
     })
     return emp
 
 
-@router.get("/", response_model=list[EmployeeOut])
+_LIST_COLUMNS = {
+    "id": Employee.id,
+    "full_name": Employee.full_name,
+    "nfc_uid": Employee.nfc_uid,
+    "is_active": Employee.is_active,
+    "position": Employee.position,
+    "comment": Employee.comment,
+}
+
+
+@router.get("/", response_class=FastJSONResponse)
 def list_employees(
+    fields: str | None = Query(None, description="Поля через кому, напр. id,full_name"),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
-    return db.query(Employee).order_by(Employee.id).all()
+    return lean_list(
+        db, _LIST_COLUMNS, fields=fields, order_by=[Employee.id], limit=limit, offset=offset,
+    )
 
 
 @router.get("/{employee_id}", response_model=EmployeeOut)
@@ -88,6 +111,8 @@ def update_employee(
         raise HTTPException(status_code=404, detail="Employee not found")
 
     data = payload.model_dump(exclude_unset=True)  # pydantic v2
+    if data.get("nfc_uid"):
+        data["nfc_uid"] = employee_uids.normalize_uid(data["nfc_uid"])
 
     # Перевірка унікальності NFC UID при зміні
     if "nfc_uid" in data and data["nfc_uid"] and data["nfc_uid"] != emp.nfc_uid:
@@ -29,14 +29,22 @@ def _build_report(db: Session, date_from: date, date_to: date, employee_id: Opti
     dt_from = datetime(date_from.year, date_from.month, date_from.day, tzinfo=timezone.utc)
     dt_to = datetime(date_to.year, date_to.month, date_to.day, 23, 59, 59, tzinfo=timezone.utc)
 
-    rows = []
-    for emp in employees:
-        events = (
-            db.query(Event)
-            .filter(Event.employee_id == emp.id, Event.ts >= dt_from, Event.ts <= dt_to)
-            .order_by(Event.ts)
+    # Події всіх працівників одним запитом (лише потрібні колонки), замість
+    # окремого SELECT на кожного працівника
+    events_by_emp: dict[int, list] = {emp.id: [] for emp in employees}
+    if events_by_emp:
+        event_rows = (
+            db.query(Event.employee_id, Event.ts, Event.direction)
+            .filter(Event.employee_id.in_(list(events_by_emp)), Event.ts >= dt_from, Event.ts <= dt_to)
+            .order_by(Event.employee_id, Event.ts)
             .all()
         )
+        for ev in event_rows:
+            events_by_emp[ev.employee_id].append(ev)
+
+    rows = []
+    for emp in employees:
+        events = events_by_emp[emp.id]
         intervals, _, _ = build_intervals(events)
         total_seconds = sum(
             int((iv.out_utc - iv.in_utc).total_seconds())
@@ -1,27 +1,47 @@
-from datetime import datetime, timedelta, time, timezone
-from typing import Optional
+from datetime import date as date_type, datetime, time, timezone
+from typing import Literal, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, insert, or_
 from sqlalchemy.orm import Session
 
 # БАГ №1 ВИПРАВЛЕНО: get_current_user вилучено — require_admin тепер повертає User
 from app.api.deps import require_admin
-from app.core.time import WARSAW, to_utc
+from app.core.time import WARSAW, local_day_bounds_utc, to_utc
 from app.crud import employee as employee_crud
 from app.db.session import get_db
 from app.models.employee import Employee
 from app.models.event import Event
+from app.models.terminal import Terminal
 from app.models.user import User
 
 import logging
 
 from app.security.audit import audit_log
+from app.services import stats_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/events/manual", tags=["manual_events"])
 
+# Верхня межа для одного масового коригування (працівники × дати)
+BULK_MAX_EVENTS = 5000
+
+
+def _require_terminals(db: Session, terminal_ids) -> None:
+    """
+    404, якщо хоч одного terminal_id немає: після міграції 004 events не має
+    зовнішніх ключів, і БД сама такий рядок не відхилить.
+    """
+    wanted = {t for t in terminal_ids if t is not None}
+    if not wanted:
+        return
+    known = {t for (t,) in db.query(Terminal.id).filter(Terminal.id.in_(wanted)).all()}
+    missing = sorted(wanted - known)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Терміналів не знайдено: {missing}")
+
 
 class ManualEventCreate(BaseModel):
     employee_id: int
@@ -31,6 +51,23 @@ class ManualEventCreate(BaseModel):
     comment: str
 
 
+class ManualEventBulk(BaseModel):
+    """
+    Масове коригування: одна дія для всіх комбінацій employee_ids × dates.
+
+    create — додати подію direction о time (WARSAW LOCAL TIME) кожному
+             працівнику в кожну дату;
+    delete — видалити всі РУЧНІ події цих працівників за ці дати.
+    """
+    action: Literal["create", "delete"] = "create"
+    employee_ids: list[int] = Field(..., min_length=1, max_length=1000)
+    dates: list[date_type] = Field(..., min_length=1, max_length=62)
+    time: Optional[str] = None  # "HH:MM" — обов'язково для create
+    direction: Optional[str] = None  # "IN" / "OUT" — обов'язково для create
+    terminal_id: Optional[int] = None
+    comment: str = ""
+
+
 class ManualEventResponse(BaseModel):
     id: int
     employee_id: int
@@ -70,6 +107,8 @@ def create_manual_event(
         if payload.direction not in ["IN", "OUT"]:
             raise HTTPException(status_code=400, detail="direction має бути 'IN' або 'OUT'")
 
+        _require_terminals(db, [payload.terminal_id])
+
         # Парсинг timestamp як WARSAW LOCAL TIME
         try:
             # Парсимо як наївний datetime
@@ -103,6 +142,7 @@ def create_manual_event(
         )
 
         db.add(event)
+        stats_cache.invalidate_employee(event.employee_id, db)
         db.commit()
         db.refresh(event)
 
@@ -210,6 +250,7 @@ def delete_manual_event(
 
         # Видалення
         db.delete(event)
+        stats_cache.invalidate_employee(event.employee_id, db)
         db.commit()
 
         logger.info(
@@ -246,23 +287,17 @@ def delete_events_for_day(
 
     try:
         date_obj = datetime.strptime(date, "%Y-%m-%d").date()
+        start_utc, end_utc = local_day_bounds_utc(date_obj)
 
-        start_warsaw = datetime.combine(date_obj, time.min).replace(tzinfo=WARSAW)
-        end_warsaw = start_warsaw + timedelta(days=1)
-        start_utc = to_utc(start_warsaw).replace(tzinfo=None)
-        end_utc = to_utc(end_warsaw).replace(tzinfo=None)
-
-        events = (
+        # Один DELETE без завантаження ORM-об'єктів (і їх selectin-зв'язків)
+        count = (
             db.query(Event)
             .filter(Event.employee_id == employee_id)
             .filter(Event.ts >= start_utc)
             .filter(Event.ts < end_utc)
-            .all()
+            .delete(synchronize_session=False)
         )
-
-        count = len(events)
-        for ev in events:
-            db.delete(ev)
+        stats_cache.invalidate_employee(employee_id, db)
         db.commit()
 
         logger.info(
@@ -284,6 +319,114 @@ def delete_events_for_day(
         raise HTTPException(status_code=500, detail=f"Помилка: {str(e)}")
 
 
+@router.post("/bulk")
+def bulk_manual_events(
+        payload: ManualEventBulk,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(require_admin),
+):
+    """
+    Масове коригування ручних подій однією транзакцією.
+
+    Приклад — "вся зміна прийшла о 08:00 у день відпрацювання":
+    ```json
+    {"action": "create", "employee_ids": [1, 2, 3], "dates": ["2026-05-09"],
+     "time": "08:00", "direction": "IN", "comment": "Відпрацювання"}
+    ```
+    В аудит пишеться ОДИН запис з підсумком пакета.
+    """
+    employee_ids = sorted(set(payload.employee_ids))
+    dates = sorted(set(payload.dates))
+    logger.info(
+        f"bulk_manual_events: action={payload.action}, employees={len(employee_ids)}, "
+        f"dates={len(dates)}, admin={current_user.username}"
+    )
+
+    if len(employee_ids) * len(dates) > BULK_MAX_EVENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Забагато комбінацій працівник × дата (максимум {BULK_MAX_EVENTS})",
+        )
+
+    known = {
+        emp_id for (emp_id,) in
+        db.query(Employee.id).filter(Employee.id.in_(employee_ids)).all()
+    }
+    missing = [emp_id for emp_id in employee_ids if emp_id not in known]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Співробітників не знайдено: {missing}")
+    if payload.action == "create":
+        _require_terminals(db, [payload.terminal_id])
+
+    try:
+        if payload.action == "create":
+            if payload.direction not in ["IN", "OUT"]:
+                raise HTTPException(status_code=400, detail="direction має бути 'IN' або 'OUT'")
+            try:
+                local_time = datetime.strptime(payload.time or "", "%H:%M").time()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Невірний формат time (очікується HH:MM)")
+
+            now = datetime.now(timezone.utc)
+            rows = []
+            for d in dates:
+                ts_utc = to_utc(datetime.combine(d, local_time).replace(tzinfo=WARSAW)).replace(tzinfo=None)
+                for emp_id in employee_ids:
+                    rows.append({
+                        "employee_id": emp_id,
+                        "ts": ts_utc,
+                        "direction": payload.direction,
+                        "terminal_id": payload.terminal_id,
+                        "is_manual": True,
+                        "created_by_user_id": current_user.id,
+                        "comment": payload.comment,
+                        "created_at": now,
+                    })
+            db.execute(insert(Event), rows)
+            affected = len(rows)
+        else:
+            day_ranges = [local_day_bounds_utc(d) for d in dates]
+            affected = (
+                db.query(Event)
+                .filter(Event.employee_id.in_(employee_ids))
+                .filter(Event.is_manual == True)
+                .filter(or_(*(and_(Event.ts >= start, Event.ts < end) for start, end in day_ranges)))
+                .delete(synchronize_session=False)
+            )
+        stats_cache.invalidate_employees(db, employee_ids)
+        db.commit()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Помилка масового коригування подій")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Не вдалося виконати коригування: {str(e)}")
+
+    logger.info(
+        f"Масове коригування: action={payload.action}, affected={affected}, "
+        f"admin={current_user.username}"
+    )
+
+    audit_log("manual_events_bulk", current_user.username, details={
+        "action": payload.action,
+        "employee_ids": employee_ids,
+        "dates": [d.isoformat() for d in dates],
+        "time": payload.time,
+        "direction": payload.direction,
+        "affected": affected,
+        "comment": payload.comment,
+    })
+
+    return {
+        "success": True,
+        "action": payload.action,
+        "affected": affected,
+        "employees": len(employee_ids),
+        "dates": len(dates),
+    }
+
+
 @router.get("/date/{employee_id}/{date}")
 def get_events_for_date(
         employee_id: int,
@@ -301,13 +444,8 @@ def get_events_for_date(
         # Парсимо дату
         date_obj = datetime.strptime(date, "%Y-%m-%d").date()
 
-        # Діапазон доби в WARSAW (00:00..00:00 наступного дня)
-        start_warsaw = datetime.combine(date_obj, time.min).replace(tzinfo=WARSAW)
-        end_warsaw = start_warsaw + timedelta(days=1)
-
-        # Переводимо в UTC (і робимо naive, бо в моделі DateTime без timezone)
-        start_utc = to_utc(start_warsaw).replace(tzinfo=None)
-        end_utc = to_utc(end_warsaw).replace(tzinfo=None)
+        # Діапазон доби в WARSAW (00:00..00:00 наступного дня) як naive UTC
+        start_utc, end_utc = local_day_bounds_utc(date_obj)
 
         events = (
             db.query(Event)
@@ -1,9 +1,10 @@
 """Positions API route."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.api.deps import require_admin
+from app.api.listing import LIST_MAX_LIMIT, FastJSONResponse, lean_list
 from app.db.session import get_db
 from app.models.position import Position
 from app.models.user import User
@@ -12,16 +13,27 @@ from app.security.audit import audit_log
 router = APIRouter(prefix="/positions", tags=["positions"])
 
 
-@router.get("/")
+_LIST_COLUMNS = {
+    "id": Position.id,
+    "name": Position.name,
+    "is_active": Position.is_active,
+}
+
+
+@router.get("/", response_class=FastJSONResponse)
 def list_positions(
     include_inactive: bool = False,
+    fields: str | None = Query(None, description="Поля через кому, напр. id,name"),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
-    q = db.query(Position)
-    if not include_inactive:
-        q = q.filter(Position.is_active == True)
-    return q.order_by(Position.name).all()
+    where = [] if include_inactive else [Position.is_active == True]
+    return lean_list(
+        db, _LIST_COLUMNS, fields=fields, where=where, order_by=[Position.name],
+        limit=limit, offset=offset,
+    )
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
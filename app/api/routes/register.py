@@ -1,4 +1,5 @@
 import logging
+from dataclasses import replace
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
@@ -7,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.employee import Employee
 from app.security.rate_limit import check_rate_limit
+from app.services import employee_uids
 from app.api.deps import get_current_terminal
 
 logger = logging.getLogger(__name__)
@@ -31,18 +33,27 @@ def first_scan(payload: FirstScanRequest, db: Session = Depends(get_db)):
     uid = payload.employee_uid.strip().upper()
     logger.info(f"FIRST_SCAN uid={uid}")
 
-    emp = db.query(Employee).filter(Employee.nfc_uid == uid).first()
+    emp = employee_uids.lookup(db, uid)
     if not emp:
-        sample = db.query(Employee.nfc_uid).limit(10).all()
-        logger.warning(f"FIRST_SCAN not found. Sample UIDs in DB: {sample}")
+        # Лічильник terminal_unknown_uid_total{uid} веде employee_uids
+        logger.warning(f"FIRST_SCAN not found uid={uid}")
         raise HTTPException(status_code=404, detail="Employee not found")
 
     # ⬇️ ДОДАТИ ЦЮ ПЕРЕВІРКУ
     if emp.public_key_b64:
         raise HTTPException(status_code=400, detail="Public key already registered. Contact admin to reset.")
 
-    emp.public_key_b64 = payload.public_key_b64.strip()
+    # Мапа воркера може відставати від іншого воркера (до
+    # EMPLOYEE_UID_CACHE_CHECK_SECONDS) — ключ записується лише поверх NULL
+    public_key_b64 = payload.public_key_b64.strip()
+    updated = db.query(Employee).filter(
+        Employee.id == emp.id, Employee.public_key_b64.is_(None),
+    ).update({Employee.public_key_b64: public_key_b64}, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Public key already registered. Contact admin to reset.")
+    employee_uids.bump(db)
     db.commit()
-    db.refresh(emp)
+    employee_uids.upsert(replace(emp, public_key_b64=public_key_b64))
 
     return FirstScanResponse(ok=True, status="public_key_saved", employee_id=emp.id)
\ No newline at end of file
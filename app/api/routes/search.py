@@ -1,11 +1,11 @@
-"""Search route — live employee search."""
+"""Search route — live employee search (served from the in-memory index)."""
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.api.deps import require_admin
 from app.db.session import get_db
-from app.models.employee import Employee
 from app.models.user import User
+from app.services import employee_search
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -17,22 +17,4 @@ def search_employees(
     db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
-    query = db.query(Employee)
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            Employee.full_name.ilike(like) |
-            Employee.nfc_uid.ilike(like) |
-            Employee.position.ilike(like)
-        )
-    employees = query.order_by(Employee.full_name).limit(limit).all()
-    return [
-        {
-            "id": e.id,
-            "full_name": e.full_name,
-            "nfc_uid": e.nfc_uid,
-            "position": e.position,
-            "is_active": e.is_active,
-        }
-        for e in employees
-    ]
+    return employee_search.search(db, q, limit)
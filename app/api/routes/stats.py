@@ -1,74 +1,179 @@
 from __future__ import annotations
 
+import hashlib
 from datetime import date, datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 from app.api.deps import require_admin
 from app.db.session import get_db
 from app.crud import event as event_crud
-from app.core.time import to_warsaw
+from app.core.time import local_day_bounds_utc, to_utc, to_warsaw
 from app.models.event import Event
 from app.models.employee import Employee
 from app.models.terminal import Terminal
+from app.services import stats_cache
 from app.schemas.stats import EmployeeDailyStats, DailyWorkStat, WorktimeAnomaly, WeekWorkStat, MonthWorkStat
 from app.services.worktime import build_intervals, split_interval_seconds_by_local_day, hms_from_seconds, iter_local_days
 
 router = APIRouter(prefix="/stats", dependencies=[Depends(require_admin)])
 
 
+RECENT_SCANS_DEFAULT_LIMIT = 500
+RECENT_SCANS_MAX_LIMIT = 2000
+
+
+def _recent_scans_etag(*parts) -> str:
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20] + '"'
+
+
 @router.get("/recent-scans")
 def recent_scans(
+    request: Request,
+    response: Response,
     scan_date: date = Query(None, description="YYYY-MM-DD (local Europe/Warsaw). Defaults to today."),
+    before_id: int | None = Query(None, ge=1, description="Keyset: сторінка подій, старіших за подію з цим id"),
+    after_id: int | None = Query(None, ge=1, description="Keyset: тільки події, новіші за подію з цим id"),
+    since: datetime | None = Query(None, description="Тільки події, додані в БД після цього моменту (ISO, UTC)"),
+    limit: int | None = Query(None, ge=1, le=RECENT_SCANS_MAX_LIMIT),
     db: Session = Depends(get_db),
 ):
     """
-    Всі сканування за вказану дату (або сьогодні),
+    Сканування за вказану дату (або сьогодні),
     відсортовані від найновіших до найстаріших.
+
+    Пагінація keyset:
+    - before_id — наступна сторінка вниз (передайте next_before_id з попередньої відповіді);
+    - after_id  — інкрементальне оновлення (передайте next_after_id з попередньої відповіді);
+    - since     — події, створені після моменту (включно з ручними подіями за минулий час).
+
+    Без limit і курсорів повертається весь день (як очікує dashboard);
+    з курсором без limit — сторінка з RECENT_SCANS_DEFAULT_LIMIT подій.
+
+    Підтримує ETag / If-None-Match: якщо за день нічого не змінилось — 304 без тіла.
     """
+    if before_id is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="before_id та after_id не можна передавати разом")
+    if limit is None and (before_id is not None or after_id is not None):
+        limit = RECENT_SCANS_DEFAULT_LIMIT
+
     if scan_date is None:
         scan_date = to_warsaw(datetime.now(tz=timezone.utc)).date()
 
-    # Доба в Warsaw → UTC
-    from zoneinfo import ZoneInfo
-    tz_w = ZoneInfo("Europe/Warsaw")
-    start_local = datetime(scan_date.year, scan_date.month, scan_date.day, tzinfo=tz_w)
-    end_local = start_local + timedelta(days=1)
-    start_utc = start_local.astimezone(timezone.utc).replace(tzinfo=None)
-    end_utc = end_local.astimezone(timezone.utc).replace(tzinfo=None)
+    start_utc, end_utc = local_day_bounds_utc(scan_date)
+    since_utc = to_utc(since).replace(tzinfo=None) if since is not None else None
 
-    rows = (
-        db.query(Event, Employee, Terminal)
+    # Дешевий відбиток дня: події не редагуються, тільки додаються/видаляються,
+    # тому (кількість, max id) змінюється при будь-якій зміні.
+    day_total, latest_id = (
+        db.query(func.count(Event.id), func.max(Event.id))
+        .filter(Event.ts >= start_utc, Event.ts < end_utc)
+        .one()
+    )
+    etag = _recent_scans_etag(
+        scan_date.isoformat(), day_total, latest_id, before_id, after_id, since_utc, limit,
+    )
+    if etag in {t.strip() for t in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    # Відбиток дня входить у ключ, тому кеш коректний і між воркерами
+    cache_params = (scan_date, day_total, latest_id, before_id, after_id, since_utc, limit)
+    cached = stats_cache.get("recent_scans", None, cache_params)
+    if cached is not stats_cache.MISS:
+        return cached
+    data_version = stats_cache.version(None)
+
+    q = (
+        db.query(
+            Event.id,
+            Event.employee_id,
+            Event.direction,
+            Event.ts,
+            Event.terminal_id,
+            Event.is_manual,
+            Event.comment,
+            Employee.full_name,
+            Employee.position,
+            Terminal.name.label("terminal_name"),
+        )
         .join(Employee, Event.employee_id == Employee.id)
         .outerjoin(Terminal, Event.terminal_id == Terminal.id)
         .filter(Event.ts >= start_utc, Event.ts < end_utc)
-        .order_by(Event.ts.desc())
-        .all()
     )
+    if since_utc is not None:
+        q = q.filter(Event.created_at > since_utc)
+
+    anchor_id = before_id or after_id
+    anchor_ts = db.query(Event.ts).filter(Event.id == anchor_id).scalar() if anchor_id else None
+
+    if before_id is not None:
+        if anchor_ts is not None:
+            q = q.filter(or_(Event.ts < anchor_ts, and_(Event.ts == anchor_ts, Event.id < before_id)))
+        else:
+            q = q.filter(Event.id < before_id)
+        q = q.order_by(Event.ts.desc(), Event.id.desc())
+    elif after_id is not None:
+        if anchor_ts is not None:
+            q = q.filter(or_(Event.ts > anchor_ts, and_(Event.ts == anchor_ts, Event.id > after_id)))
+        else:
+            q = q.filter(Event.id > after_id)
+        q = q.order_by(Event.ts.asc(), Event.id.asc())
+    else:
+        q = q.order_by(Event.ts.desc(), Event.id.desc())
+
+    if limit is None:
+        rows = q.all()
+        has_more = False
+    else:
+        rows = q.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    if after_id is not None:
+        # Новіші події вибираємо від якоря вгору, але віддаємо у звичному порядку
+        rows.reverse()
 
     result = []
-    for ev, emp, term in rows:
-        ts_local = to_warsaw(ev.ts.replace(tzinfo=timezone.utc))
+    for r in rows:
+        ts_local = to_warsaw(r.ts.replace(tzinfo=timezone.utc))
         result.append({
-            "id": ev.id,
-            "employee_id": emp.id,
-            "employee_name": emp.full_name,
-            "position": emp.position or "",
-            "direction": ev.direction,
-            "ts_utc": ev.ts.isoformat(),
+            "id": r.id,
+            "employee_id": r.employee_id,
+            "employee_name": r.full_name,
+            "position": r.position or "",
+            "direction": r.direction,
+            "ts_utc": r.ts.isoformat(),
             "ts_local": ts_local.strftime("%H:%M:%S"),
             "date_local": ts_local.strftime("%Y-%m-%d"),
-            "terminal_id": ev.terminal_id,
-            "terminal_name": term.name if term else "",
-            "is_manual": ev.is_manual,
-            "comment": ev.comment or "",
+            "terminal_id": r.terminal_id,
+            "terminal_name": r.terminal_name or "",
+            "is_manual": r.is_manual,
+            "comment": r.comment or "",
         })
 
-    return {"date": scan_date.isoformat(), "count": len(result), "events": result}
+    body = {
+        "date": scan_date.isoformat(),
+        "count": len(result),
+        "total": int(day_total or 0),
+        "latest_id": latest_id,
+        "has_more": has_more,
+        "next_before_id": result[-1]["id"] if result and after_id is None and has_more else None,
+        "next_after_id": result[0]["id"] if result else after_id,
+        "events": result,
+    }
+    stats_cache.put("recent_scans", None, cache_params, body, data_version)
+    return body
 
 
 @router.get("/employee/{employee_id}")
 def employee_stats(employee_id: int, db: Session = Depends(get_db)):
+    cached = stats_cache.get("employee_stats", employee_id, db=db)
+    if cached is not stats_cache.MISS:
+        return cached
+    data_version = stats_cache.version(employee_id)
+
     events = event_crud.list_events_for_employee(db, employee_id)
     if not events:
         raise HTTPException(status_code=404, detail="No events for employee")
@@ -93,7 +198,7 @@ def employee_stats(employee_id: int, db: Session = Depends(get_db)):
             }
         )
 
-    return {
+    body = {
         "employee_id": employee_id,
         "total_minutes": int(total_seconds // 60),
         "total_hms": hms_from_seconds(int(total_seconds)),
@@ -119,6 +224,10 @@ def employee_stats(employee_id: int, db: Session = Depends(get_db)):
             for ev in events
         ],
     }
+    # Відкрита зміна автозакривається на "зараз" — такий результат залежить від часу
+    if not has_open:
+        stats_cache.put("employee_stats", employee_id, (), body, data_version)
+    return body
 
 
 @router.get("/employee/{employee_id}/daily", response_model=EmployeeDailyStats)
@@ -128,6 +237,12 @@ def employee_daily_stats(
     from_date: date = Query(..., description="YYYY-MM-DD (local Europe/Warsaw date)"),
     to_date: date = Query(..., description="YYYY-MM-DD (local Europe/Warsaw date)"),
 ):
+    cache_params = (from_date, to_date)
+    cached = stats_cache.get("employee_daily_stats", employee_id, cache_params, db=db)
+    if cached is not stats_cache.MISS:
+        return cached
+    data_version = stats_cache.version(employee_id)
+
     events = event_crud.list_events_for_employee(db, employee_id)
     if not events:
         raise HTTPException(status_code=404, detail="No events for employee")
@@ -248,7 +363,7 @@ def employee_daily_stats(
         for k, v in sorted(months_map.items())
     ]
 
-    return EmployeeDailyStats(
+    body = EmployeeDailyStats(
         employee_id=employee_id,
         from_date=from_date.isoformat(),
         to_date=to_date.isoformat(),
@@ -258,3 +373,12 @@ def employee_daily_stats(
         weeks=weeks,
         months=months,
     )
+    if not has_open:
+        stats_cache.put("employee_daily_stats", employee_id, cache_params, body, data_version)
+    return body
+
+
+@router.get("/cache")
+def stats_cache_info():
+    """Метрики кешу статистики: hits / misses по ендпоінтах, розмір, інвалідації."""
+    return stats_cache.cache_stats()
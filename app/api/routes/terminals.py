@@ -1,13 +1,14 @@
 import logging
 from datetime import timezone as tz
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from sqlalchemy.exc import IntegrityError
 
 # БАГ №1 ВИПРАВЛЕНО: get_current_user вилучено — require_admin тепер повертає User
 from app.api.deps import require_admin, get_current_terminal
+from app.api.listing import LIST_MAX_LIMIT, FastJSONResponse, lean_list
 from app.db.session import get_db
 from app.crud import terminal as terminal_crud
 from app.security.rate_limit import check_rate_limit
@@ -17,6 +18,8 @@ from app.models.user import User
 from app.schemas.terminal import (
     TerminalRegisterRequest,
     TerminalRegisterResponse,
+    TerminalScanBatchRequest,
+    TerminalScanBatchResponse,
     TerminalScanRequest,
     TerminalScanResponse,
     TerminalSecureScanRequest,
@@ -28,9 +31,12 @@ from app.crud.event import create_event_from_terminal_scan
 
 from app.security.verify import verify_signature
 from app.security.challenge_store import generate_challenge, consume_challenge, cleanup_expired
+from app.services import employee_uids, scan_ids, scan_locks, scan_writer
 from app.crud import employee as employee_crud
-from app.models.event import Event
+from app.crud import event as event_crud
 from app.models.terminal import Terminal
+from app.core import metrics
+from app.core.config import settings
 from app.core.time import to_warsaw
 from app.ws.manager import ws_manager
 
@@ -40,6 +46,43 @@ log = logging.getLogger("uvicorn.error")
 # =========================
 # Helpers
 # =========================
+SCAN_OUTCOMES = metrics.counter(
+    "terminal_scans_total",
+    "Terminal scans by outcome: registered, cooldown, duplicate, conflict, unknown_employee, bad_signature, "
+    "invalid_challenge.",
+    ("endpoint", "outcome"),
+)
+
+
+def _count_scan(endpoint: str, result: dict) -> None:
+    if result.get("duplicate"):
+        outcome = "duplicate"
+    else:
+        outcome = "registered" if result.get("event_id") else "cooldown"
+    SCAN_OUTCOMES.inc(endpoint=endpoint, outcome=outcome)
+
+
+async def _register_scan(db: Session, payload: TerminalScanRequest) -> dict:
+    """Запис скану: через group-commit writer, якщо він запущений, інакше напряму."""
+    # Повертаємо з'єднання запиту в пул, поки скан чекає (на групу або на
+    # блокування бейджа): інакше при сплеску запити, що чекають, тримають
+    # увесь пул. expire_on_commit=False — завантажені об'єкти лишаються доступними.
+    db.commit()
+    # Бейдж, який щойно не знайшли (стороння картка, термінал повторює скан) —
+    # відмова з пам'яті, без блокування і черги writer'а; з БД читається хіба
+    # що версія мапи (не частіше за EMPLOYEE_UID_CACHE_CHECK_SECONDS)
+    if employee_uids.is_unknown(db, payload.uid):
+        raise ValueError(event_crud.UNKNOWN_UID_MESSAGE)
+    if scan_writer.running():
+        return await scan_writer.submit(event_crud.ScanInput(
+            terminal_id=payload.terminal_id, uid=payload.uid, ts=payload.ts, scan_id=payload.scan_id,
+        ))
+    # Читання останньої події, рішення і INSERT — у потоці пулу (не блокують
+    # event loop), а скани одного бейджа в цьому воркері йдуть по черзі
+    async with scan_locks.lock_for(payload.uid):
+        return await run_in_threadpool(create_event_from_terminal_scan, db=db, payload=payload)
+
+
 def _require_terminal_registered(db: Session, terminal_id: int) -> Terminal:
     term = db.get(Terminal, terminal_id)
     if term is None:
@@ -78,22 +121,26 @@ def _build_ws_payload(*, result: dict, employee, terminal, last_event=None) -> d
 router = APIRouter()
 
 
-@router.get("/")
+_LIST_COLUMNS = {
+    "id": Terminal.id,
+    "name": Terminal.name,
+    "api_key": Terminal.api_key,
+    "is_active": Terminal.is_active,
+    "last_seen_at": Terminal.last_seen_at,
+}
+
+
+@router.get("/", response_class=FastJSONResponse)
 def list_terminals(
+    fields: str | None = Query(None, description="Поля через кому, напр. id,name"),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     _: User = Depends(require_admin),
 ):
-    terminals = db.query(Terminal).all()
-    return [
-        {
-            "id": t.id,
-            "name": t.name,
-            "api_key": t.api_key,
-            "is_active": t.is_active,
-            "last_seen_at": t.last_seen_at.isoformat() if t.last_seen_at else None,
-        }
-        for t in terminals
-    ]
+    return lean_list(
+        db, _LIST_COLUMNS, fields=fields, order_by=[Terminal.id], limit=limit, offset=offset,
+    )
 
 
 @router.post("/")
@@ -196,37 +243,104 @@ def terminal_register(payload: TerminalRegisterRequest, db: Session = Depends(ge
 
 @router_public.post("/scan", response_model=TerminalScanResponse)
 async def terminal_scan(payload: TerminalScanRequest, db: Session = Depends(get_db)):
-    _require_terminal_registered(db, payload.terminal_id)
+    # Повтор скану, вже обробленого цим воркером, — відповідь з пам'яті без БД
+    if payload.scan_id:
+        cached = scan_ids.get(payload.terminal_id, payload.scan_id)
+        if cached is not None:
+            _count_scan("scan", cached)
+            return TerminalScanResponse(
+                ok=True, message=cached["message"], employee_id=cached["employee_id"], duplicate=True,
+            )
+
+    term = _require_terminal_registered(db, payload.terminal_id)
 
     try:
-        result = create_event_from_terminal_scan(db=db, payload=payload)
-
-        # WS broadcast (instant — async)
-        if result.get("event_id"):
-            emp = employee_crud.get_by_uid(db, uid=payload.uid.strip().upper())
-            term = db.get(Terminal, payload.terminal_id)
-            last = (
-                db.query(Event)
-                .filter(Event.employee_id == result["employee_id"])
-                .order_by(desc(Event.ts))
-                .first()
-            )
+        result = await _register_scan(db, payload)
+        _count_scan("scan", result)
+
+        # WS broadcast (instant — async); повтор (duplicate) не розсилається вдруге
+        if result.get("event") is not None:
+            # Термінал завантажено перевіркою вище, працівник і подія — з результату
+            # створення: WS-пейлоад не потребує жодного додаткового SELECT
             await ws_manager.broadcast(
-                _build_ws_payload(result=result, employee=emp, terminal=term, last_event=last)
+                _build_ws_payload(result=result, employee=result["employee"], terminal=term, last_event=result["event"])
             )
 
         return TerminalScanResponse(
             ok=True,
             message=result["message"],
             employee_id=result["employee_id"],
+            duplicate=bool(result.get("duplicate")),
         )
     except ValueError as e:
+        SCAN_OUTCOMES.inc(endpoint="scan", outcome="unknown_employee")
         raise HTTPException(status_code=400, detail=str(e))
+    except event_crud.ScanConflictError as e:
+        SCAN_OUTCOMES.inc(endpoint="scan", outcome="conflict")
+        raise HTTPException(status_code=409, detail=str(e))
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Terminal not registered")
 
 
+@router_public.post("/scan/batch", response_model=TerminalScanBatchResponse)
+async def terminal_scan_batch(payload: TerminalScanBatchRequest, db: Session = Depends(get_db)):
+    """
+    Пакетне вивантаження сканів, накопичених терміналом офлайн.
+
+    Один HTTP-запит (і одна транзакція) на весь пакет — повтор черги не
+    впирається в rate limit. Кожен скан несе scan_id: повторне надсилання
+    того ж пакета (обірвана відповідь) не створює дублікатів.
+    Dashboard отримує одне WS-повідомлення "scan_batch" з усіма новими подіями.
+    """
+    if len(payload.scans) > settings.terminal_scan_batch_max:
+        raise HTTPException(
+            status_code=413, detail=f"Too many scans (max {settings.terminal_scan_batch_max})",
+        )
+    term = _require_terminal_registered(db, payload.terminal_id)
+    # Як у _register_scan: з'єднання назад у пул, поки пакет чекає блокувань
+    db.commit()
+
+    try:
+        # Бейджі пакета не обробляються паралельно з поодинокими сканами
+        # цього воркера; сама транзакція (до TERMINAL_SCAN_BATCH_MAX сканів) —
+        # у потоці пулу, а не в event loop
+        async with scan_locks.hold(s.uid for s in payload.scans):
+            results = await run_in_threadpool(
+                event_crud.create_events_from_terminal_batch, db, payload.terminal_id, payload.scans,
+            )
+    except IntegrityError:
+        # Паралельний запит з тими ж scan_id встиг закомітитись першим —
+        # повтор пакета отримає збережені результати
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Batch is being processed concurrently, retry")
+    except event_crud.ScanConflictError as e:
+        # Інший воркер раз у раз випереджав умовний INSERT — пакет відкочено цілком
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
+    events = []
+    for r in results:
+        SCAN_OUTCOMES.inc(endpoint="scan-batch", outcome="duplicate" if r["duplicate"] else r["status"])
+        if r.get("event") is not None:
+            events.append(_build_ws_payload(result=r, employee=r["employee"], terminal=term, last_event=r["event"]))
+
+    if events:
+        await ws_manager.broadcast({
+            "type": "scan_batch",
+            "terminal_id": term.id,
+            "terminal_name": term.name,
+            "events": events,
+        })
+
+    return TerminalScanBatchResponse(
+        ok=True,
+        registered=len(events),
+        duplicates=sum(1 for r in results if r["duplicate"]),
+        results=results,
+    )
+
+
 # =========================
 # SECURE SCAN (Challenge–Response)
 # =========================
@@ -238,24 +352,20 @@ async def terminal_secure_scan(payload: TerminalSecureScanRequest, db: Session =
     )
 
     # 0) Перевірка терміналу
-    _require_terminal_registered(db, payload.terminal_id)
+    term = _require_terminal_registered(db, payload.terminal_id)
 
     # 1) Знайти співробітника
     employee = employee_crud.get_by_uid(db, uid=payload.employee_uid)
     if not employee:
         log.info("SECURE_SCAN employee not found")
+        SCAN_OUTCOMES.inc(endpoint="secure-scan", outcome="unknown_employee")
         raise HTTPException(status_code=404, detail="Employee not found")
 
     if not getattr(employee, "public_key_b64", None):
         log.info("SECURE_SCAN employee has no public key")
         raise HTTPException(status_code=400, detail="Employee has no public key registered")
 
-    # 2a) Перевірка server-side challenge (захист від replay attack)
-    if not consume_challenge(payload.challenge_b64, payload.terminal_id):
-        log.warning("SECURE_SCAN invalid/expired/replayed challenge")
-        return TerminalSecureScanResponse(ok=False, message="invalid_challenge", employee_id=None)
-
-    # 2b) Перевірка підпису
+    # 2a) Перевірка підпису — до будь-якої відповіді з даними працівника
     ok = verify_signature(
         public_key_b64=employee.public_key_b64,
         challenge_b64=payload.challenge_b64,
@@ -263,8 +373,34 @@ async def terminal_secure_scan(payload: TerminalSecureScanRequest, db: Session =
     )
     if not ok:
         log.warning("SECURE_SCAN bad_signature")
+        SCAN_OUTCOMES.inc(endpoint="secure-scan", outcome="bad_signature")
         return TerminalSecureScanResponse(ok=False, message="bad_signature", employee_id=None)
 
+    # 2b) Повтор уже обробленого скану (підпис перевірено): challenge вже
+    # використано, тому повертаємо збережений результат без його перевірки
+    # і без запису в БД — лише якщо скан належить цьому ж працівнику
+    if payload.scan_id:
+        stored = event_crud.get_processed_scans(db, payload.terminal_id, [payload.scan_id]).get(payload.scan_id)
+        if stored is not None:
+            if stored["employee_id"] != employee.id:
+                log.warning("SECURE_SCAN scan_id belongs to another employee")
+                raise HTTPException(status_code=409, detail="scan_id already used")
+            _count_scan("secure-scan", stored)
+            return TerminalSecureScanResponse(
+                ok=True,
+                message=stored["message"],
+                employee_id=stored["employee_id"],
+                employee_name=employee.full_name,
+                direction=stored["direction"],
+                duplicate=True,
+            )
+
+    # 2c) Перевірка server-side challenge (захист від replay attack)
+    if not consume_challenge(payload.challenge_b64, payload.terminal_id):
+        log.warning("SECURE_SCAN invalid/expired/replayed challenge")
+        SCAN_OUTCOMES.inc(endpoint="secure-scan", outcome="invalid_challenge")
+        return TerminalSecureScanResponse(ok=False, message="invalid_challenge", employee_id=None)
+
     # 3) Створення події
     try:
         scan_payload = TerminalScanRequest(
@@ -272,22 +408,19 @@ async def terminal_secure_scan(payload: TerminalSecureScanRequest, db: Session =
             terminal_id=payload.terminal_id,
             direction=payload.direction,
             ts=payload.ts,
+            scan_id=payload.scan_id,
         )
-        result = create_event_from_terminal_scan(db=db, payload=scan_payload)
-
-        # Останній запис у БД
-        last = (
-            db.query(Event)
-            .filter(Event.employee_id == result["employee_id"])
-            .order_by(desc(Event.ts))
-            .first()
-        )
+        result = await _register_scan(db, scan_payload)
+        _count_scan("secure-scan", result)
+
+        # Останній запис: щойно створена подія або, якщо скан відхилено
+        # cooldown'ом, попередня з БД
+        last = result.get("event") or event_crud.get_last_event_for_employee(db, result["employee_id"])
         if last:
             log.info(f"SECURE_SCAN saved direction={last.direction} ts={last.ts}")
 
         # WS broadcast (instant — async, await)
-        if result.get("event_id"):
-            term = db.get(Terminal, payload.terminal_id)
+        if result.get("event") is not None:
             await ws_manager.broadcast(
                 _build_ws_payload(result=result, employee=employee, terminal=term, last_event=last)
             )
@@ -297,11 +430,16 @@ async def terminal_secure_scan(payload: TerminalSecureScanRequest, db: Session =
             message=result["message"],
             employee_id=result["employee_id"],
             employee_name=employee.full_name if employee else None,
-            direction=last.direction if last else result.get("direction"),
+            direction=result.get("direction") or (last.direction if last else None),
+            duplicate=bool(result.get("duplicate")),
         )
     except ValueError as e:
         log.warning(f"SECURE_SCAN 400: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except event_crud.ScanConflictError as e:
+        log.warning(f"SECURE_SCAN 409: {str(e)}")
+        SCAN_OUTCOMES.inc(endpoint="secure-scan", outcome="conflict")
+        raise HTTPException(status_code=409, detail=str(e))
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Terminal not registered")
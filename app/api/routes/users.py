@@ -2,14 +2,14 @@
 API endpoints для управління користувачами (адміністраторами)
 """
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models import User, UserRole
 from app.core.security import hash_password
 from app.api.deps import require_admin, get_current_user
+from app.api.listing import LIST_MAX_LIMIT, FastJSONResponse, lean_list
 from app.security.audit import audit_log
 from pydantic import BaseModel, Field
 
@@ -38,14 +38,25 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
-@router.get("/", response_model=List[UserResponse])
+_LIST_COLUMNS = {
+    "id": User.id,
+    "username": User.username,
+    "role": User.role,
+}
+
+
+@router.get("/", response_class=FastJSONResponse)
 def list_users(
+    fields: str | None = Query(None, description="Поля через кому, напр. id,username"),
+    limit: int | None = Query(None, ge=1, le=LIST_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)
 ):
     """Список всіх користувачів (тільки для адмінів)"""
-    users = db.query(User).all()
-    return users
+    return lean_list(
+        db, _LIST_COLUMNS, fields=fields, order_by=[User.id], limit=limit, offset=offset,
+    )
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -29,12 +29,51 @@ class Settings(BaseSettings):
 
     # ── Database ─────────────────────────────────────────────────────────────
     database_url: str
-    db_pool_size: int = 10
-    db_max_overflow: int = 20
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
     db_pool_recycle: int = 1800   # seconds — prevents stale connections
-    db_pool_pre_ping: bool = True  # validate connection before use
+    # DB_POOL_SIZE / DB_MAX_OVERFLOW above size the default (dashboard) lane.
+    # Terminal and report traffic get pools of their own (app/api/lanes.py)
+    db_lanes_enabled: bool = True
+    terminal_db_pool_size: int = 5
+    terminal_db_max_overflow: int = 5
+    reports_db_pool_size: int = 2
+    reports_db_max_overflow: int = 3
+    # Per-checkout ping is off: /health/ready checks the DB and disposes the
+    # pool when it fails (app/core/monitor.py)
+    db_pool_pre_ping: bool = False
     sql_echo: bool = False
 
+    # ── SQL instrumentation (Server-Timing header, /metrics, slow log) ──────
+    query_stats_enabled: bool = True
+    slow_query_ms: int = 500                 # 0 disables the slow-query log
+    slow_query_max_fingerprints: int = 200
+
+    # ── Health / readiness (/health/ready) ──────────────────────────────────
+    health_db_cache_seconds: float = 5.0
+    health_db_timeout_seconds: float = 2.0
+    health_pool_saturation_max: float = 0.9  # checked-out share of pool_size + max_overflow
+    health_loop_lag_max_ms: int = 500
+    loop_lag_sample_interval_ms: int = 500
+
+    # ── Sync handler threads (app/core/threadpool.py) ────────────────────────
+    threadpool_tokens: int = 40
+
+    # ── Traffic lanes (app/api/lanes.py) ─────────────────────────────────────
+    # Concurrent requests per lane; 0 = unlimited
+    terminal_concurrency_limit: int = 0
+    dashboard_concurrency_limit: int = 24
+    reports_concurrency_limit: int = 8
+    # Requests allowed to wait for a slot; beyond that → 503 (0 = no queue limit)
+    dashboard_queue_max: int = 64
+    reports_queue_max: int = 8
+    lane_queue_timeout_seconds: float = 15.0
+
+    # ── Prometheus metrics (/metrics) ────────────────────────────────────────
+    # Shared dir for per-worker snapshots when gunicorn runs several workers
+    metrics_multiproc_dir: str = ""
+    metrics_flush_seconds: float = 5.0
+
     # ── Security ─────────────────────────────────────────────────────────────
     jwt_secret: str
     jwt_alg: str = "HS256"
@@ -46,6 +85,56 @@ class Settings(BaseSettings):
 
     # ── Terminal ─────────────────────────────────────────────────────────────
     terminal_scan_cooldown_seconds: int = 5
+    # Max scans per POST /api/terminal/scan/batch
+    terminal_scan_batch_max: int = 500
+    # Recently processed scan_ids kept in memory per worker; 0 disables the LRU
+    scan_id_cache_max_entries: int = 10000
+    # Group commit (app/services/scan_writer.py): scans are committed together
+    # every N ms or N scans instead of one transaction per scan
+    scan_group_commit_enabled: bool = False
+    scan_group_commit_interval_ms: int = 5
+    scan_group_commit_max_events: int = 100
+    scan_group_commit_queue_max: int = 5000
+    # UID → employee map (app/services/employee_uids.py): how often a worker
+    # checks cache_versions for changes made by other workers
+    employee_uid_cache_check_seconds: float = 1.0
+    # Unknown UIDs are rejected from memory for this long (0 disables);
+    # per-UID rejection counters get at most N distinct labels
+    unknown_uid_cache_ttl_seconds: int = 30
+    unknown_uid_cache_max_entries: int = 10000
+    unknown_uid_metrics_max_uids: int = 100
+
+    # ── Stats response cache ────────────────────────────────────────────────
+    # 0 disables the cache; TTL caps the age of any entry
+    stats_cache_ttl_seconds: int = 60
+    stats_cache_max_entries: int = 2048
+    # How often a worker checks an employee's cache_versions counter for
+    # writes made by other workers
+    stats_cache_check_seconds: float = 1.0
+
+    # ── Schedule PDF ─────────────────────────────────────────────────────────
+    # Render processes per API worker; 0 renders in the request thread
+    schedule_pdf_workers: int = 2
+    schedule_pdf_timeout_seconds: int = 120
+    schedule_pdf_cache_max_entries: int = 32
+
+    # ── Employee search index ────────────────────────────────────────────────
+    # Rebuild from DB when older than this (bounds staleness across workers)
+    search_index_ttl_seconds: int = 300
+
+    # ── Audit log writer ─────────────────────────────────────────────────────
+    audit_flush_interval_ms: int = 500
+    audit_batch_size: int = 200
+    audit_queue_max: int = 10000
+    # Entries that could not be written to the DB are appended here (JSON lines)
+    audit_spill_path: str = "./audit_spill.jsonl"
+
+    # ── Retention (python -m app.services.retention) ─────────────────────────
+    audit_retention_days: int = 365          # 0 keeps audit rows forever
+    events_retention_months: int = 0         # 0 keeps events forever
+    retention_archive_dir: str = "./archive"
+    retention_batch_size: int = 1000
+    terminal_scan_id_retention_days: int = 30   # idempotency keys (terminal_scan_ids)
 
     # ── CORS ─────────────────────────────────────────────────────────────────
     # "*" allows all origins — fine for dev, restrict in production
@@ -0,0 +1,418 @@
+"""
+In-process Prometheus metrics registry (text exposition format on /metrics).
+
+Metric types: Counter, Gauge (optionally computed at scrape time by a
+callback) and Histogram. Each metric guards its own small dict with its own
+lock, so hot paths only contend with updates of the same metric.
+
+Multiprocess mode (gunicorn with several workers)
+-------------------------------------------------
+With METRICS_MULTIPROC_DIR set, every worker writes a snapshot of its
+registry to <dir>/metrics-<pid>.json every METRICS_FLUSH_SECONDS (and right
+before it serves a scrape). /metrics then merges all snapshots:
+- counters and histograms are summed over all files, including files of
+  workers that have exited — totals do not drop when gunicorn recycles one;
+- gauges are summed ("sum") or maxed ("max") over live workers only.
+The directory must be emptied when the whole server starts (see Dockerfile).
+Without it, /metrics shows only the worker that served the scrape.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{n}="{_label_value(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), v] for k, v in self._values.items()]
+        return {"type": self.kind, "help": self.documentation, "labels": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        *,
+        callback: Callable[[], float | dict[tuple, float]] | None = None,
+        multiprocess_mode: str = "sum",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ("sum", "max"):
+            raise ValueError("multiprocess_mode must be 'sum' or 'max'")
+        self.callback = callback
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_max(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            if value > self._values.get(key, -math.inf):
+                self._values[key] = float(value)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> dict:
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception:
+                logger.exception(f"Metric callback failed: {self.name}")
+                result = {}
+            if not isinstance(result, dict):
+                result = {(): result}
+            with self._lock:
+                self._values = {tuple(str(v) for v in k): float(v) for k, v in result.items()}
+        snap = super().snapshot()
+        snap["mode"] = self.multiprocess_mode
+        return snap
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket (non-cumulative, last = +Inf), sum, count]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def get(self, **labels) -> tuple[int, float]:
+        """(count, sum) for a label set."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (state[2], state[1]) if state else (0, 0.0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = [[list(k), [list(s[0]), s[1], s[2]]] for k, s in self._values.items()]
+        return {
+            "type": self.kind, "help": self.documentation, "labels": list(self.labelnames),
+            "buckets": list(self.buckets), "values": values,
+        }
+
+
+# ── Registry ─────────────────────────────────────────────────────────────────
+
+_registry_lock = threading.Lock()
+_registry: dict[str, _Metric] = {}
+
+
+def _register(cls, name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Gauge:
+    return _register(Gauge, name, documentation, labelnames, **kwargs)
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (), **kwargs) -> Histogram:
+    return _register(Histogram, name, documentation, labelnames, **kwargs)
+
+
+def snapshot() -> dict:
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {m.name: m.snapshot() for m in metrics}
+
+
+def reset() -> None:
+    """Zero every metric (tests)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for m in metrics:
+        m.clear()
+
+
+# ── Multiprocess snapshots ───────────────────────────────────────────────────
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def write_snapshot() -> None:
+    directory = settings.metrics_multiproc_dir
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots(directory: str) -> list[tuple[bool, dict]]:
+    result = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+            with open(path, encoding="utf-8") as f:
+                result.append((_pid_alive(pid), json.load(f)))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Skipping metrics snapshot {path}: {e}")
+    return result
+
+
+def merge(snapshots: list[tuple[bool, dict]]) -> dict:
+    """Merge per-process snapshots: (alive, snapshot) pairs."""
+    merged: dict[str, dict] = {}
+    for alive, snap in snapshots:
+        for name, metric in snap.items():
+            kind = metric["type"]
+            if kind == "gauge" and not alive:
+                continue
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**metric, "values": {}}
+            values = target["values"]
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                if kind == "histogram":
+                    if key not in values:
+                        values[key] = [list(value[0]), value[1], value[2]]
+                    else:
+                        cur = values[key]
+                        cur[0] = [a + b for a, b in zip(cur[0], value[0])]
+                        cur[1] += value[1]
+                        cur[2] += value[2]
+                elif kind == "gauge" and metric.get("mode") == "max":
+                    values[key] = max(values.get(key, -math.inf), value)
+                else:
+                    values[key] = values.get(key, 0.0) + value
+    return merged
+
+
+def _collect() -> dict:
+    directory = settings.metrics_multiproc_dir
+    if directory:
+        try:
+            write_snapshot()
+            return merge(_read_snapshots(directory))
+        except OSError as e:
+            logger.warning(f"Metrics multiprocess dir unavailable, serving local metrics: {e}")
+    return merge([(True, snapshot())])
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for name, metric in sorted(_collect().items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labels"]
+        for key, value in sorted(metric["values"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, n in zip([*metric["buckets"], math.inf], counts):
+                cumulative += n
+                labels = _format_labels([*labelnames, "le"], [*key, _format_number(bound)])
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_number(total)}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# ── Snapshot writer thread ───────────────────────────────────────────────────
+
+_stop = threading.Event()
+_writer: threading.Thread | None = None
+
+
+def _run() -> None:
+    while not _stop.wait(settings.metrics_flush_seconds):
+        try:
+            write_snapshot()
+        except Exception:
+            logger.exception("Failed to write metrics snapshot")
+
+
+def start_exporter() -> None:
+    """Start periodic snapshot writes (no-op without METRICS_MULTIPROC_DIR)."""
+    global _writer
+    if not settings.metrics_multiproc_dir or (_writer is not None and _writer.is_alive()):
+        return
+    _stop.clear()
+    _writer = threading.Thread(target=_run, name="metrics-snapshot", daemon=True)
+    _writer.start()
+
+
+def stop_exporter() -> None:
+    global _writer
+    if _writer is None:
+        return
+    _stop.set()
+    _writer.join(timeout=5)
+    _writer = None
+    try:
+        write_snapshot()
+    except OSError:
+        logger.exception("Failed to write final metrics snapshot")
+
+
+# ── HTTP request latency ─────────────────────────────────────────────────────
+
+# Route label for requests that did not match any route (404, static files)
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: observes request latency per route template."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route_template(scope), status=status,
+            )
@@ -0,0 +1,221 @@
+"""
+Runtime health signals for /health/ready and /metrics.
+
+- Event-loop lag: a background task sleeps for a fixed interval and measures
+  how late it wakes up. Blocking work on the loop (sync calls inside async
+  handlers) shows up here directly. The reported value is the worst of the
+  last LAG_WINDOW samples, so one quick sample does not hide a recent stall.
+- DB check: SELECT 1 through every lane pool with its latency, cached for
+  HEALTH_DB_CACHE_SECONDS so frequent probes do not add load. A failed check
+  disposes all lane pools, which replaces per-checkout pre-ping
+  (DB_POOL_PRE_PING) for dropping stale connections after a MySQL restart.
+- Pool saturation: checked-out connections / (pool_size + max_overflow),
+  per lane pool. A full reports pool is expected under month-end load and
+  does not fail readiness; terminal or dashboard pools do.
+- Threadpool: the same task samples the sync-handler thread limiter and the
+  per-group limiters (app/core/threadpool.py) and logs when calls start
+  queueing for a worker thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import text
+
+from app.core import metrics, threadpool
+from app.core.config import settings
+from app.db.session import DEFAULT_LANE, engines
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.gauge(
+    "event_loop_lag_seconds", "Worst event-loop wake-up delay over the last LAG_WINDOW samples.", multiprocess_mode="max",
+)
+
+# Samples kept for the reported (max) lag
+LAG_WINDOW = 10
+
+# Lanes whose exhausted pool makes the worker not ready
+READINESS_LANES = ("terminal", "dashboard")
+
+_lag_samples: deque[float] = deque(maxlen=LAG_WINDOW)
+_loop_lag_ms = 0.0
+_lag_task: asyncio.Task | None = None
+_threadpool: dict = {}
+
+
+# ── Event-loop lag ───────────────────────────────────────────────────────────
+
+def _sample_threadpool() -> None:
+    global _threadpool
+    previous = _threadpool.get("waiting", 0)
+    _threadpool = threadpool.sample()
+    if _threadpool["waiting"] and not previous:
+        logger.warning(
+            f"Threadpool saturated: {_threadpool['busy']}/{_threadpool['tokens']} threads busy, "
+            f"{_threadpool['waiting']} waiting"
+        )
+    elif previous and not _threadpool["waiting"]:
+        logger.info("Threadpool queue drained")
+
+
+async def _sample_loop_lag() -> None:
+    global _loop_lag_ms
+    loop = asyncio.get_running_loop()
+    while True:
+        interval = settings.loop_lag_sample_interval_ms / 1000.0
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag_ms = max(loop.time() - started - interval, 0.0) * 1000.0
+        _lag_samples.append(lag_ms)
+        _loop_lag_ms = max(_lag_samples)
+        LOOP_LAG.set(_loop_lag_ms / 1000.0)
+        if lag_ms >= settings.health_loop_lag_max_ms:
+            logger.warning(f"Event loop lag {lag_ms:.0f} ms")
+        _sample_threadpool()
+
+
+def loop_lag_ms() -> float:
+    return _loop_lag_ms
+
+
+def threadpool_status() -> dict:
+    return _threadpool
+
+
+def start() -> None:
+    """Start the loop-lag / threadpool sampler (call from the app lifespan)."""
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.get_running_loop().create_task(_sample_loop_lag(), name="loop-lag-monitor")
+
+
+async def stop() -> None:
+    global _lag_task
+    if _lag_task is None:
+        return
+    _lag_task.cancel()
+    try:
+        await _lag_task
+    except asyncio.CancelledError:
+        pass
+    _lag_task = None
+
+
+# ── DB pool ──────────────────────────────────────────────────────────────────
+
+def _max_overflow(lane: str) -> int:
+    if lane == DEFAULT_LANE or not settings.db_lanes_enabled:
+        return settings.db_max_overflow
+    return getattr(settings, f"{lane}_db_max_overflow")
+
+
+def _lane_pool(lane: str) -> dict:
+    pool = engines[lane].pool
+    if not hasattr(pool, "checkedout"):
+        # NullPool (SQLite) — connections are not pooled
+        return {"size": None, "checked_out": None, "overflow": None, "saturation": 0.0}
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = size + max(_max_overflow(lane), 0)
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+def pool_status() -> dict:
+    """Per-lane pools; "saturation" is the worst of READINESS_LANES."""
+    lanes = {lane: _lane_pool(lane) for lane in engines}
+    saturation = max((lanes[lane]["saturation"] for lane in READINESS_LANES if lane in lanes), default=0.0)
+    return {"saturation": saturation, "lanes": lanes}
+
+
+# ── DB check ─────────────────────────────────────────────────────────────────
+
+_db_lock = threading.Lock()
+_db_result: dict | None = None
+_db_checked_at = 0.0
+
+
+def _lane_engines() -> dict:
+    """One entry per distinct engine (lanes share the default one when DB_LANES_ENABLED is off)."""
+    distinct: dict = {}
+    for lane, eng in engines.items():
+        if all(eng is not seen for seen in distinct.values()):
+            distinct[lane] = eng
+    return distinct
+
+
+def _run_db_check() -> dict:
+    started = time.perf_counter()
+    lane_engines = _lane_engines()
+    for lane, eng in lane_engines.items():
+        try:
+            with eng.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Readiness DB check failed ({lane} pool): {e}")
+            # Stale connections (e.g. after a MySQL restart) are dropped here
+            # instead of pinging on every checkout — in every lane, since the
+            # other pools hold connections to the same server
+            for other in lane_engines.values():
+                other.dispose()
+            return {"ok": False, "latency_ms": None, "error": type(e).__name__, "lane": lane}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000.0, 1), "error": None}
+
+
+def db_status() -> dict:
+    """Cached DB check; only one thread runs the actual query at a time."""
+    global _db_result, _db_checked_at
+    with _db_lock:
+        age = time.monotonic() - _db_checked_at
+        if _db_result is None or age >= settings.health_db_cache_seconds:
+            _db_result = _run_db_check()
+            _db_checked_at = time.monotonic()
+            age = 0.0
+        return {**_db_result, "age_s": round(age, 1)}
+
+
+def reset() -> None:
+    global _db_result, _db_checked_at, _loop_lag_ms, _threadpool
+    with _db_lock:
+        _db_result = None
+        _db_checked_at = 0.0
+    _lag_samples.clear()
+    _loop_lag_ms = 0.0
+    _threadpool = {}
+
+
+# ── Readiness ────────────────────────────────────────────────────────────────
+
+async def readiness() -> tuple[bool, dict]:
+    pool = pool_status()
+    checks: dict = {"pool": pool, "loop_lag_ms": round(_loop_lag_ms, 1), "threadpool": _threadpool}
+    failed: list[str] = []
+
+    if pool["saturation"] >= settings.health_pool_saturation_max:
+        failed.append("pool")
+        # No free connection — the DB check would only wait on the pool
+        checks["db"] = {"ok": None, "skipped": "pool saturated"}
+    else:
+        try:
+            checks["db"] = await asyncio.wait_for(
+                asyncio.to_thread(db_status), timeout=settings.health_db_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            checks["db"] = {"ok": False, "latency_ms": None, "error": "timeout"}
+        if not checks["db"]["ok"]:
+            failed.append("db")
+
+    if _loop_lag_ms >= settings.health_loop_lag_max_ms:
+        failed.append("loop_lag")
+
+    checks["failed"] = failed
+    return not failed, checks
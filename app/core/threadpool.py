@@ -0,0 +1,86 @@
+"""
+Worker-thread budget for sync route handlers.
+
+Starlette runs every sync handler and sync dependency on anyio's default
+thread limiter (40 tokens unless THREADPOOL_TOKENS says otherwise). One
+slow report burst can hold all of them and terminal scans then queue
+behind it.
+
+Request groups (traffic lanes, app/api/lanes.py) get their own
+CapacityLimiter of <group>_concurrency_limit slots. A request waits for a
+group slot on the event loop *before* its sync dependencies and handler take
+a worker thread, so a group can never use more than its own share.
+
+sample() reads the default limiter and all group limiters; the monitor task
+calls it periodically and exports the numbers as metrics.
+"""
+from __future__ import annotations
+
+import logging
+
+import anyio
+import anyio.to_thread
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+THREADS_BUSY = metrics.gauge("threadpool_busy_threads", "Worker threads in use by sync handlers.")
+THREADS_WAITING = metrics.gauge("threadpool_waiting_tasks", "Sync calls waiting for a worker thread.")
+THREADS_TOTAL = metrics.gauge("threadpool_tokens", "Worker thread limit (THREADPOOL_TOKENS).")
+GROUP_ACTIVE = metrics.gauge("concurrency_group_active", "Requests running in a limited group.", ("group",))
+GROUP_WAITING = metrics.gauge("concurrency_group_waiting", "Requests queued for a limited group.", ("group",))
+
+_limiters: dict[str, anyio.CapacityLimiter] = {}
+
+
+def group_limit(name: str) -> int:
+    """Configured slots for a group; 0 means unlimited."""
+    return int(getattr(settings, f"{name}_concurrency_limit", 0) or 0)
+
+
+def configure() -> None:
+    """Apply THREADPOOL_TOKENS to the running event loop's default limiter."""
+    default = anyio.to_thread.current_default_thread_limiter()
+    default.total_tokens = settings.threadpool_tokens
+    logger.info(f"Threadpool tokens: {default.total_tokens}")
+
+
+def limiter(name: str) -> anyio.CapacityLimiter | None:
+    """The group's limiter (created on first use, on the event loop); None if unlimited."""
+    if group_limit(name) <= 0:
+        return None
+    group = _limiters.get(name)
+    if group is None:
+        group = _limiters[name] = anyio.CapacityLimiter(group_limit(name))
+    return group
+
+
+def default_waiting() -> int:
+    """Sync calls currently queued for a worker thread (event loop thread only)."""
+    return anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting
+
+
+def sample() -> dict:
+    """Current usage; must run on the event loop thread."""
+    default = anyio.to_thread.current_default_thread_limiter().statistics()
+    result = {
+        "busy": default.borrowed_tokens,
+        "waiting": default.tasks_waiting,
+        "tokens": default.total_tokens,
+        "groups": {},
+    }
+    THREADS_BUSY.set(default.borrowed_tokens)
+    THREADS_WAITING.set(default.tasks_waiting)
+    THREADS_TOTAL.set(default.total_tokens)
+    for name, limiter in _limiters.items():
+        stats = limiter.statistics()
+        result["groups"][name] = {"active": stats.borrowed_tokens, "waiting": stats.tasks_waiting}
+        GROUP_ACTIVE.set(stats.borrowed_tokens, group=name)
+        GROUP_WAITING.set(stats.tasks_waiting, group=name)
+    return result
+
+
+def reset() -> None:
+    _limiters.clear()
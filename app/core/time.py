@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 try:
@@ -45,3 +45,13 @@ def to_utc(dt: datetime) -> datetime:
 
 def local_date_str(dt: datetime) -> str:
     return to_warsaw(dt).date().isoformat()
+
+
+def local_day_bounds_utc(day: date) -> tuple[datetime, datetime]:
+    """Доба в Europe/Warsaw → [start, end) у naive UTC (як зберігається Event.ts)."""
+    start_local = datetime(day.year, day.month, day.day, tzinfo=WARSAW)
+    end_local = start_local + timedelta(days=1)
+    return (
+        start_local.astimezone(timezone.utc).replace(tzinfo=None),
+        end_local.astimezone(timezone.utc).replace(tzinfo=None),
+    )
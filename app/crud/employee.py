@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 
 from app.models.employee import Employee
 from app.schemas.terminal import TerminalRegisterRequest
+from app.services import employee_search, employee_uids
+from app.services.employee_uids import EmployeeRef
 
 
 
@@ -17,9 +19,9 @@ def get_by_id(db: Session, employee_id: int) -> Employee | None:
     return db.query(Employee).filter(Employee.id == employee_id).first()
 
 
-def get_by_uid(db: Session, uid: str) -> Employee | None:
-    u = (uid or "").strip().upper()
-    return db.query(Employee).filter(Employee.nfc_uid == u).first()
+def get_by_uid(db: Session, uid: str) -> EmployeeRef | None:
+    # Термінальні ендпоінти: з мапи UID воркера, без SELECT по employees
+    return employee_uids.lookup(db, uid)
 
 
 def update_employee(db: Session, emp: Employee, data: dict) -> Employee:
@@ -29,15 +31,20 @@ def update_employee(db: Session, emp: Employee, data: dict) -> Employee:
     # тобто в data опиняться тільки значення що передав клієнт.
     for k, v in data.items():
         setattr(emp, k, v)
+    employee_uids.bump(db)
     db.commit()
     db.refresh(emp)
+    employee_search.index.upsert(emp)
+    employee_uids.upsert(emp)
     return emp
 
 
-def create_employee_from_terminal_registration(db: Session, payload: TerminalRegisterRequest) -> Employee:
+def create_employee_from_terminal_registration(
+    db: Session, payload: TerminalRegisterRequest,
+) -> Employee | EmployeeRef:
     uid = payload.uid.strip().upper()
 
-    existing = db.query(Employee).filter(Employee.nfc_uid == uid).first()
+    existing = employee_uids.lookup(db, uid)
     if existing:
         return existing
 
@@ -47,6 +54,9 @@ def create_employee_from_terminal_registration(db: Session, payload: TerminalReg
         is_active=True
     )
     db.add(emp)
+    employee_uids.bump(db)
     db.commit()
     db.refresh(emp)
+    employee_search.index.upsert(emp)
+    employee_uids.upsert(emp)
     return emp
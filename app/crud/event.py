@@ -1,21 +1,42 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from dataclasses import dataclass
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, asc, desc, exists, func, insert, literal, or_, select
 from datetime import datetime, timezone
 
 from app.core.time import ensure_utc
 from app.core.config import settings
 from app.models.event import Event
-from app.models.employee import Employee
-from app.schemas.terminal import TerminalScanRequest
+from app.models.terminal_scan_id import TerminalScanId
+from app.schemas.terminal import TerminalScanBatchItem, TerminalScanRequest
+from app.services import employee_uids, scan_ids, stats_cache
 
 
-def get_last_event_for_employee(db: Session, employee_id: int) -> Event | None:
-    return (
+# Спроби умовного INSERT, якщо паралельний скан з іншого воркера встиг першим
+SCAN_INSERT_ATTEMPTS = 3
+
+UNKNOWN_UID_MESSAGE = "Unknown UID (employee not registered)"
+
+
+class ScanConflictError(Exception):
+    """Подію не вдалося записати: паралельні скани того ж працівника (повторити)."""
+
+
+def get_last_event_for_employee(db: Session, employee_id: int, locking: bool = False) -> Event | None:
+    # Для toggle і cooldown потрібні лише ts та direction; при однаковому ts
+    # остання — з більшим id (інакше умовний INSERT бачив би "новішу" подію).
+    # locking=True — блокуюче читання (FOR SHARE на MySQL): бачить рядки,
+    # закомічені після знімка поточної транзакції (REPEATABLE READ)
+    q = (
         db.query(Event)
+        .options(load_only(Event.ts, Event.direction))
         .filter(Event.employee_id == employee_id)
-        .order_by(desc(Event.ts))
-        .first()
+        .order_by(desc(Event.ts), desc(Event.id))
     )
+    if locking:
+        q = q.with_for_update(read=True)
+    return q.first()
 
 
 def create_event(
@@ -58,6 +79,7 @@ def create_event(
         ts=ts_utc,
     )
     db.add(ev)
+    stats_cache.invalidate_employee(employee_id, db)
     db.commit()
     db.refresh(ev)
     return ev
@@ -72,6 +94,41 @@ def list_events_for_employee(db: Session, employee_id: int) -> list[Event]:
     )
 
 
+def _scan_ts(ts_ms: int) -> datetime:
+    # ts из Android: миллисекунды -> datetime UTC
+    return ensure_utc(datetime.fromtimestamp(int(ts_ms) / 1000.0, tz=timezone.utc))
+
+
+def _decide_direction(
+    last_ts: datetime | None, last_direction: str | None, ts_utc: datetime,
+) -> tuple[str | None, str | None]:
+    """
+    Правила скану: cooldown і авто-toggle відносно останньої події працівника.
+
+    Returns:
+        (direction, None) — подію створювати;
+        (None, "cooldown_wait_<N>s") — скан відхилено cooldown'ом
+    """
+    cooldown_sec = int(getattr(settings, "terminal_scan_cooldown_seconds", 0) or 0)
+    if cooldown_sec > 0 and last_ts is not None:
+        if last_ts.tzinfo is None:
+            last_ts = last_ts.replace(tzinfo=timezone.utc)
+        else:
+            last_ts = last_ts.astimezone(timezone.utc)
+
+        delta = (ts_utc - last_ts).total_seconds()
+        if delta < cooldown_sec:
+            wait_left = int(cooldown_sec - delta)
+            return None, f"cooldown_wait_{wait_left}s"
+
+    # Авто-toggle: сервер сам визначає напрям на основі останньої події.
+    # Термінал надсилає direction лише як підказку для ручних сканів,
+    # але для автоматики завжди використовується toggle IN->OUT->IN.
+    if (last_direction or "").upper().strip() == "IN":
+        return "OUT", None
+    return "IN", None
+
+
 def create_event_from_terminal_scan(db: Session, payload: TerminalScanRequest) -> dict:
     """
     Создание события от терминала с авто-определением направления.
@@ -80,65 +137,349 @@ def create_event_from_terminal_scan(db: Session, payload: TerminalScanRequest) -
     - Если последнее событие было IN -> новое OUT
     - Иначе -> новое IN
     
+    Если передан scan_id, результат сохраняется в terminal_scan_ids в той же
+    транзакции; повтор с тем же scan_id возвращает сохранённый результат
+    (duplicate=True) без записи в БД.
+
     Args:
         db: Database session
         payload: TerminalScanRequest с данными от терминала
     
     Returns:
-        dict с информацией о созданном событии или сообщением о cooldown
+        dict с информацией о созданном событии или сообщением о cooldown;
+        при создании также "employee" (EmployeeRef из мапы UID) и "event"
+        для WS-пейлоада
+        (без повторных SELECT в маршруте)
     """
     uid = payload.uid.strip().upper()
     terminal_id = int(payload.terminal_id)
+    scan_id = payload.scan_id
 
-    employee = db.query(Employee).filter(Employee.nfc_uid == uid).first()
-    if not employee:
-        raise ValueError("Unknown UID (employee not registered)")
-
-    # ts из Android: миллисекунды -> datetime UTC
-    ts_ms = int(payload.ts)
-    ts_dt = datetime.fromtimestamp(ts_ms / 1000.0, tz=timezone.utc)
-    ts_utc = ensure_utc(ts_dt)
+    if scan_id:
+        stored = get_processed_scans(db, terminal_id, [scan_id]).get(scan_id)
+        if stored:
+            return stored
 
-    last = get_last_event_for_employee(db, employee.id)
+    employee = employee_uids.lookup(db, uid)
+    if not employee:
+        raise ValueError(UNKNOWN_UID_MESSAGE)
 
-    # Cooldown проверка
-    cooldown_sec = int(getattr(settings, "terminal_scan_cooldown_seconds", 0) or 0)
-    if cooldown_sec > 0 and last:
-        last_ts = last.ts
-        if last_ts.tzinfo is None:
-            last_ts = last_ts.replace(tzinfo=timezone.utc)
-        else:
-            last_ts = last_ts.astimezone(timezone.utc)
+    ts_utc = _scan_ts(payload.ts)
 
-        delta = (ts_utc - last_ts).total_seconds()
-        if delta < cooldown_sec:
-            wait_left = int(cooldown_sec - delta)
-            return {
+    for _ in range(SCAN_INSERT_ATTEMPTS):
+        last = get_last_event_for_employee(db, employee.id)
+        direction, cooldown_message = _decide_direction(
+            last.ts if last else None, last.direction if last else None, ts_utc,
+        )
+        if cooldown_message:
+            result = {
                 "employee_id": employee.id,
-                "message": f"cooldown_wait_{wait_left}s",
+                "message": cooldown_message,
             }
+            if scan_id:
+                return _commit_scan_id(db, terminal_id, scan_id, result)
+            return result
 
-    # Авто-toggle: сервер сам визначає напрям на основі останньої події.
-    # Термінал надсилає direction лише як підказку для ручних сканів,
-    # але для автоматики завжди використовується toggle IN->OUT->IN.
-    if last and (last.direction or "").upper().strip() == "IN":
-        direction = "OUT"
+        ev = _insert_if_latest(db, employee.id, terminal_id, direction, ts_utc, last)
+        if ev is not None:
+            break
+        # Інший воркер записав подію між нашим читанням і INSERT — рішення
+        # (toggle/cooldown) застаріле, перечитуємо останню подію
+        db.rollback()
     else:
-        direction = "IN"
+        raise ScanConflictError("Concurrent scans for this employee, retry")
 
-    ev = Event(
-        employee_id=employee.id,
-        terminal_id=terminal_id,
-        direction=direction,
-        ts=ts_utc,
-    )
-    db.add(ev)
-    db.commit()
-    db.refresh(ev)
-
-    return {
+    stats_cache.invalidate_employee(employee.id, db)
+    result = {
         "employee_id": employee.id,
         "event_id": ev.id,
         "direction": direction,
         "message": f"Registered {direction} for {employee.full_name}",
+        "employee": employee,
+        "event": ev,
     }
+    if scan_id:
+        result = _commit_scan_id(db, terminal_id, scan_id, result)
+        if result.get("duplicate"):
+            return result
+    else:
+        db.commit()
+    return result
+
+
+def _insert_if_latest(
+    db: Session, employee_id: int, terminal_id: int, direction: str, ts_utc: datetime, last: Event | None,
+) -> Event | None:
+    """
+    Умовний INSERT ... SELECT ... WHERE NOT EXISTS: подія вставляється, лише
+    якщо в працівника не з'явилось події, новішої за прочитану last
+    (або взагалі жодної, якщо last немає). Захищає від гонки між воркерами
+    без SELECT ... FOR UPDATE; всередині воркера скани одного працівника
+    вже серіалізує app/services/scan_locks.py.
+
+    Returns:
+        Event (не прив'язаний до сесії, з id) або None, якщо умову порушено
+    """
+    newer = select(Event.id).where(Event.employee_id == employee_id)
+    if last is not None:
+        # "Новіша" — у тому ж порядку (ts, id), що й get_last_event_for_employee
+        newer = newer.where(or_(Event.ts > last.ts, and_(Event.ts == last.ts, Event.id > last.id)))
+
+    created_at = datetime.now(timezone.utc)
+    values = {
+        "employee_id": employee_id,
+        "terminal_id": terminal_id,
+        "direction": direction,
+        "ts": ts_utc,
+        "is_manual": False,
+        "created_at": created_at,
+    }
+    row = select(*(literal(v, Event.__table__.c[k].type) for k, v in values.items())).where(~exists(newer))
+    res = db.execute(insert(Event).from_select(list(values), row))
+    if res.rowcount != 1:
+        return None
+    return Event(id=res.lastrowid, **values)
+
+
+def _commit_scan_id(db: Session, terminal_id: int, scan_id: str, result: dict) -> dict:
+    """
+    Комітить скан разом із його scan_id. Якщо паралельний повтор встиг
+    першим (унікальний ключ), транзакція відкочується і повертається його
+    збережений результат.
+    """
+    db.add(TerminalScanId(
+        terminal_id=terminal_id, scan_id=scan_id, employee_id=result["employee_id"],
+        event_id=result.get("event_id"), direction=result.get("direction"), message=result["message"][:160],
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stored = get_processed_scans(db, terminal_id, [scan_id]).get(scan_id)
+        if stored is None:
+            raise
+        return stored
+    scan_ids.put(terminal_id, scan_id, {
+        "scan_id": scan_id, "status": _status(result), "message": result["message"],
+        "employee_id": result["employee_id"], "event_id": result.get("event_id"),
+        "direction": result.get("direction"),
+    })
+    return result
+
+
+def _stored_result(row: TerminalScanId) -> dict:
+    return {
+        "scan_id": row.scan_id,
+        "status": _status({"event_id": row.event_id}),
+        "message": row.message,
+        "employee_id": row.employee_id,
+        "event_id": row.event_id,
+        "direction": row.direction,
+        "duplicate": True,
+    }
+
+
+def _status(result: dict) -> str:
+    return "registered" if result.get("event_id") else "cooldown"
+
+
+def get_processed_scans(db: Session, terminal_id: int, ids) -> dict[str, dict]:
+    """
+    Збережені результати для вже оброблених scan_id терміналу: спершу
+    in-memory LRU (app/services/scan_ids.py), решта — з terminal_scan_ids.
+    """
+    found: dict[str, dict] = {}
+    missing: list[str] = []
+    for scan_id in ids:
+        cached = scan_ids.get(terminal_id, scan_id)
+        if cached is not None:
+            found[scan_id] = cached
+        else:
+            missing.append(scan_id)
+    if not missing:
+        return found
+
+    rows = (
+        db.query(TerminalScanId)
+        .filter(TerminalScanId.terminal_id == terminal_id, TerminalScanId.scan_id.in_(missing))
+        .all()
+    )
+    for row in rows:
+        found[row.scan_id] = _stored_result(row)
+        scan_ids.put(terminal_id, row.scan_id, found[row.scan_id])
+    scan_ids.LOOKUPS.inc(len(rows), result="db")
+    scan_ids.LOOKUPS.inc(len(missing) - len(rows), result="new")
+    return found
+
+
+def _last_events(db: Session, employee_ids) -> dict[int, Event]:
+    """
+    Остання подія кожного з працівників — одним запитом. Повертає не прив'язані
+    до сесії Event лише з id, ts і direction (для рішення і умовного INSERT).
+    """
+    if not employee_ids:
+        return {}
+    latest = (
+        db.query(Event.employee_id, func.max(Event.ts).label("ts"))
+        .filter(Event.employee_id.in_(employee_ids))
+        .group_by(Event.employee_id)
+        .subquery()
+    )
+    rows = (
+        db.query(Event.id, Event.employee_id, Event.ts, Event.direction)
+        .join(latest, and_(Event.employee_id == latest.c.employee_id, Event.ts == latest.c.ts))
+        .order_by(Event.id)
+        .all()
+    )
+    # При однаковому ts перемагає більший id — той самий порядок, що й у
+    # get_last_event_for_employee()
+    return {
+        r.employee_id: Event(id=r.id, employee_id=r.employee_id, ts=r.ts, direction=r.direction)
+        for r in rows
+    }
+
+
+def _event_order(ev: Event) -> tuple[datetime, int]:
+    """Ключ порядку (ts, id) подій; ts з БД наївний (UTC), щойно вставлений — aware."""
+    ts = ev.ts if ev.ts.tzinfo is None else ev.ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts, ev.id
+
+
+@dataclass
+class ScanInput:
+    """Скан для apply_terminal_scans(): з пакета терміналу або з черги group-commit."""
+    terminal_id: int
+    uid: str
+    ts: int
+    scan_id: str | None = None
+
+
+def apply_terminal_scans(db: Session, scans: list[ScanInput]) -> list[dict]:
+    """
+    Обробляє кілька сканів (різних працівників і терміналів) однією транзакцією.
+
+    Скани кожного працівника обробляються в порядку ts за тими ж правилами,
+    що й поодинокий скан (cooldown, toggle IN->OUT->IN), причому кожен
+    прийнятий скан стає "останньою подією" для наступного.
+
+    Кожна подія вставляється умовно (_insert_if_latest): якщо інший воркер
+    тим часом записав працівнику новішу подію, вона перечитується блокуючим
+    читанням і рішення повторюється; після SCAN_INSERT_ATTEMPTS невдач —
+    ScanConflictError (транзакцію відкочує викликач).
+
+    Ідемпотентність: scan_id, вже збережені в terminal_scan_ids (або повторені
+    серед вхідних сканів), не обробляються вдруге — повертається початковий
+    результат з duplicate=True. Скани з невідомим UID не запам'ятовуються:
+    після реєстрації працівника повтор буде прийнято.
+
+    Returns:
+        результати в порядку вхідних сканів; для створених подій також
+        "employee" (EmployeeRef з мапи UID) і "event" для WS-пейлоада
+    """
+    results: list[dict | None] = [None] * len(scans)
+    processed: dict[tuple[int, str], dict] = {}
+    for terminal_id in {s.terminal_id for s in scans}:
+        ids = {s.scan_id for s in scans if s.terminal_id == terminal_id and s.scan_id}
+        for scan_id, stored in get_processed_scans(db, terminal_id, ids).items():
+            processed[(terminal_id, scan_id)] = stored
+
+    # Перше входження кожного нового scan_id; решта — повтори серед вхідних
+    pending: list[int] = []
+    first_index: dict[tuple[int, str], int] = {}
+    for i, scan in enumerate(scans):
+        key = (scan.terminal_id, scan.scan_id)
+        if scan.scan_id is None:
+            pending.append(i)
+        elif key in processed:
+            results[i] = dict(processed[key])
+        elif key not in first_index:
+            first_index[key] = i
+            pending.append(i)
+
+    employees = employee_uids.lookup_many(db, (scans[i].uid for i in pending))
+    last = _last_events(db, [e.id for e in employees.values()])
+
+    timed = [(i, _scan_ts(scans[i].ts)) for i in pending]
+    timed.sort(key=lambda item: (item[1], item[0]))
+
+    new_events: list[Event] = []
+    for i, ts_utc in timed:
+        scan = scans[i]
+        employee = employees.get(scan.uid.strip().upper())
+        if employee is None:
+            results[i] = {
+                "scan_id": scan.scan_id, "status": "unknown_employee",
+                "message": UNKNOWN_UID_MESSAGE,
+                "employee_id": None, "event_id": None, "direction": None, "duplicate": False,
+            }
+            continue
+
+        for _ in range(SCAN_INSERT_ATTEMPTS):
+            prev = last.get(employee.id)
+            direction, cooldown_message = _decide_direction(
+                prev.ts if prev else None, prev.direction if prev else None, ts_utc,
+            )
+            if cooldown_message:
+                break
+            ev = _insert_if_latest(db, employee.id, scan.terminal_id, direction, ts_utc, prev)
+            if ev is not None:
+                break
+            # Інший воркер записав подію цьому працівнику після нашого читання:
+            # перечитуємо (відкотити транзакцію, як у поодинокому скані, не
+            # можна — в ній уже скани інших працівників)
+            last[employee.id] = get_last_event_for_employee(db, employee.id, locking=True)
+        else:
+            raise ScanConflictError(f"Concurrent scans for employee {employee.id}, retry")
+
+        if cooldown_message:
+            results[i] = {
+                "scan_id": scan.scan_id, "status": "cooldown", "message": cooldown_message,
+                "employee_id": employee.id, "event_id": None, "direction": None, "duplicate": False,
+            }
+            continue
+
+        if prev is None or _event_order(ev) > _event_order(prev):
+            last[employee.id] = ev
+        new_events.append(ev)
+        results[i] = {
+            "scan_id": scan.scan_id, "status": "registered",
+            "message": f"Registered {direction} for {employee.full_name}",
+            "employee_id": employee.id, "event_id": ev.id, "direction": direction, "duplicate": False,
+            "employee": employee, "event": ev,
+        }
+
+    stored: list[int] = [
+        i for i in pending
+        if scans[i].scan_id is not None and results[i]["status"] != "unknown_employee"
+    ]
+    db.add_all([
+        TerminalScanId(
+            terminal_id=scans[i].terminal_id, scan_id=scans[i].scan_id, employee_id=results[i]["employee_id"],
+            event_id=results[i]["event_id"], direction=results[i]["direction"], message=results[i]["message"][:160],
+        )
+        for i in stored
+    ])
+
+    stats_cache.invalidate_employees(db, {ev.employee_id for ev in new_events})
+    db.commit()
+    for i in stored:
+        scan_ids.put(scans[i].terminal_id, scans[i].scan_id, results[i])
+
+    for i, scan in enumerate(scans):
+        if results[i] is None:
+            original = results[first_index[(scan.terminal_id, scan.scan_id)]]
+            results[i] = {
+                k: v for k, v in original.items() if k not in ("employee", "event")
+            } | {"duplicate": True}
+    return results
+
+
+def create_events_from_terminal_batch(
+    db: Session,
+    terminal_id: int,
+    scans: list[TerminalScanBatchItem],
+) -> list[dict]:
+    """Пакет сканів терміналу (вивантаження черги після офлайну), див. apply_terminal_scans()."""
+    return apply_terminal_scans(db, [
+        ScanInput(terminal_id=terminal_id, uid=s.uid, ts=s.ts, scan_id=s.scan_id) for s in scans
+    ])
@@ -6,9 +6,11 @@ from datetime import date, timedelta
 from typing import Optional
 from calendar import monthrange
 
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from app.db.upsert import upsert
 from app.models.schedule import Schedule
 
 
@@ -61,156 +63,108 @@ def get_range(db: Session, date_from: date, date_to: date, employee_id: Optional
     return q.order_by(Schedule.day, Schedule.employee_id).all()
 
 
-def get_or_create_empty_schedules(
-    db: Session,
-    employee_id: int,
-    year: int,
-    month: int
-) -> list[Schedule]:
-    """
-    Отримати або створити пусті графіки для працівника на весь місяць.
-    Якщо графіку немає - створюється пустий запис (00:00-00:00, code=None)
-    """
-    from app.crud.employee import get_by_id
-    
-    # Перевіряємо чи існує працівник
-    employee = get_by_id(db, employee_id)
-    if not employee:
-        raise ValueError(f"Працівник з ID {employee_id} не знайдений")
-    
-    # Отримуємо перший і останній день місяця
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
     _, last_day = monthrange(year, month)
-    date_from = date(year, month, 1)
-    date_to = date(year, month, last_day)
-    
-    # Отримуємо існуючі записи
-    existing = get_range(db, date_from, date_to, employee_id)
-    existing_days = {rec.day for rec in existing}
-    
-    # Створюємо пусті записи для днів без графіку
-    created = []
-    current_day = date_from
-    while current_day <= date_to:
-        if current_day not in existing_days:
-            new_schedule = Schedule(
-                employee_id=employee_id,
-                day=current_day,
-                start_hhmm="00:00",
-                end_hhmm="00:00",
-                code=None
-            )
-            db.add(new_schedule)
-            created.append(new_schedule)
-        current_day += timedelta(days=1)
-    
-    if created:
-        db.commit()
-        for rec in created:
-            db.refresh(rec)
-    
-    # Повертаємо всі записи за місяць
-    return get_range(db, date_from, date_to, employee_id)
+    return date(year, month, 1), date(year, month, last_day)
 
 
-def ensure_all_employees_have_schedules(
+# Пуста комірка не зберігається в БД (sparse storage) — синтезується при читанні
+EMPTY_START_HHMM = "00:00"
+EMPTY_END_HHMM = "00:00"
+
+
+def get_month_grid(
     db: Session,
     year: int,
-    month: int
-) -> dict[int, int]:
+    month: int,
+    employee_id: Optional[int] = None,
+) -> list[dict]:
     """
-    Створити пусті графіки для ВСІХ працівників на місяць.
-    Повертає словник {employee_id: кількість_створених_записів}
+    Повна сітка графіку за місяць: збережені комірки + синтезовані пусті
+    (00:00-00:00, code=None) для кожного дня без графіку.
+
+    Без employee_id — для всіх активних працівників (і тих неактивних,
+    у кого є збережені комірки). Порядок як у get_range: (day, employee_id).
     """
-    from app.crud.employee import get_all
+    from app.models.employee import Employee
 
-    # ВИПРАВЛЕНО: зламана логіка підрахунку (рахувала двічі, результат завжди 0)
-    _, last_day = monthrange(year, month)
-    date_from = date(year, month, 1)
-    date_to = date(year, month, last_day)
+    date_from, date_to = _month_bounds(year, month)
 
-    employees = get_all(db)
-    result = {}
+    if employee_id is not None:
+        exists = db.query(Employee.id).filter(Employee.id == employee_id).first()
+        if not exists:
+            raise ValueError(f"Працівник з ID {employee_id} не знайдений")
+        employee_ids = {employee_id}
+    else:
+        employee_ids = {
+            emp_id
+            for (emp_id,) in db.query(Employee.id).filter(Employee.is_active == True)  # noqa: E712
+        }
 
-    for employee in employees:
-        existing_count = len(get_range(db, date_from, date_to, employee.id))
-        get_or_create_empty_schedules(db, employee.id, year, month)
-        new_count = len(get_range(db, date_from, date_to, employee.id))
-        result[employee.id] = max(0, new_count - existing_count)
+    q = db.query(
+        Schedule.employee_id, Schedule.day, Schedule.start_hhmm, Schedule.end_hhmm, Schedule.code
+    ).filter(Schedule.day >= date_from, Schedule.day <= date_to)
+    if employee_id is not None:
+        q = q.filter(Schedule.employee_id == employee_id)
+    stored = {(r.employee_id, r.day): r for r in q}
+    employee_ids.update(emp_id for emp_id, _ in stored)
 
-    return result
+    ordered_ids = sorted(employee_ids)
+    cells: list[dict] = []
+    current_day = date_from
+    while current_day <= date_to:
+        for emp_id in ordered_ids:
+            r = stored.get((emp_id, current_day))
+            if r is not None:
+                cells.append({
+                    "employee_id": emp_id, "day": current_day,
+                    "start_hhmm": r.start_hhmm, "end_hhmm": r.end_hhmm, "code": r.code,
+                })
+            else:
+                cells.append({
+                    "employee_id": emp_id, "day": current_day,
+                    "start_hhmm": EMPTY_START_HHMM, "end_hhmm": EMPTY_END_HHMM, "code": None,
+                })
+        current_day += timedelta(days=1)
+    return cells
 
 
-def upsert_cell(
-    db: Session,
-    employee_id: int,
-    day: date,
+# Результат нормалізації комірки
+CELL_DELETE = "delete"  # пустий код і пустий час -> видалити запис
+CELL_EMPTY = "empty"    # 00:00-00:00 без коду -> пустий графік
+CELL_SET = "set"        # звичайна зміна / код
+
+
+def normalize_cell(
     code: Optional[str],
     start_hhmm: Optional[str] = None,
     end_hhmm: Optional[str] = None,
-) -> Schedule:
+) -> tuple[str, str, str, Optional[str]]:
     """
-    Вставляє/оновлює комірку графіку.
-    
+    Валідує і нормалізує комірку графіку без звернень до БД.
+
     Логіка:
-    1. Якщо code пустий/None І start/end пусті -> ВИДАЛЯЄМО запис
+    1. Якщо code пустий/None І start/end пусті -> CELL_DELETE
+    1.5. 00:00-00:00 без коду -> CELL_EMPTY (запис теж видаляється — пусті
+         комірки не зберігаються, а синтезуються при читанні)
     2. Якщо є start AND end -> використовуємо їх
     3. Якщо є code в форматі '5-7' -> конвертуємо в ГГ:ХХ
-    4. Інакше -> помилка валідації
-    
-    ВАЖЛИВО: При видаленні повертаємо None, а не фейковий об'єкт!
+    4. Інакше -> помилка валідації (ValueError)
+
+    Повертає (дія, start_hhmm, end_hhmm, code).
     """
-    # Нормалізуємо вхідні дані
     code_clean = str(code).strip() if code else ""
     start_clean = str(start_hhmm).strip() if start_hhmm else ""
     end_clean = str(end_hhmm).strip() if end_hhmm else ""
-    
-    # Перевіряємо існуючий запис
-    existing = (
-        db.query(Schedule)
-        .filter(Schedule.employee_id == employee_id, Schedule.day == day)
-        .first()
-    )
 
     # Випадок 1: Очищення комірки (пустий код і пустий час)
     if not code_clean and not start_clean and not end_clean:
-        if existing:
-            db.delete(existing)
-            db.commit()
-        # Створюємо тимчасовий об'єкт для відповіді (НЕ зберігаємо в БД!)
-        deleted_obj = Schedule(
-            employee_id=employee_id,
-            day=day,
-            start_hhmm="",
-            end_hhmm="",
-            code=""
-        )
-        deleted_obj.id = None
-        return deleted_obj
+        return CELL_DELETE, "", "", ""
 
     # Випадок 1.5: Пустий графік (00:00-00:00 без коду) - це теж очищення
     if not code_clean and start_clean == "00:00" and end_clean == "00:00":
-        if existing:
-            # Оновлюємо на пустий графік
-            existing.start_hhmm = "00:00"
-            existing.end_hhmm = "00:00"
-            existing.code = None
-            db.commit()
-            db.refresh(existing)
-            return existing
-        else:
-            # Створюємо новий пустий графік
-            row = Schedule(
-                employee_id=employee_id,
-                day=day,
-                start_hhmm="00:00",
-                end_hhmm="00:00",
-                code=None,
-            )
-            db.add(row)
-            db.commit()
-            db.refresh(row)
-            return row
-    
+        return CELL_EMPTY, "00:00", "00:00", None
+
     # Випадок 2: Є явні start і end
     if start_clean and end_clean:
         try:
@@ -219,7 +173,7 @@ def upsert_cell(
         except ValueError as e:
             raise ValueError(f"Неправильний формат часу: {e}")
 
-        # Випадок 3: Парсимо з code (якщо це формат Г-Г) або використовуємо як є
+    # Випадок 3: Парсимо з code (якщо це формат Г-Г) або використовуємо як є
     elif code_clean:
         # Спробуємо розпарсити як Г-Г формат
         m = _CODE_HOURS_RE.match(code_clean)
@@ -233,20 +187,60 @@ def upsert_cell(
             # Це довільний код (В, ОФ, Л тощо) - використовуємо 00:00-00:00
             start = "00:00"
             end = "00:00"
-    
+
     # Випадок 4: Недостатньо даних
     else:
         raise ValueError("Вкажіть start_hhmm+end_hhmm АБО code в форматі 'Г-Г'")
 
-        # Перевіряємо логіку часу (тільки якщо це не 00:00-00:00 для кодів типу В, Л)
+    # Перевіряємо логіку часу (тільки якщо це не 00:00-00:00 для кодів типу В, Л)
     if start >= end and not (start == "00:00" and end == "00:00"):
         raise ValueError(f"start_hhmm ({start}) має бути раніше ніж end_hhmm ({end})")
+
+    return CELL_SET, start, end, code_clean
+
+
+def upsert_cell(
+    db: Session,
+    employee_id: int,
+    day: date,
+    code: Optional[str],
+    start_hhmm: Optional[str] = None,
+    end_hhmm: Optional[str] = None,
+) -> Schedule:
+    """
+    Вставляє/оновлює комірку графіку (правила — див. normalize_cell).
     
+    ВАЖЛИВО: При видаленні повертаємо тимчасовий об'єкт з id=None (не збережений в БД).
+    """
+    action, start, end, code_norm = normalize_cell(code, start_hhmm, end_hhmm)
+
+    # Перевіряємо існуючий запис
+    existing = (
+        db.query(Schedule)
+        .filter(Schedule.employee_id == employee_id, Schedule.day == day)
+        .first()
+    )
+
+    if action in (CELL_DELETE, CELL_EMPTY):
+        if existing:
+            db.delete(existing)
+            db.commit()
+        # Створюємо тимчасовий об'єкт для відповіді (НЕ зберігаємо в БД!)
+        deleted_obj = Schedule(
+            employee_id=employee_id,
+            day=day,
+            start_hhmm=start,
+            end_hhmm=end,
+            code=code_norm,
+        )
+        deleted_obj.id = None
+        return deleted_obj
+
     # Оновлення або створення
     if existing:
         existing.start_hhmm = start
         existing.end_hhmm = end
-        existing.code = code_clean
+        existing.code = code_norm
         row = existing
     else:
         row = Schedule(
@@ -254,7 +248,7 @@ def upsert_cell(
             day=day,
             start_hhmm=start,
             end_hhmm=end,
-            code=code_clean,
+            code=code_norm,
         )
         db.add(row)
     
@@ -268,6 +262,98 @@ def upsert_cell(
     return row
 
 
+def bulk_upsert_cells(db: Session, cells: list) -> tuple[int, list[dict]]:
+    """
+    Масове збереження комірок графіку однією транзакцією.
+
+    1. Усі комірки валідуються і нормалізуються в пам'яті (normalize_cell);
+       помилки збираються по індексу, як і при поштучному збереженні.
+    2. Невідомі employee_id відсіюються одним запитом (інакше FK-помилка
+       відкотила б усю транзакцію).
+    3. Видалення (і пусті комірки) — один DELETE, вставки/оновлення — multi-row upsert
+       (ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE), потім один commit.
+
+    Якщо одна й та сама комірка (employee_id, day) трапляється кілька разів,
+    виграє остання — як і при послідовному збереженні.
+
+    Повертає (кількість_успішних, список_помилок).
+    """
+    from app.models.employee import Employee
+
+    errors: list[dict] = []
+
+    def _error(idx: int, cell, message: str) -> None:
+        errors.append({
+            "index": idx,
+            "employee_id": cell.employee_id,
+            "day": str(cell.day),
+            "error": message,
+        })
+
+    normalized: dict[tuple[int, date], tuple[int, str, str, str, Optional[str]]] = {}
+    valid_keys: list[tuple[int, date]] = []
+    for idx, cell in enumerate(cells):
+        try:
+            action, start, end, code = normalize_cell(cell.code, cell.start_hhmm, cell.end_hhmm)
+        except ValueError as e:
+            _error(idx, cell, str(e))
+            continue
+        key = (cell.employee_id, cell.day)
+        normalized[key] = (idx, action, start, end, code)  # остання перемагає
+        valid_keys.append(key)
+
+    requested_ids = {emp_id for emp_id, _ in normalized}
+    known_ids = {
+        emp_id
+        for (emp_id,) in db.query(Employee.id).filter(Employee.id.in_(requested_ids))
+    } if requested_ids else set()
+
+    to_delete: list[tuple[int, date]] = []
+    to_upsert: list[dict] = []
+    applied_indexes: set[int] = set()
+    for (emp_id, day), (idx, action, start, end, code) in normalized.items():
+        if emp_id not in known_ids:
+            _error(idx, cells[idx], f"Працівник з ID {emp_id} не знайдений")
+            continue
+        applied_indexes.add(idx)
+        if action in (CELL_DELETE, CELL_EMPTY):
+            to_delete.append((emp_id, day))
+        else:
+            to_upsert.append({
+                "employee_id": emp_id,
+                "day": day,
+                "start_hhmm": start,
+                "end_hhmm": end,
+                "code": code,
+            })
+
+    try:
+        if to_delete:
+            for i in range(0, len(to_delete), 500):
+                chunk = to_delete[i:i + 500]
+                db.query(Schedule).filter(
+                    tuple_(Schedule.employee_id, Schedule.day).in_(chunk)
+                ).delete(synchronize_session=False)
+        upsert(
+            db,
+            Schedule,
+            to_upsert,
+            conflict_columns=("employee_id", "day"),
+            update_columns=("start_hhmm", "end_hhmm", "code"),
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        for idx in sorted(applied_indexes):
+            _error(idx, cells[idx], f"Несподівана помилка: {e}")
+        applied_indexes.clear()
+
+    # Дублікати, які "перекрила" пізніша комірка, вважаються збереженими разом з нею
+    success = sum(1 for key in valid_keys if normalized[key][0] in applied_indexes)
+    errors.sort(key=lambda e: e["index"])
+    return success, errors
+
+
 def delete_cell(db: Session, employee_id: int, day: date) -> bool:
     """Видаляє комірку графіку. Повертає True якщо щось видалено."""
     existing = (
@@ -0,0 +1,203 @@
+"""
+Per-request SQL instrumentation.
+
+Engine listeners time every statement and add it to the stats object of the
+current request (a contextvar set by QueryStatsMiddleware). When the request
+is done the middleware:
+- adds a Server-Timing header (db time, statement count, total time);
+- folds the numbers into per-route metrics (app/core/metrics.py, /metrics).
+
+Statements slower than SLOW_QUERY_MS are logged with a normalized SQL
+fingerprint (literals and placeholders replaced by "?"), so the same query
+with different parameters groups into one line/series.
+
+Statements outside a request (startup, background threads) still count
+towards the slow-query log, but not towards any route.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Label for slow statements beyond SLOW_QUERY_MAX_FINGERPRINTS
+OTHER_FINGERPRINT = "<other>"
+
+
+@dataclass
+class RequestQueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_sql: str | None = None
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = statement
+
+
+STATEMENTS = metrics.counter(
+    "db_statements_total", "SQL statements executed while handling requests.", ("route",),
+)
+DB_TIME = metrics.counter(
+    "db_time_seconds_total", "Time spent in SQL statements while handling requests.", ("route",),
+)
+STATEMENTS_PER_REQUEST = metrics.histogram(
+    "db_statements_per_request", "SQL statements per request.", ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+SLOW_QUERIES = metrics.counter(
+    "db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by fingerprint.", ("fingerprint",),
+)
+SLOW_QUERY_MAX = metrics.gauge(
+    "db_slow_query_seconds_max", "Slowest execution per fingerprint.", ("fingerprint",),
+    multiprocess_mode="max",
+)
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+# Fingerprints seen by this process; bounds the label cardinality of SLOW_*
+_lock = threading.Lock()
+_fingerprints: set[str] = set()
+
+
+# ── Fingerprints ─────────────────────────────────────────────────────────────
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, ?\?)*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalize a statement for grouping: literals and bind placeholders become
+    "?", IN (...) lists and multi-row VALUES collapse, whitespace is squeezed.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (?+)", sql)
+    sql = _VALUES_LIST.sub(r"\1+", sql)
+    return sql
+
+
+# ── Engine listeners ─────────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    record(statement, elapsed_ms)
+
+
+def install(engine: Engine) -> None:
+    """Attach the timing listeners to an engine (idempotent)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record(statement: str, elapsed_ms: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed_ms)
+
+    threshold = settings.slow_query_ms
+    if threshold > 0 and elapsed_ms >= threshold:
+        fp = fingerprint(statement)
+        with _lock:
+            if fp not in _fingerprints:
+                if len(_fingerprints) >= settings.slow_query_max_fingerprints:
+                    label = OTHER_FINGERPRINT
+                else:
+                    _fingerprints.add(fp)
+                    label = fp
+            else:
+                label = fp
+        SLOW_QUERIES.inc(fingerprint=label)
+        SLOW_QUERY_MAX.set_max(elapsed_ms / 1000.0, fingerprint=label)
+        logger.warning(f"Slow query {elapsed_ms:.1f} ms: {fp}")
+
+
+# ── Request scope ────────────────────────────────────────────────────────────
+
+def current() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def _record_request(route: str, stats: RequestQueryStats) -> None:
+    STATEMENTS.inc(stats.count, route=route)
+    DB_TIME.inc(stats.total_ms / 1000.0, route=route)
+    STATEMENTS_PER_REQUEST.observe(stats.count, route=route)
+
+
+def server_timing(stats: RequestQueryStats, total_ms: float) -> str:
+    return (
+        f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+        f"db-slowest;dur={stats.slowest_ms:.1f}, "
+        f"app;dur={total_ms:.1f}"
+    )
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware: scopes a RequestQueryStats to each HTTP request.
+
+    The Server-Timing header is written when the response starts, so
+    statements issued while a StreamingResponse is being sent only show up
+    in the route aggregates.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.query_stats_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000.0
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _record_request(metrics.route_template(scope), stats)
+
+
+def reset() -> None:
+    with _lock:
+        _fingerprints.clear()
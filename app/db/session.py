@@ -4,20 +4,33 @@ Database session management and engine configuration.
 import logging
 from typing import Generator
 
+from fastapi import Request
 from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import NullPool, QueuePool
 
+from app.core import metrics
 from app.core.config import settings
+from app.db import query_stats
 
 logger = logging.getLogger(__name__)
 
 
-def _create_engine() -> Engine:
+# Traffic classes with their own connection pool (see app/api/lanes.py).
+# Routers without a lane use DEFAULT_LANE.
+LANES = ("terminal", "dashboard", "reports")
+DEFAULT_LANE = "dashboard"
+
+
+def _create_engine(pool_size: int | None = None, max_overflow: int | None = None) -> Engine:
     """
     Create and configure SQLAlchemy engine.
-    
+
+    Args:
+        pool_size: QueuePool size (default: DB_POOL_SIZE)
+        max_overflow: QueuePool overflow (default: DB_MAX_OVERFLOW)
+
     Returns:
         Configured SQLAlchemy engine
     """
@@ -34,11 +47,10 @@ def _create_engine() -> Engine:
     if "sqlite" in database_url:
         engine_kwargs["poolclass"] = NullPool
         engine_kwargs["connect_args"] = {"check_same_thread": False}
-        logger.warning("Using SQLite - not recommended for production")
     else:
         engine_kwargs["poolclass"] = QueuePool
-        engine_kwargs["pool_size"] = settings.db_pool_size
-        engine_kwargs["max_overflow"] = settings.db_max_overflow
+        engine_kwargs["pool_size"] = settings.db_pool_size if pool_size is None else pool_size
+        engine_kwargs["max_overflow"] = settings.db_max_overflow if max_overflow is None else max_overflow
     
     engine = create_engine(database_url, **engine_kwargs)
     
@@ -49,22 +61,71 @@ def _create_engine() -> Engine:
     return engine
 
 
-# Create global engine instance
+if "sqlite" in settings.database_url:
+    logger.warning("Using SQLite - not recommended for production")
+
+# Create global engine instance (default lane)
 engine = _create_engine()
 
-# Create session factory
-SessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
-)
+# Per-lane engines: a report burst cannot take the connections scans need
+engines: dict[str, Engine] = {DEFAULT_LANE: engine}
+for _lane in LANES:
+    if _lane == DEFAULT_LANE:
+        continue
+    if settings.db_lanes_enabled:
+        engines[_lane] = _create_engine(
+            getattr(settings, f"{_lane}_db_pool_size"),
+            getattr(settings, f"{_lane}_db_max_overflow"),
+        )
+    else:
+        engines[_lane] = engine
+
+for _engine in set(engines.values()):
+    query_stats.install(_engine)
+
+
+def pool_stat(lane: str, name: str) -> float:
+    fn = getattr(engines[lane].pool, name, None)
+    return fn() if callable(fn) else 0
+
+
+def _per_lane(name: str, transform=lambda v: v) -> dict:
+    return {(lane,): transform(pool_stat(lane, name)) for lane in LANES}
+
+
+metrics.gauge("db_pool_size", "Configured connection pool size.", ("lane",),
+              callback=lambda: _per_lane("size"))
+metrics.gauge("db_pool_checked_out", "Connections currently checked out.", ("lane",),
+              callback=lambda: _per_lane("checkedout"))
+metrics.gauge("db_pool_overflow", "Connections open beyond pool_size.", ("lane",),
+              callback=lambda: _per_lane("overflow", lambda v: max(v, 0)))
+
+_session_factories = {
+    lane: sessionmaker(
+        bind=lane_engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+    for lane, lane_engine in engines.items()
+}
+
+# Create session factory (default lane; background jobs, seeding, audit writer)
+SessionLocal = _session_factories[DEFAULT_LANE]
+
+
+def session_factory(lane: str) -> sessionmaker:
+    """Session factory bound to the lane's pool (background writers of that lane)."""
+    return _session_factories.get(lane, SessionLocal)
 
 
 # Database session dependency
-def get_db() -> Generator[Session, None, None]:
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
     FastAPI dependency that provides a database session.
+
+    The session comes from the pool of the request's lane
+    (request.state.lane, set by app.api.lanes.lane()).
     
     Yields:
         SQLAlchemy session
@@ -74,7 +135,8 @@ def get_db() -> Generator[Session, None, None]:
         def get_users(db: Session = Depends(get_db)):
             return db.query(User).all()
     """
-    db = SessionLocal()
+    lane = getattr(request.state, "lane", DEFAULT_LANE)
+    db = session_factory(lane)()
     try:
         yield db
     except Exception:
@@ -0,0 +1,61 @@
+"""
+Dialect-native multi-row INSERT helpers.
+
+SQLAlchemy's generic insert() has no conflict handling, so set-based writes
+pick the dialect's own insert construct (MySQL ON DUPLICATE KEY, SQLite /
+PostgreSQL ON CONFLICT). Rows are sent in chunks to stay below driver
+parameter limits (SQLite allows ~32k bound parameters per statement).
+"""
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+from sqlalchemy.orm import Session
+
+CHUNK_SIZE = 500
+
+
+def dialect_insert(db: Session, model):
+    """Return the dialect-specific insert() construct for the session's bind."""
+    name = db.get_bind().dialect.name
+    if name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Multi-row upsert is not supported for dialect '{name}'")
+    return insert(model)
+
+
+def _chunks(rows: Sequence[dict], size: int = CHUNK_SIZE) -> Iterable[Sequence[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def upsert(
+    db: Session,
+    model,
+    rows: Sequence[dict],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+) -> None:
+    """
+    Multi-row INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE:
+    rows that collide on conflict_columns get update_columns overwritten.
+    Does not commit — the caller owns the transaction.
+    """
+    if not rows:
+        return
+
+    for chunk in _chunks(rows):
+        stmt = dialect_insert(db, model).values(list(chunk))
+        if db.get_bind().dialect.name == "mysql":
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        db.execute(stmt)
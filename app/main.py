@@ -7,7 +7,7 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.exc import OperationalError, ProgrammingError
 
@@ -17,7 +17,11 @@ from app.ws.routes import router as ws_router
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.seed import seed_admin, seed_demo_data
+from app.core import metrics, monitor, threadpool
+from app.db import query_stats
 from app.db.session import SessionLocal
+from app.security import audit
+from app.services import employee_search, employee_uids, scan_writer, schedule_pdf
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -34,6 +38,19 @@ async def lifespan(app: FastAPI):
     # Cache admin password hash once (safe for multi-worker deployments)
     init_admin_hash()
 
+    # Audit entries are batched by a background thread from here on
+    audit.start_writer()
+
+    # Terminal scans committed in groups (only if SCAN_GROUP_COMMIT_ENABLED)
+    scan_writer.start_writer()
+
+    # Per-worker metrics snapshots for multi-worker /metrics
+    metrics.start_exporter()
+
+    # Sync-handler thread budget; loop lag + threadpool sampling
+    threadpool.configure()
+    monitor.start()
+
     db = SessionLocal()
     try:
         try:
@@ -49,6 +66,18 @@ async def lifespan(app: FastAPI):
             logger.warning(f"Could not seed demo data (DB not ready?): {e}")
         except Exception:
             logger.exception("Failed to seed demo data")
+
+        try:
+            count = employee_search.index.build(db)
+            logger.info(f"Employee search index built: {count} employees")
+        except (OperationalError, ProgrammingError) as e:
+            logger.warning(f"Could not build search index (DB not ready?): {e}")
+
+        try:
+            count = employee_uids.load(db)
+            logger.info(f"Employee UID map loaded: {count} employees")
+        except (OperationalError, ProgrammingError) as e:
+            logger.warning(f"Could not load employee UID map (DB not ready?): {e}")
     finally:
         db.close()
 
@@ -62,6 +91,11 @@ async def lifespan(app: FastAPI):
 
     # ── Shutdown ──────────────────────────────────────────────────────────────
     logger.info("Application shutdown")
+    await monitor.stop()
+    schedule_pdf.shutdown_pool()
+    scan_writer.stop_writer()
+    audit.stop_writer()
+    metrics.stop_exporter()
 
 
 # ── App factory ───────────────────────────────────────────────────────────────
@@ -86,6 +120,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── SQL statement count / DB time per request (Server-Timing, /metrics) ──────
+app.add_middleware(query_stats.QueryStatsMiddleware)
+
+# ── Request latency histograms per route (/metrics) ──────────────────────────
+app.add_middleware(metrics.MetricsMiddleware)
+
 # ── Request logging middleware (dev only) ─────────────────────────────────────
 if settings.is_development:
     @app.middleware("http")
@@ -131,6 +171,35 @@ async def health_check():
     }
 
 
+@app.get("/health/live", tags=["system"], summary="Liveness probe")
+async def health_live():
+    """The process is up and the event loop responds. No dependency checks."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", tags=["system"], summary="Readiness probe")
+async def health_ready():
+    """
+    DB reachable (cached check), pool not saturated, event loop not lagging.
+    503 takes the worker out of rotation until the checks pass again.
+    """
+    ready, checks = await monitor.readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not_ready", **checks},
+    )
+
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus text format. Expose only to the internal network (nginx).
+    Sync on purpose: in multiprocess mode render() reads and merges every
+    worker's snapshot file, so it runs in the threadpool, not the event loop.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["system"], include_in_schema=False)
 async def root():
     data: dict = {
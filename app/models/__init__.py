@@ -5,3 +5,5 @@ from .schedule import Schedule    # noqa: F401
 from .user import User, UserRole  # noqa: F401
 from .audit_log import AuditLog   # noqa: F401
 from .position import Position    # noqa: F401
+from .terminal_scan_id import TerminalScanId  # noqa: F401
+from .cache_version import CacheVersion  # noqa: F401
@@ -0,0 +1,18 @@
+"""CacheVersion — лічильники версій даних для інвалідації кешів між воркерами."""
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CacheVersion(Base):
+    """
+    Один рядок на кешований набір даних ("employees"; "stats:<employee_id>" —
+    статистика працівника, app/services/stats_cache.py). Запис, що змінює
+    набір, збільшує version у тій самій транзакції; воркери періодично читають
+    рядок за первинним ключем і перебудовують свій кеш, якщо версія змінилась.
+    """
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
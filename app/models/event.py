@@ -28,6 +28,9 @@ class Event(Base):
     created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=True)
 
     # Relationships
-    employee: Mapped["Employee"] = relationship("Employee", back_populates="events", lazy="selectin")
-    terminal: Mapped[Optional["Terminal"]] = relationship("Terminal", back_populates="events", lazy="selectin")
-    created_by: Mapped[Optional["User"]] = relationship("User", back_populates="created_events", lazy="selectin")
+    # raise_on_sql: зв'язки НЕ підвантажуються неявно (раніше selectin давав до
+    # 3 зайвих SELECT на кожен db.query(Event)). Де потрібні пов'язані об'єкти —
+    # явно .options(selectinload(...)/joinedload(...)) або join у запиті.
+    employee: Mapped["Employee"] = relationship("Employee", back_populates="events", lazy="raise_on_sql")
+    terminal: Mapped[Optional["Terminal"]] = relationship("Terminal", back_populates="events", lazy="raise_on_sql")
+    created_by: Mapped[Optional["User"]] = relationship("User", back_populates="created_events", lazy="raise_on_sql")
@@ -0,0 +1,34 @@
+"""TerminalScanId — оброблені scan_id терміналів (ідемпотентність сканів)."""
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TerminalScanId(Base):
+    """
+    Окрема таблиця, а не унікальний ключ на events: events партиціюється по ts
+    (міграція 004), і MySQL вимагає, щоб кожен унікальний ключ містив ts.
+    Рядок зберігає результат першої обробки — повтор отримує його ж.
+    """
+    __tablename__ = "terminal_scan_ids"
+    __table_args__ = (
+        UniqueConstraint("terminal_id", "scan_id", name="uq_terminal_scan_ids_terminal_scan"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    terminal_id: Mapped[int] = mapped_column(Integer, ForeignKey("terminals.id"))
+    scan_id: Mapped[str] = mapped_column(String(64))
+
+    employee_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # NULL — скан відхилено cooldown'ом (подію не створено)
+    event_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    direction: Mapped[Optional[str]] = mapped_column(String(8), nullable=True)
+    message: Mapped[str] = mapped_column(String(160))
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), index=True,
+    )
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 
 
 class TerminalRegisterRequest(BaseModel):
@@ -24,6 +24,8 @@ class TerminalScanRequest(BaseModel):
     terminal_id: int
     direction: str
     ts: int
+    # Ключ ідемпотентності: повтор з тим самим scan_id повертає початковий результат
+    scan_id: Optional[str] = Field(None, min_length=1, max_length=64)
 
     @field_validator("terminal_id", mode="before")
     @classmethod
@@ -35,6 +37,7 @@ class TerminalScanResponse(BaseModel):
     ok: bool
     message: str
     employee_id: Optional[int] = None
+    duplicate: bool = False
 
 
 class TerminalSecureScanRequest(BaseModel):
@@ -44,6 +47,7 @@ class TerminalSecureScanRequest(BaseModel):
     ts: int
     challenge_b64: str
     signature_b64: str
+    scan_id: Optional[str] = Field(None, min_length=1, max_length=64)
 
     @field_validator("terminal_id", mode="before")
     @classmethod
@@ -57,3 +61,42 @@ class TerminalSecureScanResponse(BaseModel):
     employee_id: Optional[int] = None
     employee_name: Optional[str] = None
     direction: Optional[str] = None
+    duplicate: bool = False
+
+
+class TerminalScanBatchItem(BaseModel):
+    # Ідентифікатор скану, згенерований терміналом (UUID тощо) — ключ
+    # ідемпотентності: повторне надсилання повертає збережений результат
+    scan_id: str = Field(min_length=1, max_length=64)
+    uid: str
+    ts: int
+    direction: str = ""
+
+
+class TerminalScanBatchRequest(BaseModel):
+    terminal_id: int
+    scans: List[TerminalScanBatchItem] = Field(min_length=1)
+
+    @field_validator("terminal_id", mode="before")
+    @classmethod
+    def cast_terminal_id_batch(cls, v):
+        return int(v)
+
+
+class TerminalScanBatchResult(BaseModel):
+    scan_id: str
+    # registered | cooldown | unknown_employee
+    status: str
+    message: str
+    employee_id: Optional[int] = None
+    event_id: Optional[int] = None
+    direction: Optional[str] = None
+    # True — scan_id вже оброблено раніше, повернуто початковий результат
+    duplicate: bool = False
+
+
+class TerminalScanBatchResponse(BaseModel):
+    ok: bool
+    registered: int
+    duplicates: int
+    results: List[TerminalScanBatchResult]
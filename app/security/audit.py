@@ -1,13 +1,29 @@
 """
 Audit logger — writes to DB (audit_logs table).
-Falls back to stderr if DB is unavailable.
+
+When the background writer is running (started in the app lifespan),
+audit_log() only enqueues the entry: a daemon thread drains the bounded
+queue and writes multi-row INSERTs every AUDIT_FLUSH_INTERVAL_MS or
+AUDIT_BATCH_SIZE entries, whichever comes first. The request path no
+longer pays for a second connection checkout and commit.
+
+If the DB is unavailable (or the queue is full) entries are appended to
+AUDIT_SPILL_PATH as JSON lines, so nothing is silently lost.
+
+Without the writer (scripts, tests) or when a session is passed explicitly,
+the entry is written synchronously as before.
 """
 import json
 import logging
+import queue
+import threading
+import time
 from datetime import datetime, timezone
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.session import SessionLocal
 
 _logger = logging.getLogger("audit")
@@ -26,6 +42,7 @@ _ACTION_LABELS: dict[str, str] = {
     "manual_event_create":  "Ручне додавання події",
     "manual_event_delete":  "Видалення ручної події",
     "clear_day_events":     "Очищення подій за день",
+    "manual_events_bulk":   "Масове коригування подій",
     "terminal_create":      "Створення терміналу",
     "terminal_rotate_key":  "Зміна ключа терміналу",
 }
@@ -43,38 +60,148 @@ def audit_log(
 ) -> None:
     """
     Записує аудит-подію в таблицю audit_logs.
-    Якщо db не передано — відкриває власну сесію.
-    """
-    from app.models.audit_log import AuditLog
 
+    Якщо db передано — пише синхронно в цю сесію. Інакше ставить запис
+    у чергу фонового writer'а (якщо він запущений) або відкриває власну сесію.
+    """
     details_json = json.dumps(details, ensure_ascii=False) if details else None
 
-    entry = AuditLog(
-        admin_id=admin_id,
-        admin_username=admin_username,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        details=details_json,
-        created_at=datetime.now(timezone.utc),
-    )
+    row = {
+        "admin_id": admin_id,
+        "admin_username": admin_username,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details": details_json,
+        "created_at": datetime.now(timezone.utc),
+    }
 
     _logger.info(
         f"[AUDIT] {admin_username} | {action} | {entity_type}:{entity_id} | {details_json}"
     )
 
+    if db is None and _writer is not None:
+        try:
+            _queue.put_nowait(row)
+        except queue.Full:
+            _logger.error("[AUDIT] Queue is full, spilling entry to file")
+            _spill([row])
+        return
+
+    _write_sync(row, db)
+
+
+def _write_sync(row: dict, db: Session | None) -> None:
+    from app.models.audit_log import AuditLog
+
     own_session = db is None
     session: Session = db or SessionLocal()
     try:
-        session.add(entry)
+        session.add(AuditLog(**row))
         session.commit()
     except Exception as exc:
         session.rollback()
         _logger.error(f"[AUDIT] Failed to write audit log to DB: {exc}")
+        if own_session:
+            _spill([row])
     finally:
         if own_session:
             session.close()
 
 
+# ── Background writer ─────────────────────────────────────────────────────────
+
+_queue: "queue.Queue[dict]" = queue.Queue(maxsize=settings.audit_queue_max)
+_writer: threading.Thread | None = None
+_stop = threading.Event()
+_spill_lock = threading.Lock()
+
+
+def _write_batch(rows: list[dict]) -> None:
+    """One multi-row INSERT + commit; on failure the batch goes to the spill file."""
+    from app.models.audit_log import AuditLog
+
+    session = SessionLocal()
+    try:
+        session.execute(insert(AuditLog), rows)
+        session.commit()
+    except Exception as exc:
+        session.rollback()
+        _logger.error(f"[AUDIT] Failed to write {len(rows)} audit entries to DB: {exc}")
+        _spill(rows)
+    finally:
+        session.close()
+
+
+def _spill(rows: list[dict]) -> None:
+    """Append entries to the local spill file (JSON lines) for later import."""
+    try:
+        with _spill_lock, open(settings.audit_spill_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(
+                    {**row, "created_at": row["created_at"].isoformat()},
+                    ensure_ascii=False,
+                ) + "\n")
+    except Exception as exc:
+        _logger.error(f"[AUDIT] Failed to spill {len(rows)} audit entries: {exc} | {rows}")
+
+
+def _drain(max_items: int) -> list[dict]:
+    rows: list[dict] = []
+    while len(rows) < max_items:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return rows
+
+
+def _run() -> None:
+    interval = settings.audit_flush_interval_ms / 1000
+    batch_size = settings.audit_batch_size
+    while not _stop.is_set():
+        # Block for the first entry, then collect until the batch is full
+        # or the flush interval has passed.
+        try:
+            rows = [_queue.get(timeout=interval)]
+        except queue.Empty:
+            continue
+        deadline = time.monotonic() + interval
+        while len(rows) < batch_size and not _stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_batch(rows)
+
+
+def start_writer() -> None:
+    """Start the background writer (idempotent). Called from the app lifespan."""
+    global _writer
+    if _writer is not None:
+        return
+    _stop.clear()
+    _writer = threading.Thread(target=_run, name="audit-writer", daemon=True)
+    _writer.start()
+
+
+def stop_writer(timeout: float = 10.0) -> None:
+    """
+    Stop the writer and flush everything still queued (graceful shutdown).
+    New entries fall back to the synchronous path from here on.
+    """
+    global _writer
+    writer, _writer = _writer, None
+    if writer is None:
+        return
+    _stop.set()
+    writer.join(timeout)
+    while rows := _drain(settings.audit_batch_size):
+        _write_batch(rows)
+
+
 def get_action_types() -> list[dict]:
     return [{"action": k, "label": v} for k, v in _ACTION_LABELS.items()]
@@ -11,6 +11,8 @@ import time
 import threading
 import logging
 
+from app.core import metrics
+
 logger = logging.getLogger(__name__)
 
 # challenge_token -> (terminal_id, created_at)
@@ -72,6 +74,14 @@ def consume_challenge(token: str, terminal_id: int) -> bool:
     return True
 
 
+def size() -> int:
+    with _lock:
+        return len(_challenges)
+
+
+metrics.gauge("challenge_store_size", "Issued challenges not yet consumed or cleaned up.", callback=size)
+
+
 def cleanup_expired():
     """Remove expired challenges from the store."""
     now = time.time()
@@ -11,6 +11,8 @@ from collections import defaultdict
 
 from fastapi import Request, HTTPException, status
 
+from app.core import metrics
+
 logger = logging.getLogger(__name__)
 
 # Config
@@ -48,6 +50,15 @@ def check_rate_limit(request: Request):
         _counts[client_ip].append(now)
 
 
+def size() -> int:
+    """Number of client IPs currently tracked."""
+    with _lock:
+        return len(_counts)
+
+
+metrics.gauge("rate_limiter_tracked_clients", "Client IPs tracked by the terminal rate limiter.", callback=size)
+
+
 def cleanup_all():
     """Periodic cleanup of stale entries."""
     now = time.time()
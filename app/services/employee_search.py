@@ -0,0 +1,286 @@
+"""
+In-memory employee search index for /search/employees (live search).
+
+Every searchable text (full name, position, NFC UID) is normalized:
+NFKD + case-folded, apostrophes dropped, Cyrillic transliterated to Latin
+(Ukrainian national scheme, plus Russian letters). Query and documents end
+up in the same Latin alphabet, so "ivan", "Іван" and "Иван" all match.
+
+Lookup structures:
+- a sorted token list for prefix matches (bisect);
+- a trigram → employee ids map for substring and typo-tolerant matches.
+
+The index is built in the app lifespan and updated by the employee
+create/update paths. Other gunicorn workers do not see those updates, so
+search() also rebuilds from the DB once the index is older than
+SEARCH_INDEX_TTL_SECONDS — this bounds cross-worker staleness.
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.employee import Employee
+
+_TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "h", "ґ": "g", "д": "d", "е": "e",
+    "є": "ie", "ж": "zh", "з": "z", "и": "y", "і": "i", "ї": "i", "й": "i",
+    "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r",
+    "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "shch", "ь": "", "ю": "iu", "я": "ia",
+    # російські літери
+    "ё": "e", "ъ": "", "ы": "y", "э": "e",
+}
+_APOSTROPHES = "'’ʼ`"
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+# Scores per query token (summed over tokens, see _score_token)
+SCORE_EXACT = 100
+SCORE_PREFIX = 80
+SCORE_SUBSTRING = 50
+SCORE_FUZZY = 30
+FUZZY_MIN_SIMILARITY = 0.4
+# Share of the query's inner trigrams a token needs to become a candidate
+CANDIDATE_MIN_SHARED = 0.5
+
+
+def normalize(text: str | None) -> str:
+    """Case-fold, drop accents/apostrophes, transliterate to Latin, collapse separators."""
+    if not text:
+        return ""
+    text = text.casefold()
+    for ch in _APOSTROPHES:
+        text = text.replace(ch, "")
+    # NFKD розкладає "й"/"ї" на літеру + діакритику — транслітеруємо ДО неї
+    text = "".join(_TRANSLIT.get(ch, ch) for ch in text)
+    text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def tokenize(text: str | None) -> list[str]:
+    return normalize(text).split()
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class _Doc:
+    id: int
+    full_name: str
+    nfc_uid: str | None
+    position: str | None
+    is_active: bool
+    tokens: list[str]
+    sort_key: str
+    token_grams: list[set[str]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.token_grams = [trigrams(t) for t in self.tokens]
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "full_name": self.full_name,
+            "nfc_uid": self.nfc_uid,
+            "position": self.position,
+            "is_active": self.is_active,
+        }
+
+
+def _make_doc(emp_id: int, full_name: str, nfc_uid: str | None, position: str | None, is_active: bool) -> _Doc:
+    tokens = tokenize(full_name) + tokenize(position) + tokenize(nfc_uid)
+    # UID часто вводять без роздільників: "04A1B2" для "04:A1:B2"
+    uid_compact = normalize(nfc_uid).replace(" ", "")
+    if uid_compact and uid_compact not in tokens:
+        tokens.append(uid_compact)
+    return _Doc(
+        id=emp_id,
+        full_name=full_name,
+        nfc_uid=nfc_uid,
+        position=position,
+        is_active=bool(is_active),
+        tokens=tokens,
+        # Порядок кодових точок ставить "і"/"є" після "я" — сортуємо за транслітом
+        sort_key=normalize(full_name),
+    )
+
+
+class EmployeeSearchIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: dict[int, _Doc] = {}
+        self._sorted_tokens: list[tuple[str, int]] = []
+        self._trigrams: dict[str, set[int]] = {}
+        self.built_at: float | None = None
+
+    # ── Maintenance ──────────────────────────────────────────────────────────
+
+    def build(self, db: Session) -> int:
+        rows = db.query(
+            Employee.id, Employee.full_name, Employee.nfc_uid, Employee.position, Employee.is_active,
+        ).all()
+        docs = {r.id: _make_doc(r.id, r.full_name, r.nfc_uid, r.position, r.is_active) for r in rows}
+        sorted_tokens, grams = self._structures(docs.values())
+        with self._lock:
+            self._docs = docs
+            self._sorted_tokens = sorted_tokens
+            self._trigrams = grams
+            self.built_at = time.monotonic()
+        return len(docs)
+
+    @staticmethod
+    def _structures(docs) -> tuple[list[tuple[str, int]], dict[str, set[int]]]:
+        sorted_tokens: list[tuple[str, int]] = []
+        grams: dict[str, set[int]] = {}
+        for doc in docs:
+            for tok in set(doc.tokens):
+                sorted_tokens.append((tok, doc.id))
+                for g in trigrams(tok):
+                    grams.setdefault(g, set()).add(doc.id)
+        sorted_tokens.sort()
+        return sorted_tokens, grams
+
+    def _unindex(self, doc: _Doc) -> None:
+        for tok in set(doc.tokens):
+            i = bisect.bisect_left(self._sorted_tokens, (tok, doc.id))
+            if i < len(self._sorted_tokens) and self._sorted_tokens[i] == (tok, doc.id):
+                del self._sorted_tokens[i]
+            for g in trigrams(tok):
+                ids = self._trigrams.get(g)
+                if ids is not None:
+                    ids.discard(doc.id)
+                    if not ids:
+                        del self._trigrams[g]
+
+    def upsert(self, emp: Employee) -> None:
+        """Add or refresh one employee (call after commit)."""
+        doc = _make_doc(emp.id, emp.full_name, emp.nfc_uid, emp.position, emp.is_active)
+        with self._lock:
+            old = self._docs.get(doc.id)
+            if old is not None:
+                self._unindex(old)
+            self._docs[doc.id] = doc
+            for tok in set(doc.tokens):
+                bisect.insort(self._sorted_tokens, (tok, doc.id))
+                for g in trigrams(tok):
+                    self._trigrams.setdefault(g, set()).add(doc.id)
+
+    def remove(self, employee_id: int) -> None:
+        with self._lock:
+            old = self._docs.pop(employee_id, None)
+            if old is not None:
+                self._unindex(old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs = {}
+            self._sorted_tokens = []
+            self._trigrams = {}
+            self.built_at = None
+
+    def is_stale(self) -> bool:
+        if self.built_at is None:
+            return True
+        ttl = settings.search_index_ttl_seconds
+        return ttl > 0 and time.monotonic() - self.built_at > ttl
+
+    # ── Query ────────────────────────────────────────────────────────────────
+
+    def _prefix_ids(self, token: str) -> set[int]:
+        ids = set()
+        i = bisect.bisect_left(self._sorted_tokens, (token, -1))
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i][0].startswith(token):
+            ids.add(self._sorted_tokens[i][1])
+            i += 1
+        return ids
+
+    def _trigram_ids(self, token: str) -> set[int]:
+        """
+        Employees sharing enough inner trigrams with the token (substring and
+        typo candidates). Padded edge trigrams are skipped here: they match
+        every token with the same first letter and would flood the candidates.
+        """
+        if len(token) < 3:
+            return set()
+        inner = {token[i:i + 3] for i in range(len(token) - 2)}
+        need = math.ceil(len(inner) * CANDIDATE_MIN_SHARED)
+        counts: Counter[int] = Counter()
+        for g in inner:
+            counts.update(self._trigrams.get(g, ()))
+        return {emp_id for emp_id, n in counts.items() if n >= need}
+
+    @staticmethod
+    def _score_token(q: str, q_grams: set[str], doc: _Doc) -> float:
+        best = 0.0
+        for tok in doc.tokens:
+            if tok == q:
+                return SCORE_EXACT
+            if tok.startswith(q):
+                best = SCORE_PREFIX
+            elif best < SCORE_SUBSTRING and q in tok:
+                best = SCORE_SUBSTRING
+        if best or len(q) < 3:
+            return best
+
+        for t_grams in doc.token_grams:
+            sim = len(q_grams & t_grams) / len(q_grams | t_grams)
+            if sim >= FUZZY_MIN_SIMILARITY:
+                best = max(best, SCORE_FUZZY * sim)
+        return best
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Ranked matches; every query token has to match (prefix, substring or fuzzy)."""
+        q_tokens = tokenize(query)
+        with self._lock:
+            if not q_tokens:
+                docs = heapq.nsmallest(limit, self._docs.values(), key=lambda d: d.sort_key)
+                return [d.as_dict() for d in docs]
+
+            per_token = sorted(
+                (self._prefix_ids(q) | self._trigram_ids(q) for q in set(q_tokens)),
+                key=len,
+            )
+            candidates = per_token[0]
+            for ids in per_token[1:]:
+                if not candidates:
+                    break
+                candidates = candidates & ids
+
+            q_grams = {q: trigrams(q) for q in q_tokens}
+            scored = []
+            for emp_id in candidates:
+                doc = self._docs[emp_id]
+                total = 0.0
+                for q in q_tokens:
+                    s = self._score_token(q, q_grams[q], doc)
+                    if s <= 0:
+                        break
+                    total += s
+                else:
+                    scored.append((-(total + (1 if doc.is_active else 0)), doc.sort_key, doc))
+
+        best = heapq.nsmallest(limit, scored, key=lambda x: (x[0], x[1]))
+        return [doc.as_dict() for _, _, doc in best]
+
+
+index = EmployeeSearchIndex()
+
+
+def search(db: Session, query: str, limit: int = 20) -> list[dict]:
+    """Search via the shared index, rebuilding it first if it expired."""
+    if index.is_stale():
+        index.build(db)
+    return index.search(query, limit)
@@ -0,0 +1,269 @@
+"""
+In-process UID → employee map for the terminal endpoints.
+
+Every tap used to look the badge up in `employees` (scan, secure-scan,
+first-scan, terminal registration, batch upload). The UID set changes only
+when employees are created or edited, so each worker keeps a map of
+EmployeeRef entries, loaded in the app lifespan, and the hot paths read it
+instead of the table.
+
+Cross-worker invalidation: every write that changes employees calls bump()
+inside its transaction, which increments the "employees" row of
+cache_versions (migration 006). lookup() compares that counter with the
+version the map was loaded at — at most once per
+EMPLOYEE_UID_CACHE_CHECK_SECONDS, a primary-key read — and reloads the map
+when it moved. The writing worker also patches its own map right away
+(upsert()).
+
+The map is keyed by the normalized UID (strip + upper), the form terminals
+send and the API stores; rows written in another case (older admin edits)
+still match. A UID missing from the map is looked up in `employees` once
+more before it is reported unknown: rows written around the version counter
+(seed, manual SQL, a DB created without migration 006) are picked up that
+way.
+
+Unknown UIDs (a stray card, a misconfigured terminal retrying) are then
+remembered for UNKNOWN_UID_CACHE_TTL_SECONDS, so repeated taps are rejected
+without that query. The entry is dropped when an employee gets the UID
+(upsert()) and the whole negative cache when the map reloads. Rejections
+are counted per UID in terminal_unknown_uid_total; only the first
+UNKNOWN_UID_METRICS_MAX_UIDS distinct UIDs get their own label, the rest
+share uid="other".
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.cache_version import CacheVersion
+from app.models.employee import Employee
+
+VERSION_NAME = "employees"
+
+LOOKUPS = metrics.counter(
+    "employee_uid_lookups_total",
+    "Terminal UID lookups by result: memory (map hit), db (found by fallback query), "
+    "unknown (confirmed by the DB), unknown_cached (negative cache hit).",
+    ("result",),
+)
+UNKNOWN = metrics.counter(
+    "terminal_unknown_uid_total",
+    "Rejected lookups of badge UIDs that belong to no employee.",
+    ("uid",),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class EmployeeRef:
+    """What the terminal endpoints need to know about an employee."""
+    id: int
+    full_name: str
+    nfc_uid: str
+    position: str | None
+    is_active: bool
+    # The key itself, not a fingerprint: secure-scan verifies signatures with it
+    public_key_b64: str | None
+
+
+_COLUMNS = (
+    Employee.id, Employee.full_name, Employee.nfc_uid, Employee.position,
+    Employee.is_active, Employee.public_key_b64,
+)
+
+_lock = threading.Lock()
+_by_uid: dict[str, EmployeeRef] = {}
+_uid_by_id: dict[int, str] = {}
+# cache_versions value the map was loaded at; None = not loaded yet
+_version: int | None = None
+_checked_at = 0.0
+
+# Negative cache: UID -> monotonic expiry
+_unknown: "OrderedDict[str, float]" = OrderedDict()
+# UIDs that got their own UNKNOWN label (bounded cardinality)
+_unknown_labels: set[str] = set()
+
+
+def normalize_uid(uid: str | None) -> str:
+    return (uid or "").strip().upper()
+
+
+def _make_ref(row) -> EmployeeRef:
+    return EmployeeRef(
+        id=row.id,
+        full_name=row.full_name,
+        nfc_uid=normalize_uid(row.nfc_uid),
+        position=row.position,
+        is_active=bool(row.is_active),
+        public_key_b64=row.public_key_b64,
+    )
+
+
+def _read_version(db: Session) -> int:
+    return db.query(CacheVersion.version).filter(CacheVersion.name == VERSION_NAME).scalar() or 0
+
+
+def load(db: Session) -> int:
+    """(Re)build the map from the DB; returns the number of employees."""
+    global _version, _checked_at
+    # Version first: a write that lands during the load triggers another one
+    version = _read_version(db)
+    refs = [_make_ref(r) for r in db.query(*_COLUMNS).all()]
+    with _lock:
+        _by_uid.clear()
+        _uid_by_id.clear()
+        for ref in refs:
+            if ref.nfc_uid:
+                _by_uid[ref.nfc_uid] = ref
+                _uid_by_id[ref.id] = ref.nfc_uid
+        _unknown.clear()
+        _version = version
+        _checked_at = time.monotonic()
+    return len(refs)
+
+
+def _sync(db: Session) -> None:
+    global _checked_at
+    if _version is not None and time.monotonic() - _checked_at < settings.employee_uid_cache_check_seconds:
+        return
+    if _version is None or _read_version(db) != _version:
+        load(db)
+    else:
+        _checked_at = time.monotonic()
+
+
+def lookup(db: Session, uid: str | None) -> EmployeeRef | None:
+    """Employee for a badge UID (normalized here) or None."""
+    return lookup_many(db, [uid]).get(normalize_uid(uid))
+
+
+def lookup_many(db: Session, uids) -> dict[str, EmployeeRef]:
+    """Normalized UID → EmployeeRef for the UIDs that belong to an employee."""
+    wanted = {normalize_uid(u) for u in uids} - {""}
+    if not wanted:
+        return {}
+    _sync(db)
+    with _lock:
+        found = {u: _by_uid[u] for u in wanted if u in _by_uid}
+    if found:
+        LOOKUPS.inc(len(found), result="memory")
+
+    missing = {u for u in wanted - found.keys() if not _cached_unknown(u)}
+    if missing:
+        # Compared normalized, like the map keys; only misses get here and
+        # they are negatively cached afterwards, so skipping the index is fine
+        stored_uid = func.upper(func.trim(Employee.nfc_uid))
+        for row in db.query(*_COLUMNS).filter(stored_uid.in_(missing)).all():
+            ref = _make_ref(row)
+            upsert(ref)
+            found[ref.nfc_uid] = ref
+            LOOKUPS.inc(result="db")
+        for uid in missing - found.keys():
+            _remember_unknown(uid)
+            _count_unknown(uid)
+            LOOKUPS.inc(result="unknown")
+    return found
+
+
+def is_unknown(db: Session, uid: str | None) -> bool:
+    """
+    True if the UID was recently confirmed unknown; the rejection is counted.
+    Lets callers drop such a scan before any work. The version check runs
+    first (throttled like lookup()), so an employee created by another
+    worker clears the entry without waiting for the TTL.
+    """
+    _sync(db)
+    return _cached_unknown(uid)
+
+
+def _cached_unknown(uid: str | None) -> bool:
+    uid = normalize_uid(uid)
+    with _lock:
+        expires = _unknown.get(uid)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del _unknown[uid]
+            return False
+    _count_unknown(uid)
+    LOOKUPS.inc(result="unknown_cached")
+    return True
+
+
+def _remember_unknown(uid: str) -> None:
+    ttl = settings.unknown_uid_cache_ttl_seconds
+    if ttl <= 0:
+        return
+    with _lock:
+        _unknown[uid] = time.monotonic() + ttl
+        _unknown.move_to_end(uid)
+        while len(_unknown) > settings.unknown_uid_cache_max_entries:
+            _unknown.popitem(last=False)
+
+
+def _count_unknown(uid: str) -> None:
+    with _lock:
+        if uid not in _unknown_labels and len(_unknown_labels) < settings.unknown_uid_metrics_max_uids:
+            _unknown_labels.add(uid)
+        label = uid if uid in _unknown_labels else "other"
+    UNKNOWN.inc(uid=label)
+
+
+def upsert(emp) -> None:
+    """Add or refresh one employee (an Employee row or EmployeeRef; call after commit)."""
+    ref = emp if isinstance(emp, EmployeeRef) else _make_ref(emp)
+    ref = replace(ref, nfc_uid=normalize_uid(ref.nfc_uid))
+    with _lock:
+        _unknown.pop(ref.nfc_uid, None)
+        if _version is None:
+            return  # not loaded: the first lookup loads everything anyway
+        old_uid = _uid_by_id.pop(ref.id, None)
+        if old_uid is not None and getattr(_by_uid.get(old_uid), "id", None) == ref.id:
+            del _by_uid[old_uid]
+        if ref.nfc_uid:
+            _by_uid[ref.nfc_uid] = ref
+            _uid_by_id[ref.id] = ref.nfc_uid
+
+
+def bump(db: Session) -> None:
+    """
+    Increment the employees version in the caller's transaction, so other
+    workers reload their maps once it commits.
+    """
+    res = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == VERSION_NAME)
+        .values(version=CacheVersion.version + 1)
+    )
+    if res.rowcount == 0:
+        # Schema created without migration 006 (create_all in tests/dev)
+        db.add(CacheVersion(name=VERSION_NAME, version=1))
+
+
+def size() -> int:
+    return len(_by_uid)
+
+
+def unknown_size() -> int:
+    return len(_unknown)
+
+
+metrics.gauge("employee_uid_cache_size", "Employees held in the in-memory UID map.", callback=size)
+metrics.gauge("unknown_uid_cache_size", "UIDs held in the negative (unknown UID) cache.", callback=unknown_size)
+
+
+def clear() -> None:
+    global _version, _checked_at
+    with _lock:
+        _by_uid.clear()
+        _uid_by_id.clear()
+        _unknown.clear()
+        _unknown_labels.clear()
+        _version = None
+        _checked_at = 0.0
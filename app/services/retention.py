@@ -0,0 +1,288 @@
+"""
+Retention: архівація та очищення старих даних.
+
+audit_logs:
+    рядки старші за AUDIT_RETENTION_DAYS дописуються в помісячні архіви
+    <RETENTION_ARCHIVE_DIR>/audit_logs-YYYY-MM.jsonl.gz (JSON Lines + gzip)
+    і видаляються пакетами по RETENTION_BATCH_SIZE — жодна транзакція не
+    тримає блокування на весь обсяг. Пакет спершу записується в архів,
+    потім видаляється з БД (at-least-once: при збої між цими кроками
+    рядок може потрапити в архів двічі, але не загубиться).
+
+terminal_scan_ids:
+    ключі ідемпотентності сканів потрібні лише поки термінал може повторити
+    скан; рядки старші за TERMINAL_SCAN_ID_RETENTION_DAYS видаляються
+    пакетами (без архіву — подія лишається в events).
+
+Партиції (тільки MySQL, див. міграцію 004):
+    events і audit_logs розбиті RANGE-партиціями по місяцях (pYYYYMM + pmax).
+    ensure_future_partitions() заздалегідь відрізає від pmax партиції на
+    наступні місяці; drop_expired_partitions() видаляє цілі місяці —
+    для audit_logs лише вже заархівовані, для events тільки якщо задано
+    EVENTS_RETENTION_MONTHS (за замовчуванням події зберігаються завжди).
+
+Запуск (cron, раз на добу):
+    python -m app.services.retention
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+from app.models.terminal_scan_id import TerminalScanId
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {"events": "ts", "audit_logs": "created_at"}
+
+
+def _row_to_dict(r: AuditLog) -> dict:
+    return {
+        "id": r.id,
+        "admin_id": r.admin_id,
+        "admin_username": r.admin_username,
+        "action": r.action,
+        "entity_type": r.entity_type,
+        "entity_id": r.entity_id,
+        "details": r.details,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+    }
+
+
+def _archive_path(archive_dir: str, month: str) -> str:
+    return os.path.join(archive_dir, f"audit_logs-{month}.jsonl.gz")
+
+
+def archive_audit_logs(
+    db: Session,
+    *,
+    older_than_days: int | None = None,
+    archive_dir: str | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> dict:
+    """
+    Переносить старі записи аудиту в gzip-архіви і видаляє їх з БД.
+
+    Повертає {"archived": N, "batches": K, "files": [...]}.
+    """
+    older_than_days = settings.audit_retention_days if older_than_days is None else older_than_days
+    archive_dir = archive_dir or settings.retention_archive_dir
+    batch_size = batch_size or settings.retention_batch_size
+    if older_than_days <= 0:
+        return {"archived": 0, "batches": 0, "files": []}
+
+    now = now or datetime.now(timezone.utc)
+    # created_at зберігається як naive UTC (DATETIME) — порівнюємо з naive
+    cutoff = (now - timedelta(days=older_than_days)).replace(tzinfo=None)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    archived = 0
+    batches = 0
+    files: set[str] = set()
+    while True:
+        rows = (
+            db.query(AuditLog)
+            .filter(AuditLog.created_at < cutoff)
+            .order_by(AuditLog.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        by_month: dict[str, list[dict]] = {}
+        for r in rows:
+            by_month.setdefault(r.created_at.strftime("%Y-%m"), []).append(_row_to_dict(r))
+
+        # Кожен дозапис — окремий gzip member; gzip/zcat читають їх як один потік
+        for month, items in by_month.items():
+            path = _archive_path(archive_dir, month)
+            with gzip.open(path, "at", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            files.add(path)
+
+        ids = [r.id for r in rows]
+        db.query(AuditLog).filter(AuditLog.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.expunge_all()
+
+        archived += len(ids)
+        batches += 1
+        logger.info(f"Retention: archived {len(ids)} audit rows (total {archived})")
+
+    return {"archived": archived, "batches": batches, "files": sorted(files)}
+
+
+def prune_scan_ids(
+    db: Session,
+    *,
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Видаляє старі ключі ідемпотентності сканів; повертає кількість рядків."""
+    older_than_days = settings.terminal_scan_id_retention_days if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.retention_batch_size
+    if older_than_days <= 0:
+        return 0
+
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=older_than_days)).replace(tzinfo=None)
+    deleted = 0
+    while True:
+        ids = [
+            row_id for (row_id,) in db.query(TerminalScanId.id)
+            .filter(TerminalScanId.created_at < cutoff)
+            .order_by(TerminalScanId.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+        db.query(TerminalScanId).filter(TerminalScanId.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+    if deleted:
+        logger.info(f"Retention: deleted {deleted} terminal scan ids")
+    return deleted
+
+
+# ── MySQL partitions ──────────────────────────────────────────────────────────
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def month_partitions(first: date, last: date) -> list[tuple[str, date]]:
+    """
+    Партиції для місяців first..last включно: (назва, верхня межа).
+    Межа — перше число наступного місяця (VALUES LESS THAN).
+    """
+    result = []
+    cur = _month_start(first)
+    while cur <= _month_start(last):
+        nxt = _next_month(cur)
+        result.append((partition_name(cur), nxt))
+        cur = nxt
+    return result
+
+
+def partition_clause(name: str, bound: date) -> str:
+    return f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{bound.isoformat()}'))"
+
+
+def _is_mysql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "mysql"
+
+
+def _existing_partitions(db: Session, table: str) -> list[str]:
+    rows = db.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"t": table}).all()
+    return [r[0] for r in rows]
+
+
+def ensure_future_partitions(db: Session, months_ahead: int = 3, today: date | None = None) -> list[str]:
+    """Додає партиції до поточного місяця + months_ahead, відрізаючи їх від pmax."""
+    if not _is_mysql(db):
+        return []
+    today = today or datetime.now(timezone.utc).date()
+    last = _month_start(today)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    created = []
+    for table in PARTITIONED_TABLES:
+        existing = set(_existing_partitions(db, table))
+        if "pmax" not in existing:
+            continue  # таблиця не партиційована (міграція 004 не застосована)
+        missing = [
+            (name, bound) for name, bound in month_partitions(today, last)
+            if name not in existing
+        ]
+        # Тільки місяці після останньої існуючої партиції — REORGANIZE pmax
+        monthly = sorted(p for p in existing if p != "pmax")
+        if monthly:
+            missing = [(n, b) for n, b in missing if n > monthly[-1]]
+        if not missing:
+            continue
+        clauses = ",\n  ".join(partition_clause(n, b) for n, b in missing)
+        db.execute(text(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO (\n  {clauses},\n"
+            f"  PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+        created.extend(f"{table}.{n}" for n, _ in missing)
+    return created
+
+
+def _months_back(d: date, months: int) -> date:
+    year, month = divmod(d.year * 12 + d.month - 1 - months, 12)
+    return date(year, month + 1, 1)
+
+
+def drop_expired_partitions(db: Session, table: str, cutoff: date) -> list[str]:
+    """
+    Видаляє партиції, місяць яких повністю закінчився до cutoff.
+    Для audit_logs викликати ПІСЛЯ archive_audit_logs — тоді вони вже порожні.
+    """
+    if not _is_mysql(db):
+        return []
+
+    expired = []
+    for name in _existing_partitions(db, table):
+        if name == "pmax":
+            continue
+        month = datetime.strptime(name[1:], "%Y%m").date()
+        if _next_month(month) <= cutoff:
+            expired.append(name)
+    if expired:
+        db.execute(text(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}"))
+    return expired
+
+
+def run(db: Session) -> dict:
+    """Повний цикл обслуговування: архів аудиту, старі партиції, майбутні партиції."""
+    today = datetime.now(timezone.utc).date()
+    result: dict = {"audit": archive_audit_logs(db), "scan_ids": prune_scan_ids(db), "dropped": []}
+    if settings.audit_retention_days > 0:
+        result["dropped"] += drop_expired_partitions(
+            db, "audit_logs", today - timedelta(days=settings.audit_retention_days),
+        )
+    if settings.events_retention_months > 0:
+        result["dropped"] += drop_expired_partitions(
+            db, "events", _months_back(today, settings.events_retention_months),
+        )
+    result["created"] = ensure_future_partitions(db, today=today)
+    return result
+
+
+if __name__ == "__main__":
+    from app.core.logging import setup_logging
+    from app.db.session import SessionLocal
+
+    setup_logging()
+    session = SessionLocal()
+    try:
+        logger.info(f"Retention finished: {run(session)}")
+    finally:
+        session.close()
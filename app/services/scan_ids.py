@@ -0,0 +1,69 @@
+"""
+In-process LRU of recently processed terminal scan ids.
+
+Terminals retry a scan with the same scan_id when a response is lost. The
+authoritative record is the terminal_scan_ids table (unique on
+terminal_id + scan_id, see migration 005); this cache sits in front of it so
+a retry that reaches the same worker returns the stored result without
+touching the database at all.
+
+Only results that are already committed are cached, so a hit is always
+safe to return. A miss falls through to the table; other gunicorn workers
+keep their own cache and rely on the unique key.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+from app.core import metrics
+from app.core.config import settings
+
+LOOKUPS = metrics.counter(
+    "terminal_scan_id_lookups_total",
+    "Scan id lookups by result: memory (LRU hit), db (stored row), new.",
+    ("result",),
+)
+
+_lock = threading.Lock()
+
+# (terminal_id, scan_id) -> stored result (see app/crud/event.py)
+_entries: "OrderedDict[tuple[int, str], dict]" = OrderedDict()
+
+
+def get(terminal_id: int, scan_id: str) -> dict | None:
+    """Stored result (a copy) or None."""
+    key = (terminal_id, scan_id)
+    with _lock:
+        result = _entries.get(key)
+        if result is None:
+            return None
+        _entries.move_to_end(key)
+    LOOKUPS.inc(result="memory")
+    return dict(result)
+
+
+def put(terminal_id: int, scan_id: str, result: dict) -> None:
+    """Remember a committed result; ORM objects are not kept."""
+    if settings.scan_id_cache_max_entries <= 0:
+        return
+    key = (terminal_id, scan_id)
+    value = {k: v for k, v in result.items() if k not in ("employee", "event")}
+    value["duplicate"] = True
+    with _lock:
+        _entries[key] = value
+        _entries.move_to_end(key)
+        while len(_entries) > settings.scan_id_cache_max_entries:
+            _entries.popitem(last=False)
+
+
+def size() -> int:
+    return len(_entries)
+
+
+metrics.gauge("terminal_scan_id_cache_size", "Scan ids held in the in-memory LRU.", callback=size)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
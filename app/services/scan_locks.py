@@ -0,0 +1,58 @@
+"""
+Striped per-employee locks for the scan read-decide-insert sequence.
+
+A scan reads the employee's last event, decides IN/OUT (toggle, cooldown)
+and inserts. Two scans of the same badge processed at once would both read
+the same last event and both insert IN. Within a worker, scans of the same
+badge are serialised here: the badge UID is hashed onto one of STRIPES
+asyncio locks, so unrelated employees almost never wait on each other and
+memory stays fixed no matter how many employees there are.
+
+Across gunicorn workers the conditional INSERT in app/crud/event.py is the
+guard, on the single-scan, batch and group-commit paths alike; no row locks
+(SELECT ... FOR UPDATE) are taken up front.
+
+A batch upload holds the stripes of all its badges (hold()); they are taken
+in ascending stripe order, so two batches cannot deadlock each other and a
+single scan (one stripe) never waits in a cycle.
+"""
+from __future__ import annotations
+
+import asyncio
+import zlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Iterable
+
+STRIPES = 256
+
+_locks: list[asyncio.Lock] = []
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _stripe(uid: str) -> int:
+    return zlib.crc32(uid.strip().upper().encode()) % STRIPES
+
+
+def _loop_locks() -> list[asyncio.Lock]:
+    global _locks, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # asyncio.Lock binds to the loop it first waits on — new loop, new locks
+        _locks = [asyncio.Lock() for _ in range(STRIPES)]
+        _loop = loop
+    return _locks
+
+
+def lock_for(uid: str) -> asyncio.Lock:
+    """Lock of the stripe the (normalised) badge UID falls on; event loop thread only."""
+    return _loop_locks()[_stripe(uid)]
+
+
+@asynccontextmanager
+async def hold(uids: Iterable[str]):
+    """Hold the stripes of all given badges, acquired in ascending stripe order."""
+    locks = _loop_locks()
+    async with AsyncExitStack() as stack:
+        for stripe in sorted({_stripe(uid) for uid in uids}):
+            await stack.enter_async_context(locks[stripe])
+        yield
@@ -0,0 +1,199 @@
+"""
+Group-commit writer for terminal scans (SCAN_GROUP_COMMIT_ENABLED).
+
+At shift start hundreds of scans arrive within minutes and each one used to
+pay for its own commit (one fsync on MySQL). With the writer running, scan
+routes enqueue the scan and await a future; a single daemon thread collects
+scans for SCAN_GROUP_COMMIT_INTERVAL_MS or until SCAN_GROUP_COMMIT_MAX_EVENTS
+are queued, applies them with apply_terminal_scans() and commits once.
+
+Ordering: one thread applies the groups one after another, and inside a
+group each employee's scans go in ts order with the toggle state carried
+from scan to scan, so IN/OUT alternation holds exactly as on the direct
+path. The request gets the assigned event id from the resolved future.
+
+Across workers each insert is guarded the same way as on the direct path
+(apply_terminal_scans() inserts only if the employee got no newer event,
+otherwise re-reads and retries). A group that hits a unique-key conflict
+(the same scan_id committed by another worker meanwhile) or runs out of
+guard retries is retried scan by scan, so one conflicting scan does not
+fail the others. The queue is bounded: when it is full, submit()
+waits for space (backpressure) instead of bypassing the writer, which would
+break per-employee ordering.
+
+Without the writer (disabled, tests, scripts) routes write directly.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.exc import IntegrityError
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud.event import ScanConflictError, ScanInput, apply_terminal_scans
+from app.db.session import session_factory
+
+logger = logging.getLogger(__name__)
+
+GROUP_SIZE = metrics.histogram(
+    "scan_group_commit_size", "Scans committed per group-commit transaction.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+COMMIT_SECONDS = metrics.histogram(
+    "scan_group_commit_seconds", "Time to apply and commit one group of scans.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+# How often an idle writer checks for shutdown
+_IDLE_POLL_SECONDS = 0.2
+
+
+@dataclass
+class _Job:
+    scan: ScanInput
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+
+
+_queue: "queue.Queue[_Job]" = queue.Queue(maxsize=settings.scan_group_commit_queue_max)
+_writer: threading.Thread | None = None
+_stop = threading.Event()
+
+metrics.gauge("scan_group_commit_queue", "Scans waiting for the group-commit writer.", callback=_queue.qsize)
+
+
+def running() -> bool:
+    return _writer is not None
+
+
+async def submit(scan: ScanInput) -> dict:
+    """
+    Queue a scan and wait until its group is committed.
+
+    Returns the same dict as create_event_from_terminal_scan(); raises
+    ValueError for an unknown UID.
+    """
+    loop = asyncio.get_running_loop()
+    job = _Job(scan=scan, loop=loop, future=loop.create_future())
+    try:
+        _queue.put_nowait(job)
+    except queue.Full:
+        await asyncio.to_thread(_queue.put, job)
+    result = await job.future
+    if result["status"] == "unknown_employee":
+        raise ValueError(result["message"])
+    return result
+
+
+def _resolve(job: _Job, outcome) -> None:
+    def _set() -> None:
+        if job.future.done():
+            return  # request was cancelled (client went away)
+        if isinstance(outcome, BaseException):
+            job.future.set_exception(outcome)
+        else:
+            job.future.set_result(outcome)
+
+    try:
+        job.loop.call_soon_threadsafe(_set)
+    except RuntimeError:
+        pass  # event loop already closed (shutdown)
+
+
+def _apply_one(session, scan: ScanInput):
+    # After a unique-key conflict the second attempt finds the stored scan_id
+    for attempt in range(2):
+        try:
+            return apply_terminal_scans(session, [scan])[0]
+        except IntegrityError as exc:
+            session.rollback()
+            if attempt:
+                return exc
+        except Exception as exc:
+            session.rollback()
+            return exc
+
+
+def _commit_group(jobs: list[_Job]) -> None:
+    started = time.perf_counter()
+    session = session_factory("terminal")()
+    try:
+        try:
+            outcomes = apply_terminal_scans(session, [job.scan for job in jobs])
+        except (IntegrityError, ScanConflictError) as exc:
+            session.rollback()
+            logger.info(f"Scan group of {len(jobs)} hit a conflict ({type(exc).__name__}), retrying one by one")
+            outcomes = [_apply_one(session, job.scan) for job in jobs]
+    except Exception as exc:
+        session.rollback()
+        logger.error(f"Failed to commit {len(jobs)} scans: {exc}")
+        outcomes = [exc] * len(jobs)
+    finally:
+        session.close()
+
+    GROUP_SIZE.observe(len(jobs))
+    COMMIT_SECONDS.observe(time.perf_counter() - started)
+    for job, outcome in zip(jobs, outcomes):
+        _resolve(job, outcome)
+
+
+def _drain(max_items: int) -> list[_Job]:
+    jobs: list[_Job] = []
+    while len(jobs) < max_items:
+        try:
+            jobs.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return jobs
+
+
+def _run() -> None:
+    interval = settings.scan_group_commit_interval_ms / 1000
+    max_events = settings.scan_group_commit_max_events
+    while not _stop.is_set():
+        try:
+            jobs = [_queue.get(timeout=_IDLE_POLL_SECONDS)]
+        except queue.Empty:
+            continue
+        deadline = time.monotonic() + interval
+        while len(jobs) < max_events:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _commit_group(jobs)
+
+
+def start_writer() -> None:
+    """Start the writer if SCAN_GROUP_COMMIT_ENABLED (idempotent). Called from the app lifespan."""
+    global _writer
+    if _writer is not None or not settings.scan_group_commit_enabled:
+        return
+    _stop.clear()
+    _writer = threading.Thread(target=_run, name="scan-writer", daemon=True)
+    _writer.start()
+    logger.info(
+        f"Scan group commit: every {settings.scan_group_commit_interval_ms} ms "
+        f"or {settings.scan_group_commit_max_events} scans"
+    )
+
+
+def stop_writer(timeout: float = 10.0) -> None:
+    """Stop the writer and commit everything still queued; later scans write directly."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is None:
+        return
+    _stop.set()
+    writer.join(timeout)
+    while jobs := _drain(settings.scan_group_commit_max_events):
+        _commit_group(jobs)
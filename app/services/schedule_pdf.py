@@ -0,0 +1,530 @@
+"""
+PDF-рендер графіку змін (reportlab).
+
+reportlab важкий в імпорті, а TTF-шрифти DejaVu парсяться при кожній
+реєстрації — тому все це робиться ОДИН раз на процес і ліниво:
+воркери, які ніколи не генерують PDF, reportlab взагалі не імпортують.
+Стилі (ParagraphStyle / TableStyle) теж будуються один раз і
+перевикористовуються — вони не змінюються між запитами.
+
+Великі діапазони розбиваються на секції "місяць × посада": кожна секція —
+окрема таблиця з нової сторінки, тож reportlab верстає багато невеликих
+таблиць замість однієї гігантської.
+
+Сам рендер виконується в окремому пулі процесів (SCHEDULE_PDF_WORKERS),
+щоб не займати GIL і потоки веб-воркера, а готові байти кешуються за
+хешем (діапазон дат + вміст графіку): повторне завантаження незміненого
+графіку не рендериться заново. Тому "Сформовано" у футері PDF — час
+ПЕРШОГО рендеру цього вмісту, а не конкретного завантаження: копія з
+кешу віддається з ним без змін.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ── Font lookup (Cyrillic-capable) ─────────────────────────────────────────────
+FONT_PATHS = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+     "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/local/lib/python3.12/site-packages/cv2/qt/fonts/DejaVuSans.ttf",
+     "/usr/local/lib/python3.12/site-packages/cv2/qt/fonts/DejaVuSans-Bold.ttf"),
+    ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"),
+]
+
+_DAY_NAMES_UA = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Нд"]
+_MONTH_NAMES_UA = [
+    "Січень", "Лютий", "Березень", "Квітень", "Травень", "Червень",
+    "Липень", "Серпень", "Вересень", "Жовтень", "Листопад", "Грудень",
+]
+NO_POSITION = "Без посади"
+
+_LEGEND_DATA = [
+    ["Позначення:",
+     "В — вихідний",
+     "Б — лікарняний",
+     "В/Д — відпустка",
+     "—  — не заповнено",
+     "ЧЧ:ХХ — початок / кінець зміни"],
+]
+
+# (employee_id, full_name, position)
+EmployeeRow = tuple[int, str, "str | None"]
+# (employee_id, day) -> (start_hhmm, end_hhmm, code)
+CellIndex = dict[tuple[int, date], tuple["str | None", "str | None", "str | None"]]
+
+
+@dataclass(frozen=True)
+class _PdfResources:
+    """Все, що не залежить від даних конкретного запиту."""
+    font_name: str
+    font_bold: str
+    colors: dict[str, Any]
+    title_style: Any
+    subtitle_style: Any
+    table_style: Any
+    legend_style: Any
+
+
+_resources: _PdfResources | None = None
+_init_lock = threading.Lock()
+
+
+def _register_fonts() -> tuple[str, str]:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for reg_path, bold_path in FONT_PATHS:
+        try:
+            pdfmetrics.registerFont(TTFont("_PDF_Sans", reg_path))
+            pdfmetrics.registerFont(TTFont("_PDF_Sans_Bold", bold_path))
+            return "_PDF_Sans", "_PDF_Sans_Bold"
+        except Exception:
+            continue
+    logger.warning("Cyrillic font not found, falling back to Helvetica")
+    return "Helvetica", "Helvetica-Bold"
+
+
+def _build_resources() -> _PdfResources:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import TableStyle
+
+    font_name, font_bold = _register_fonts()
+
+    # ── Brand palette ──────────────────────────────────────────────────────────
+    c = {
+        "primary":    colors.HexColor("#1a2e4a"),   # dark navy  — header bg
+        "accent":     colors.HexColor("#2980b9"),   # steel blue — sub-header bg
+        "weekend_h":  colors.HexColor("#c0392b"),   # red — weekend header
+        "weekend_d":  colors.HexColor("#fff0f0"),   # pale red — weekend data rows
+        "row_odd":    colors.HexColor("#f7f9fc"),   # very light blue-grey
+        "row_even":   colors.white,
+        "border":     colors.HexColor("#c8d6e5"),   # soft border
+        "border_dark": colors.HexColor("#1a2e4a"),  # dark outer border
+        "text_light": colors.white,
+        "text_muted": colors.HexColor("#6b7a8d"),
+    }
+
+    # ── Paragraph styles ────────────────────────────────────────────────────
+    def _ps(name, font, size, color, align=TA_LEFT, leading=None, space_before=0, space_after=0):
+        return ParagraphStyle(
+            name,
+            fontName=font,
+            fontSize=size,
+            textColor=color,
+            alignment=align,
+            leading=leading or size * 1.25,
+            spaceBefore=space_before,
+            spaceAfter=space_after,
+        )
+
+    title_style = _ps("Title", font_bold, 16, c["primary"], TA_CENTER, space_before=0, space_after=1*mm)
+    subtitle_style = _ps("Subtitle", font_name, 9, c["text_muted"], TA_CENTER, space_before=0, space_after=4*mm)
+
+    # ── Table style (weekend columns are added per table) ────────────────────
+    table_style = TableStyle([
+        # ── Header row 0: dates ──────────────────────────────────────────
+        ("BACKGROUND",   (0, 0), (-1, 0), c["primary"]),
+        ("TEXTCOLOR",    (0, 0), (-1, 0), c["text_light"]),
+        ("FONTNAME",     (0, 0), (-1, 0), font_bold),
+        ("FONTSIZE",     (0, 0), (-1, 0), 8),
+        ("TOPPADDING",   (0, 0), (-1, 0), 5),
+        ("BOTTOMPADDING",(0, 0), (-1, 0), 5),
+
+        # ── Header row 1: weekday names ──────────────────────────────────
+        ("BACKGROUND",   (0, 1), (-1, 1), c["accent"]),
+        ("TEXTCOLOR",    (0, 1), (-1, 1), c["text_light"]),
+        ("FONTNAME",     (0, 1), (-1, 1), font_name),
+        ("FONTSIZE",     (0, 1), (-1, 1), 6.5),
+        ("TOPPADDING",   (0, 1), (-1, 1), 3),
+        ("BOTTOMPADDING",(0, 1), (-1, 1), 3),
+
+        # ── First 3 columns bold in header ───────────────────────────────
+        ("FONTNAME",     (0, 0), (2, 1), font_bold),
+
+        # ── Data rows ────────────────────────────────────────────────────
+        ("FONTNAME",     (0, 2), (-1, -1), font_name),
+        ("FONTSIZE",     (0, 2), (-1, -1), 7),
+        ("TOPPADDING",   (0, 2), (-1, -1), 3),
+        ("BOTTOMPADDING",(0, 2), (-1, -1), 3),
+
+        # ── Alternating row colours ───────────────────────────────────────
+        ("ROWBACKGROUNDS", (0, 2), (-1, -1), [c["row_even"], c["row_odd"]]),
+
+        # ── Alignment ────────────────────────────────────────────────────
+        ("ALIGN",   (0, 0), (0, -1),  "CENTER"),  # №
+        ("ALIGN",   (1, 0), (1, -1),  "LEFT"),    # Name
+        ("ALIGN",   (2, 0), (2, -1),  "LEFT"),    # Position
+        ("ALIGN",   (3, 0), (-1, -1), "CENTER"),  # Days
+        ("VALIGN",  (0, 0), (-1, -1), "MIDDLE"),
+
+        # ── Borders ──────────────────────────────────────────────────────
+        ("GRID",    (0, 0), (-1, -1),  0.3, c["border"]),
+        ("BOX",     (0, 0), (-1, -1),  1.2, c["border_dark"]),
+        # thick line under header
+        ("LINEBELOW", (0, 1), (-1, 1), 1.5, c["primary"]),
+        # thick right border after fixed columns
+        ("LINEAFTER", (2, 0), (2, -1), 1.2, c["primary"]),
+
+        # ── Padding (global) ─────────────────────────────────────────────
+        ("LEFTPADDING",  (0, 0), (-1, -1), 3),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
+    ])
+
+    # ── Legend ──────────────────────────────────────────────
+    leg_ts = TableStyle([
+        ("FONTNAME",    (0, 0), (-1, -1), font_name),
+        ("FONTSIZE",    (0, 0), (-1, -1), 7),
+        ("TEXTCOLOR",   (0, 0), (0, 0),   c["primary"]),
+        ("FONTNAME",    (0, 0), (0, 0),   font_bold),
+        ("TEXTCOLOR",   (1, 0), (-1, -1), c["text_muted"]),
+        ("ALIGN",       (0, 0), (-1, -1), "LEFT"),
+        ("VALIGN",      (0, 0), (-1, -1), "MIDDLE"),
+        ("TOPPADDING",  (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING",(0, 0), (-1, -1), 2),
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+    ])
+
+    return _PdfResources(
+        font_name=font_name,
+        font_bold=font_bold,
+        colors=c,
+        title_style=title_style,
+        subtitle_style=subtitle_style,
+        table_style=table_style,
+        legend_style=leg_ts,
+    )
+
+
+def get_resources() -> _PdfResources:
+    """Lazy one-time init: reportlab import, font registration, styles."""
+    global _resources
+    if _resources is None:
+        with _init_lock:
+            if _resources is None:
+                _resources = _build_resources()
+    return _resources
+
+
+def _daterange(d1: date, d2: date):
+    """Генератор діапазону дат"""
+    cur = d1
+    while cur <= d2:
+        yield cur
+        cur += timedelta(days=1)
+
+
+def time_cell(start_hhmm: str | None, end_hhmm: str | None, code: str | None) -> str:
+    """
+    Повертає текст для комірки графіку
+    """
+    if code and code != "":
+        return code
+
+    if start_hhmm == "00:00" and end_hhmm == "00:00":
+        return "—"
+
+    if start_hhmm and end_hhmm:
+        return f"{start_hhmm}\n{end_hhmm}"
+
+    return "—"
+
+
+def month_chunks(date_from: date, date_to: date) -> list[list[date]]:
+    """Розбиває діапазон на календарні місяці (перший/останній можуть бути неповні)."""
+    chunks: list[list[date]] = []
+    for d in _daterange(date_from, date_to):
+        if not chunks or (d.year, d.month) != (chunks[-1][0].year, chunks[-1][0].month):
+            chunks.append([])
+        chunks[-1].append(d)
+    return chunks
+
+
+def group_by_position(employees: list[EmployeeRow]) -> list[tuple[str, list[EmployeeRow]]]:
+    """
+    Групує працівників за посадою (порядок груп — за алфавітом,
+    "Без посади" — останньою). Всередині групи порядок зберігається.
+    """
+    groups: dict[str, list[EmployeeRow]] = {}
+    for emp in employees:
+        groups.setdefault(emp[2] or NO_POSITION, []).append(emp)
+    return sorted(groups.items(), key=lambda kv: (kv[0] == NO_POSITION, kv[0].casefold()))
+
+
+def render_schedule_pdf(
+    date_from: date,
+    date_to: date,
+    employees: list[EmployeeRow],
+    cells: CellIndex,
+    generated_at: datetime,
+) -> bytes:
+    """
+    Рендерить графік за період у PDF і повертає байти.
+
+    Кожна секція (місяць × посада) — окрема таблиця з нової сторінки.
+    Функція чиста (тільки аргументи → байти; час "Сформовано" теж
+    передається), тому її можна виконувати в дочірньому процесі.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.platypus import (
+        HRFlowable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table,
+    )
+
+    res = get_resources()
+    c = res.colors
+
+    # ── Column widths ───────────────────────────────────────────────────
+    PAGE_W = landscape(A4)[0]
+    MARGIN = 12 * mm
+    available_width = PAGE_W - 2 * MARGIN
+
+    COL_NUM  = 10 * mm
+    COL_NAME = 52 * mm
+    COL_POS  = 36 * mm
+    fixed_w  = COL_NUM + COL_NAME + COL_POS
+
+    # ── PDF document ────────────────────────────────────────────────────
+    buf = BytesIO()
+    doc = SimpleDocTemplate(
+        buf,
+        pagesize=landscape(A4),
+        leftMargin=MARGIN,
+        rightMargin=MARGIN,
+        topMargin=14 * mm,
+        bottomMargin=12 * mm,
+        title=f"Графік змін {date_from.strftime('%d.%m.%Y')}–{date_to.strftime('%d.%m.%Y')}",
+        author="TimeTracker",
+        subject="Графік роботи персоналу",
+    )
+
+    # ── Page-number callback ─────────────────────────────────────────────
+    generated_str = generated_at.strftime("%d.%m.%Y %H:%M")
+
+    def add_page_meta(canvas, document):
+        canvas.saveState()
+        # thin top bar
+        canvas.setFillColor(c["primary"])
+        canvas.rect(MARGIN, landscape(A4)[1] - 8*mm, PAGE_W - 2*MARGIN, 1.2, fill=1, stroke=0)
+        # footer line
+        canvas.setFillColor(c["border"])
+        canvas.rect(MARGIN, 8*mm, PAGE_W - 2*MARGIN, 0.5, fill=1, stroke=0)
+        # footer text left
+        canvas.setFont(res.font_name, 7)
+        canvas.setFillColor(c["text_muted"])
+        canvas.drawString(MARGIN, 5*mm, "TimeTracker — Графік роботи персоналу")
+        # footer text right
+        page_str = f"Сформовано: {generated_str}   Стор. {document.page}"
+        canvas.drawRightString(PAGE_W - MARGIN, 5*mm, page_str)
+        canvas.restoreState()
+
+    groups = group_by_position(employees) or [(NO_POSITION, [])]
+
+    # ── Story: one section per (month, position) ─────────────────────────
+    story = []
+    for days in month_chunks(date_from, date_to):
+        num_days = len(days)
+        month_title = f"{_MONTH_NAMES_UA[days[0].month - 1]} {days[0].year}"
+
+        # Adaptive day-column width: tighter for many days
+        day_w_max  = 14 * mm
+        day_w_min  = 6.5 * mm
+        day_width  = max(day_w_min, min(day_w_max, (available_width - fixed_w) / max(num_days, 1)))
+        col_widths = [COL_NUM, COL_NAME, COL_POS] + [day_width] * num_days
+
+        # Row-0: date numbers | Row-1: weekday abbreviations
+        header_row1 = ["№", "Прізвище та ім'я", "Посада"] + [d.strftime("%d") for d in days]
+        header_row2 = ["", "", ""] + [_DAY_NAMES_UA[d.weekday()] for d in days]
+
+        for position, group in groups:
+            if story:
+                story.append(PageBreak())
+
+            story.append(Paragraph(f"Графік робочих змін — {month_title}", res.title_style))
+            period_str = (
+                f"Посада: {position}"
+                f"   |   Період: {days[0].strftime('%d.%m.%Y')} — {days[-1].strftime('%d.%m.%Y')}"
+                f"   |   Співробітників: {len(group)}"
+                f"   |   Днів: {num_days}"
+            )
+            story.append(Paragraph(period_str, res.subtitle_style))
+            story.append(HRFlowable(width="100%", thickness=1.5, color=c["primary"], spaceAfter=4*mm))
+
+            data: list[list[str]] = [header_row1, header_row2]
+            for i, (emp_id, full_name, emp_position) in enumerate(group, start=1):
+                row: list[str] = [str(i), full_name, (emp_position or "—")]
+                for d in days:
+                    s, en, code = cells.get((emp_id, d), (None, None, None))
+                    row.append(time_cell(s, en, code))
+                data.append(row)
+
+            # ── Weekend highlighting (on top of the shared style) ────────
+            weekend_cmds = []
+            for di, d in enumerate(days):
+                col = 3 + di
+                if d.weekday() >= 5:
+                    weekend_cmds.append(("BACKGROUND", (col, 0), (col, 1), c["weekend_h"]))
+                    # For weekend data cells override alternating background
+                    if group:
+                        weekend_cmds.append(("BACKGROUND", (col, 2), (col, 1 + len(group)), c["weekend_d"]))
+
+            tbl = Table(data, colWidths=col_widths, repeatRows=2)
+            tbl.setStyle(res.table_style)
+            if weekend_cmds:
+                tbl.setStyle(weekend_cmds)
+            story.append(tbl)
+
+            # ── Legend ───────────────────────────────────────────────────
+            # Flowable тримає стан після wrap() — таблицю створюємо на кожну
+            # секцію, кешується лише її стиль.
+            story.append(Spacer(1, 5 * mm))
+            leg_widths = [28*mm, 28*mm, 28*mm, 28*mm, 28*mm, 60*mm]
+            leg_tbl = Table(_LEGEND_DATA, colWidths=leg_widths)
+            leg_tbl.setStyle(res.legend_style)
+            story.append(leg_tbl)
+
+    # ── Build ────────────────────────────────────────────────────────────
+    doc.build(story, onFirstPage=add_page_meta, onLaterPages=add_page_meta)
+    return buf.getvalue()
+
+
+# ── Process pool ──────────────────────────────────────────────────────────────
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class RenderTimeoutError(Exception):
+    """The render did not finish within SCHEDULE_PDF_TIMEOUT_SECONDS."""
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool
+    if settings.schedule_pdf_workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: the web worker is multi-threaded, fork is not safe here
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.schedule_pdf_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop render processes (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _discard_pool(pool: ProcessPoolExecutor, terminate: bool = False) -> None:
+    """Detach a pool so the next render builds a new one; optionally kill its processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    if terminate:
+        # shutdown() cannot interrupt a running task — a stuck render would
+        # keep its process (and a pool slot) forever
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render(date_from: date, date_to: date, employees: list[EmployeeRow], cells: CellIndex) -> bytes:
+    generated_at = datetime.now()
+    pool = _get_pool()
+    if pool is None:
+        return render_schedule_pdf(date_from, date_to, employees, cells, generated_at)
+
+    future = pool.submit(render_schedule_pdf, date_from, date_to, employees, cells, generated_at)
+    try:
+        return future.result(timeout=settings.schedule_pdf_timeout_seconds)
+    except FuturesTimeoutError:
+        future.cancel()
+        logger.error(
+            f"Schedule PDF render {date_from}..{date_to} exceeded "
+            f"{settings.schedule_pdf_timeout_seconds} s, recycling the worker pool"
+        )
+        _discard_pool(pool, terminate=True)
+        raise RenderTimeoutError(f"PDF render exceeded {settings.schedule_pdf_timeout_seconds} s")
+    except BrokenProcessPool:
+        # A worker died (OOM kill etc.) — drop the pool, next call builds a new one
+        logger.exception("Schedule PDF worker pool is broken, rendering in-process")
+        _discard_pool(pool)
+        return render_schedule_pdf(date_from, date_to, employees, cells, generated_at)
+
+
+# ── Result cache ──────────────────────────────────────────────────────────────
+
+# key -> PDF bytes
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def cache_key(date_from: date, date_to: date, employees: list[EmployeeRow], cells: CellIndex) -> str:
+    """
+    Хеш діапазону і вмісту графіку (працівники + комірки) — це і є "версія"
+    даних: будь-яка зміна комірки, імені чи посади дає новий ключ.
+    """
+    h = hashlib.sha1()
+    h.update(f"{date_from.isoformat()}|{date_to.isoformat()}".encode())
+    for emp in employees:
+        h.update(repr(emp).encode())
+    for key in sorted(cells):
+        h.update(repr((key, cells[key])).encode())
+    return h.hexdigest()
+
+
+def get_schedule_pdf(
+    date_from: date,
+    date_to: date,
+    employees: list[EmployeeRow],
+    cells: CellIndex,
+) -> bytes:
+    """
+    PDF графіку: з кешу, або рендер у пулі процесів з записом у кеш.
+    Копія з кешу несе час першого рендеру (див. docstring модуля).
+    """
+    key = cache_key(date_from, date_to, employees, cells)
+    with _cache_lock:
+        pdf = _cache.get(key)
+        if pdf is not None:
+            _cache.move_to_end(key)
+            return pdf
+
+    pdf = _render(date_from, date_to, employees, cells)
+
+    if settings.schedule_pdf_cache_max_entries > 0:
+        with _cache_lock:
+            _cache[key] = pdf
+            _cache.move_to_end(key)
+            while len(_cache) > settings.schedule_pdf_cache_max_entries:
+                _cache.popitem(last=False)
+    return pdf
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,220 @@
+"""
+In-process response cache for the stats endpoints.
+
+Entries are keyed by (endpoint, employee_id, params) and remember the
+employee's data version at the moment they were computed. Every write that
+touches an employee's events calls invalidate_employee(), which bumps that
+version — a stale entry is then never served again by this process.
+Endpoints that aggregate over all employees (recent scans) use
+employee_id=None and are tied to a global version bumped on any write.
+
+Across gunicorn workers: a write passes its session to
+invalidate_employee() before committing, and the employee's row
+"stats:<id>" in cache_versions (migration 006) is incremented in that
+transaction. This process's own versions move once the transaction
+commits. get() compares the shared counter with the one it last saw, at
+most once per STATS_CACHE_CHECK_SECONDS per employee (a primary-key read),
+so another worker's write stops being served within that interval rather
+than the TTL. The aggregate endpoints key their entries on a fingerprint
+of the data and need no shared counter. STATS_CACHE_TTL_SECONDS still
+bounds entry age.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.upsert import dialect_insert
+from app.models.cache_version import CacheVersion
+
+MISS = object()
+
+_lock = threading.Lock()
+
+# key -> (version, stored_at, value)
+_entries: "OrderedDict[tuple, tuple[int, float, Any]]" = OrderedDict()
+
+# employee_id -> version; None -> global version (any employee changed)
+_versions: dict[int | None, int] = {}
+
+# employee_id -> (shared cache_versions value last seen, monotonic check time)
+_shared: dict[int, tuple[int, float]] = {}
+
+# Session.info key: employees invalidated in the session's open transaction
+_PENDING = "stats_cache_pending"
+
+# endpoint -> [hits, misses]
+_counters: dict[str, list[int]] = {}
+_invalidations = 0
+
+
+def version(employee_id: int | None) -> tuple[int, int]:
+    """
+    Current data version. Read it BEFORE computing a response and pass it to
+    put(), so a write that lands mid-computation makes the entry stale at once.
+    """
+    shared = _shared.get(employee_id)
+    return _versions.get(employee_id, 0), shared[0] if shared else 0
+
+
+def _version_name(employee_id: int) -> str:
+    return f"stats:{employee_id}"
+
+
+def _sync(db: Session, employee_id: int) -> None:
+    """Refresh the shared counter of one employee (throttled)."""
+    now = time.monotonic()
+    seen = _shared.get(employee_id)
+    if seen is not None and now - seen[1] < settings.stats_cache_check_seconds:
+        return
+    value = (
+        db.query(CacheVersion.version)
+        .filter(CacheVersion.name == _version_name(employee_id))
+        .scalar()
+    ) or 0
+    with _lock:
+        _shared[employee_id] = (value, now)
+
+
+def _count(endpoint: str, hit: bool) -> None:
+    c = _counters.setdefault(endpoint, [0, 0])
+    c[0 if hit else 1] += 1
+
+
+def get(endpoint: str, employee_id: int | None, params: Hashable = (), *, db: Session | None = None) -> Any:
+    """
+    Return the cached value or MISS. With db, an employee's shared version
+    is checked first (see the module docstring).
+    """
+    ttl = settings.stats_cache_ttl_seconds
+    if ttl <= 0:
+        return MISS
+    if db is not None and employee_id is not None:
+        _sync(db, employee_id)
+
+    key = (endpoint, employee_id, params)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            stored_version, stored_at, value = entry
+            if stored_version == version(employee_id) and now - stored_at <= ttl:
+                _entries.move_to_end(key)
+                _count(endpoint, True)
+                return value
+            del _entries[key]
+        _count(endpoint, False)
+    return MISS
+
+
+def put(
+    endpoint: str,
+    employee_id: int | None,
+    params: Hashable,
+    value: Any,
+    data_version: tuple[int, int],
+) -> None:
+    """Store a value computed from data at data_version (see version())."""
+    if settings.stats_cache_ttl_seconds <= 0:
+        return
+
+    key = (endpoint, employee_id, params)
+    with _lock:
+        _entries[key] = (data_version, time.monotonic(), value)
+        _entries.move_to_end(key)
+        while len(_entries) > settings.stats_cache_max_entries:
+            _entries.popitem(last=False)
+
+
+def invalidate_employee(employee_id: int, db: Session | None = None) -> None:
+    """
+    Mark every cached response derived from this employee's events as stale.
+
+    Pass the session of the write before it commits: the shared counter is
+    incremented in that transaction and this process's entries go stale
+    when it commits (nothing happens on rollback). Without db only this
+    process is invalidated, immediately.
+    """
+    if db is None:
+        _invalidate_local(employee_id)
+    else:
+        invalidate_employees(db, [employee_id])
+
+
+def invalidate_employees(db: Session, employee_ids) -> None:
+    """invalidate_employee() for several employees in one statement."""
+    pending = db.info.setdefault(_PENDING, set())
+    # Sorted: two transactions bumping the same rows lock them in one order
+    ids = sorted(set(employee_ids) - pending)
+    if not ids:
+        return
+    stmt = dialect_insert(db, CacheVersion).values(
+        [{"name": _version_name(employee_id), "version": 1} for employee_id in ids]
+    )
+    if db.get_bind().dialect.name == "mysql":
+        stmt = stmt.on_duplicate_key_update(version=CacheVersion.version + 1)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=["name"], set_={"version": CacheVersion.version + 1})
+    db.execute(stmt)
+    pending.update(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for employee_id in session.info.pop(_PENDING, ()):
+        _invalidate_local(employee_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def _invalidate_local(employee_id: int) -> None:
+    global _invalidations
+    with _lock:
+        _versions[employee_id] = _versions.get(employee_id, 0) + 1
+        _versions[None] = _versions.get(None, 0) + 1
+        _invalidations += 1
+
+
+def clear() -> None:
+    global _invalidations
+    with _lock:
+        _entries.clear()
+        _versions.clear()
+        _shared.clear()
+        _counters.clear()
+        _invalidations = 0
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters per endpoint plus overall size."""
+    with _lock:
+        endpoints = {
+            name: {"hits": h, "misses": m}
+            for name, (h, m) in sorted(_counters.items())
+        }
+        hits = sum(c[0] for c in _counters.values())
+        misses = sum(c[1] for c in _counters.values())
+        size = len(_entries)
+        invalidations = _invalidations
+
+    total = hits + misses
+    return {
+        "enabled": settings.stats_cache_ttl_seconds > 0,
+        "ttl_seconds": settings.stats_cache_ttl_seconds,
+        "size": size,
+        "max_entries": settings.stats_cache_max_entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+        "invalidations": invalidations,
+        "endpoints": endpoints,
+    }
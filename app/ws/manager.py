@@ -12,12 +12,21 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from typing import Any
 
 from fastapi import WebSocket
 
+from app.core import metrics
+
 logger = logging.getLogger(__name__)
 
+BROADCAST_LAG = metrics.histogram(
+    "ws_broadcast_lag_seconds",
+    "Time from broadcast() until the message was written to every client.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
 
 class ConnectionManager:
     """Manages WebSocket connections for the admin dashboard."""
@@ -40,6 +49,7 @@ class ConnectionManager:
         if not self._connections:
             return
 
+        started = time.perf_counter()
         payload = json.dumps(data, ensure_ascii=False, default=str)
         dead: list[WebSocket] = []
 
@@ -51,6 +61,7 @@ class ConnectionManager:
 
         for ws in dead:
             self.disconnect(ws)
+        BROADCAST_LAG.observe(time.perf_counter() - started)
 
     @property
     def client_count(self) -> int:
@@ -58,3 +69,5 @@ class ConnectionManager:
 
 
 ws_manager = ConnectionManager()
+
+metrics.gauge("ws_clients", "Connected dashboard WebSocket clients.", callback=lambda: ws_manager.client_count)
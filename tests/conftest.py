@@ -4,12 +4,114 @@ conftest.py — глобальні налаштування pytest для всі
 Встановлює мінімальні змінні оточення ДО того, як будь-який модуль
 з app/ спробує зчитати Settings() — інакше pydantic_settings впаде
 з ValidationError через відсутність DATABASE_URL або JWT_SECRET.
+Модулі app/ імпортуються лише всередині фікстур, після цього.
+
+Фікстура make_app_env — спільне тестове оточення API (SQLite + api_router
+з підміненими залежностями); модулі тестів додають лише свої дані.
 """
 import os
 
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event as sa_event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
 # Мінімальний набір env-змінних для тестів (не потребують реальної БД)
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test_temp.db")
 os.environ.setdefault("JWT_SECRET", "test-secret-key-that-is-long-enough-for-jwt-hs256")
 os.environ.setdefault("APP_ENV", "development")
 os.environ.setdefault("ADMIN_PASSWORD", "testpassword123")
 os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _clear_caches():
+    from app.services import employee_uids, scan_ids, stats_cache
+
+    stats_cache.clear()
+    employee_uids.clear()
+    scan_ids.clear()
+
+
+@pytest.fixture
+def make_app_env(monkeypatch, tmp_path):
+    """
+    Фабрика тестового застосунку: SQLite зі схемою, api_router з підміненими
+    get_db, require_admin, get_current_terminal і check_rate_limit,
+    перехоплений WS broadcast. Кеші процесу (stats_cache, employee_uids,
+    scan_ids) очищаються до і після тесту.
+
+    Параметри:
+    - seed — callable(db): початкові дані, фабрика комітить їх сама
+    - file_db — файлова БД у tmp_path замість in-memory StaticPool (справжні
+      паралельні транзакції з кількох потоків)
+    - statements — записувати SQL у env["statements"]
+
+    Повертає dict: client, api, Session, engine, broadcasts[, statements].
+    """
+    import app.models  # noqa: F401 — реєструє всі таблиці в metadata
+    import app.security.audit as audit
+    from app.api.deps import get_current_terminal, require_admin
+    from app.api.router import api_router
+    from app.api.routes import terminals
+    from app.db.base import Base
+    from app.db.session import get_db
+    from app.models.user import User
+    from app.security.rate_limit import check_rate_limit
+
+    engines = []
+
+    def _make(seed=None, file_db=False, statements=False):
+        if file_db:
+            engine = create_engine(
+                f"sqlite:///{tmp_path / 'app.db'}", connect_args={"check_same_thread": False, "timeout": 30},
+            )
+        else:
+            engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        engines.append(engine)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        # Аудит пише у власній сесії — направляємо її в ту ж тестову БД
+        monkeypatch.setattr(audit, "SessionLocal", Session)
+        if seed is not None:
+            with Session() as db:
+                seed(db)
+                db.commit()
+
+        env = {"Session": Session, "engine": engine, "broadcasts": []}
+        if statements:
+            env["statements"] = []
+
+            @sa_event.listens_for(engine, "before_cursor_execute")
+            def _record(conn, cursor, statement, parameters, context, executemany):
+                env["statements"].append(statement)
+
+        async def _broadcast(data):
+            env["broadcasts"].append(data)
+
+        monkeypatch.setattr(terminals.ws_manager, "broadcast", _broadcast)
+
+        def _get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        api = FastAPI()
+        api.include_router(api_router, prefix="/api")
+        api.dependency_overrides[get_db] = _get_db
+        api.dependency_overrides[require_admin] = lambda: User(id=1, username="admin", role="admin")
+        api.dependency_overrides[get_current_terminal] = lambda: None
+        api.dependency_overrides[check_rate_limit] = lambda: None
+        env["api"] = api
+        env["client"] = TestClient(api)
+
+        _clear_caches()
+        return env
+
+    yield _make
+    _clear_caches()
+    for engine in engines:
+        engine.dispose()
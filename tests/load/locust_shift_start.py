@@ -0,0 +1,107 @@
+"""
+Locust — початок зміни: сотні працівників сканують бейджі за кілька хвилин.
+
+Порівнює запис сканів по одному (коміт на кожен скан) і group commit
+(SCAN_GROUP_COMMIT_ENABLED, app/services/scan_writer.py). Сценарій однаковий,
+різниться лише конфігурація сервера — запустіть його двічі і порівняйте
+RPS та p95 для /api/terminal/scan:
+
+    # 1) без group commit
+    SCAN_GROUP_COMMIT_ENABLED=false uvicorn app.main:app --port 8000
+    locust -f tests/load/locust_shift_start.py --host=http://127.0.0.1:8000 \\
+        --headless -u 200 -r 50 -t 2m --csv=shift_direct
+
+    # 2) з group commit
+    SCAN_GROUP_COMMIT_ENABLED=true uvicorn app.main:app --port 8000
+    locust -f tests/load/locust_shift_start.py --host=http://127.0.0.1:8000 \\
+        --headless -u 200 -r 50 -t 2m --csv=shift_grouped
+
+Різниця помітна на MySQL (fsync на коміт); на SQLite вона менша.
+Додатково дивіться /metrics: scan_group_commit_size (сканів на транзакцію).
+
+Перед стартом сценарій створює LOAD_EMPLOYEES працівників (LOADUID0000…)
+через адмін-API, якщо їх ще немає. Кожен віртуальний термінал надсилає свій
+X-Forwarded-For — rate limiter рахує запити по IP, а uvicorn довіряє цьому
+заголовку від 127.0.0.1 (запускайте locust на тій самій машині).
+
+Змінні оточення: LOAD_TERMINAL_KEY, LOAD_TERMINAL_ID, LOAD_EMPLOYEES,
+LOAD_ADMIN_USERNAME, LOAD_ADMIN_PASSWORD.
+"""
+import itertools
+import os
+import time
+import uuid
+
+import requests
+from locust import HttpUser, between, events, task
+
+TERMINAL_KEY = os.environ.get("LOAD_TERMINAL_KEY", "test-terminal-api-key")
+TERMINAL_ID = int(os.environ.get("LOAD_TERMINAL_ID", 1))
+EMPLOYEES = int(os.environ.get("LOAD_EMPLOYEES", 500))
+ADMIN_USERNAME = os.environ.get("LOAD_ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.environ.get("LOAD_ADMIN_PASSWORD", "admin123")
+
+UIDS = [f"LOADUID{i:04d}" for i in range(EMPLOYEES)]
+
+# Працівники по колу: один і той самий бейдж повторюється не частіше,
+# ніж раз на EMPLOYEES сканів (як у черзі на прохідній)
+_next_uid = itertools.cycle(UIDS)
+_user_ids = itertools.count(1)
+
+
+@events.test_start.add_listener
+def seed_employees(environment, **kwargs):
+    """Створює тестових працівників (існуючі UID сервер відхиляє — це нормально)."""
+    host = environment.host
+    resp = requests.post(
+        f"{host}/api/auth/login",
+        json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD},
+        timeout=10,
+    )
+    if resp.status_code != 200:
+        print(f"Seed skipped: admin login failed ({resp.status_code})")
+        return
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    created = 0
+    with requests.Session() as s:
+        for i, uid in enumerate(UIDS):
+            r = s.post(
+                f"{host}/api/employees/",
+                json={"full_name": f"Навантаження {i:04d}", "nfc_uid": uid},
+                headers=headers,
+                timeout=10,
+            )
+            created += r.status_code == 201
+    print(f"Seed: {created} new employees, {EMPLOYEES - created} already present")
+
+
+class ShiftStartTerminal(HttpUser):
+    """Термінал на прохідній: скани йдуть один за одним з мінімальною паузою."""
+    wait_time = between(0.05, 0.2)
+
+    def on_start(self):
+        n = next(_user_ids)
+        self.headers = {
+            "X-Terminal-Key": TERMINAL_KEY,
+            "X-Forwarded-For": f"10.77.{n // 250}.{n % 250 + 1}",
+        }
+
+    @task
+    def scan(self):
+        with self.client.post(
+            "/api/terminal/scan",
+            json={
+                "uid": next(_next_uid),
+                "terminal_id": TERMINAL_ID,
+                "direction": "IN",
+                "ts": int(time.time() * 1000),
+                "scan_id": uuid.uuid4().hex,
+            },
+            headers=self.headers,
+            catch_response=True,
+            name="/api/terminal/scan",
+        ) as resp:
+            if resp.status_code == 200:
+                resp.success()
+            else:
+                resp.failure(f"Scan error: {resp.status_code} — {resp.text[:200]}")
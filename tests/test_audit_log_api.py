@@ -0,0 +1,156 @@
+"""
+Тести GET /api/audit/log (app/api/routes/audit_log.py).
+
+Перевіряють:
+- cursor-пагінація по (created_at, id): обхід усіх сторінок без дублікатів
+  і пропусків, зокрема серед записів з однаковим created_at
+- записи з NULL created_at: cursor на межі сторінки не падає, обхід
+  доходить до них
+- некоректний cursor → 400
+- count=none / count=estimate: форма відповіді, оцінка з верхньою межею
+- фільтр адміністратора: префіксний і точний збіг, екранування % і _
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.routes import audit_log as audit_routes
+from app.models.audit_log import AuditLog
+
+T0 = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def env(make_app_env):
+    return make_app_env()
+
+
+def _add(Session, rows):
+    """rows: (admin_username, action, хвилин від T0)."""
+    with Session() as db:
+        for username, action, minutes in rows:
+            db.add(AuditLog(
+                admin_username=username, action=action, created_at=T0 + timedelta(minutes=minutes),
+            ))
+        db.commit()
+        return [(r.created_at, r.id) for r in db.query(AuditLog).all()]
+
+
+def _log(client, **params):
+    r = client.get("/api/audit/log", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+class TestCursor:
+    def test_round_trip_without_duplicates_or_gaps(self, env):
+        # Три записи з однаковим created_at потрапляють на межу сторінок
+        keys = _add(env["Session"], [
+            ("admin", "a", 0), ("admin", "a", 5), ("admin", "a", 5), ("admin", "a", 5),
+            ("admin", "a", 7), ("admin", "a", 9), ("admin", "a", 9),
+        ])
+        expected = [row_id for _, row_id in sorted(keys, reverse=True)]
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 2, "count": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            page = _log(env["client"], **params)
+            seen += [e["id"] for e in page["entries"]]
+            pages += 1
+            cursor = page["next_cursor"]
+            assert page["has_more"] is (cursor is not None)
+            if cursor is None:
+                break
+
+        assert seen == expected
+        assert pages == 4
+
+    def test_null_created_at(self, make_app_env, monkeypatch):
+        # Схема як після міграцій поза MySQL: NOT NULL додає лише 004 (MySQL)
+        monkeypatch.setattr(AuditLog.__table__.c.created_at, "nullable", True)
+        env = make_app_env()
+        _add(env["Session"], [("admin", "a", 0), ("admin", "a", 1)])
+        with env["Session"]() as db:
+            db.add_all([AuditLog(admin_username="admin", action="legacy") for _ in range(3)])
+            db.flush()
+            db.query(AuditLog).filter(AuditLog.action == "legacy").update({AuditLog.created_at: None})
+            db.commit()
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, "count": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            page = _log(env["client"], **params)
+            seen += [e["action"] for e in page["entries"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == ["a", "a", "legacy", "legacy", "legacy"]
+
+    def test_cursor_ignores_offset(self, env):
+        _add(env["Session"], [("admin", "a", m) for m in range(4)])
+        first = _log(env["client"], limit=2)
+        second = _log(env["client"], limit=2, offset=100, cursor=first["next_cursor"])
+        assert len(second["entries"]) == 2
+        assert second["offset"] == 0
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "Zm9v", "MjAyNi0wMy0wMnx4"])
+    def test_malformed_cursor(self, env, cursor):
+        r = env["client"].get("/api/audit/log", params={"cursor": cursor})
+        assert r.status_code == 400
+        assert r.json()["detail"] == "Невірний cursor"
+
+
+class TestCount:
+    def test_exact(self, env):
+        _add(env["Session"], [("admin", "a", m) for m in range(5)])
+        page = _log(env["client"], limit=2)
+        assert (page["total"], page["total_is_estimate"]) == (5, False)
+
+    def test_none(self, env):
+        _add(env["Session"], [("admin", "a", m) for m in range(3)])
+        page = _log(env["client"], limit=2, count="none")
+        assert page["total"] is None
+        assert page["total_is_estimate"] is False
+        assert len(page["entries"]) == 2 and page["has_more"] is True
+
+    def test_estimate_capped(self, env, monkeypatch):
+        monkeypatch.setattr(audit_routes, "ESTIMATE_COUNT_CAP", 3)
+        _add(env["Session"], [("admin", "a", m) for m in range(5)])
+        page = _log(env["client"], limit=2, count="estimate")
+        assert (page["total"], page["total_is_estimate"]) == (3, True)
+
+    def test_estimate_below_cap_is_exact(self, env):
+        _add(env["Session"], [("admin", "a", 0), ("boss", "b", 1)])
+        page = _log(env["client"], count="estimate", action="b")
+        assert (page["total"], page["total_is_estimate"]) == (1, False)
+
+    def test_invalid_mode(self, env):
+        r = env["client"].get("/api/audit/log", params={"count": "all"})
+        assert r.status_code == 422
+
+
+class TestAdminMatch:
+    @pytest.fixture(autouse=True)
+    def rows(self, env):
+        _add(env["Session"], [
+            ("admin", "a", 0), ("admin2", "a", 1), ("administrator", "a", 2),
+            ("boss", "a", 3), ("ad_min", "a", 4), ("ad%x", "a", 5),
+        ])
+
+    def _admins(self, env, **params):
+        return sorted(e["admin"] for e in _log(env["client"], **params)["entries"])
+
+    def test_prefix_is_default(self, env):
+        assert self._admins(env, admin_username="admin") == ["admin", "admin2", "administrator"]
+
+    def test_exact(self, env):
+        assert self._admins(env, admin_username="admin", admin_match="exact") == ["admin"]
+
+    def test_prefix_escapes_wildcards(self, env):
+        assert self._admins(env, admin_username="ad_") == ["ad_min"]
+        assert self._admins(env, admin_username="ad%") == ["ad%x"]
@@ -0,0 +1,106 @@
+"""
+Юніт-тести для фонового writer'а в app/security/audit.py
+
+Перевіряють:
+- без запущеного writer'а запис іде синхронно (як раніше)
+- з writer'ом записи з черги пишуться пакетами, stop_writer() дописує все
+- розмір пакета обмежений AUDIT_BATCH_SIZE
+- помилка БД → записи потрапляють у spill-файл
+- переповнена черга → spill замість блокування запиту
+"""
+import json
+import queue
+from datetime import datetime, timezone
+
+import pytest
+
+import app.security.audit as audit
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def clean_writer(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "audit_spill_path", str(tmp_path / "spill.jsonl"))
+    monkeypatch.setattr(settings, "audit_flush_interval_ms", 50)
+    audit.stop_writer()
+    audit._drain(10**6)
+    yield
+    audit.stop_writer()
+    audit._drain(10**6)
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    written: list[list[dict]] = []
+    monkeypatch.setattr(audit, "_write_batch", lambda rows: written.append(list(rows)))
+    return written
+
+
+def _spilled() -> list[dict]:
+    with open(settings.audit_spill_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestSyncFallback:
+    def test_without_writer_writes_synchronously(self, monkeypatch, batches):
+        sync = []
+        monkeypatch.setattr(audit, "_write_sync", lambda row, db: sync.append(row))
+        audit.audit_log("admin_login", "admin")
+        assert [r["action"] for r in sync] == ["admin_login"]
+        assert batches == []
+
+
+class TestBackgroundWriter:
+    def test_entries_are_batched_and_flushed_on_stop(self, batches):
+        audit.start_writer()
+        for i in range(5):
+            audit.audit_log("employee_update", "admin", entity_id=i)
+        audit.stop_writer()
+        rows = [r for b in batches for r in b]
+        assert [r["entity_id"] for r in rows] == [0, 1, 2, 3, 4]
+        assert len(batches) < 5
+
+    def test_batch_size_limit(self, monkeypatch, batches):
+        monkeypatch.setattr(settings, "audit_batch_size", 2)
+        for i in range(5):
+            audit._queue.put_nowait({"entity_id": i})
+        audit.start_writer()
+        audit.stop_writer()
+        assert sum(len(b) for b in batches) == 5
+        assert max(len(b) for b in batches) <= 2
+
+    def test_full_queue_spills(self, monkeypatch, batches):
+        monkeypatch.setattr(audit, "_queue", queue.Queue(maxsize=1))
+        monkeypatch.setattr(audit, "_writer", object())  # "запущений", але не читає
+        audit.audit_log("user_create", "admin")
+        audit.audit_log("user_delete", "admin")
+        assert [r["action"] for r in _spilled()] == ["user_delete"]
+        monkeypatch.setattr(audit, "_writer", None)
+
+
+class BrokenSession:
+    def _fail(self, *a, **kw):
+        raise RuntimeError("db down")
+
+    add = execute = commit = _fail
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestSpill:
+    def test_db_failure_spills_batch(self, monkeypatch):
+        monkeypatch.setattr(audit, "SessionLocal", BrokenSession)
+        audit.audit_log("terminal_create", "admin", details={"name": "Каса 1"})
+        rows = _spilled()
+        assert rows[0]["action"] == "terminal_create"
+        assert json.loads(rows[0]["details"]) == {"name": "Каса 1"}
+
+    def test_write_batch_failure_spills_all(self, monkeypatch):
+        monkeypatch.setattr(audit, "SessionLocal", BrokenSession)
+        now = datetime.now(timezone.utc)
+        audit._write_batch([{"action": "a", "created_at": now}, {"action": "b", "created_at": now}])
+        assert [r["action"] for r in _spilled()] == ["a", "b"]
@@ -0,0 +1,108 @@
+"""
+Юніт-тести для app/services/employee_search.py
+
+Перевіряють:
+- нормалізацію: регістр, апострофи, транслітерацію кирилиці
+- пошук кирилицею і латиницею, по посаді та NFC UID
+- ранжування: точний збіг > префікс > підрядок > схожість (одруківки)
+- оновлення індексу (upsert / remove) і застарівання по TTL
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.employee_search as es
+from app.core.config import settings
+
+
+def _emp(emp_id, full_name, position=None, nfc_uid=None, is_active=True):
+    return SimpleNamespace(id=emp_id, full_name=full_name, position=position,
+                           nfc_uid=nfc_uid, is_active=is_active)
+
+
+@pytest.fixture
+def idx():
+    index = es.EmployeeSearchIndex()
+    for emp in [
+        _emp(1, "Іваненко Іван", "Кухар", "04:A1:B2:C3"),
+        _emp(2, "Петренко Петро", "Офіціант", "04:FF:00:11"),
+        _emp(3, "Ivanov Oleg", "Бармен", "AA:BB:CC:DD"),
+        _emp(4, "Мар'яна Коваль", "Кухар", None, is_active=False),
+        _emp(5, "Іванна Шевчук", None, None),
+    ]:
+        index.upsert(emp)
+    return index
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+class TestNormalize:
+    def test_casefold_and_translit(self):
+        assert es.normalize("Іваненко ІВАН") == "ivanenko ivan"
+
+    def test_apostrophe_dropped(self):
+        assert es.normalize("Мар'яна") == es.normalize("Марʼяна") == "mariana"
+
+    def test_russian_letters(self):
+        assert es.normalize("Иван") == "yvan"
+
+    def test_separators_collapsed(self):
+        assert es.normalize("04:A1-b2") == "04 a1 b2"
+
+
+class TestSearch:
+    def test_cyrillic_query(self, idx):
+        assert _ids(idx.search("Петр")) == [2]
+
+    def test_latin_query_finds_cyrillic_name(self, idx):
+        assert _ids(idx.search("petrenko")) == [2]
+
+    def test_position(self, idx):
+        assert set(_ids(idx.search("кухар"))) == {1, 4}
+
+    def test_uid_with_and_without_separators(self, idx):
+        assert _ids(idx.search("04:A1")) == [1]
+        assert _ids(idx.search("04a1b2")) == [1]
+
+    def test_all_tokens_must_match(self, idx):
+        assert _ids(idx.search("іван кухар")) == [1]
+
+    def test_exact_ranked_above_prefix(self, idx):
+        # "ivan": точний токен у №1, префікс у №3 (ivanov) і №5 (ivanna)
+        assert _ids(idx.search("ivan"))[0] == 1
+
+    def test_inactive_ranked_below_active(self, idx):
+        assert _ids(idx.search("кухар")) == [1, 4]
+
+    def test_substring(self, idx):
+        assert _ids(idx.search("ренко")) == [2]
+
+    def test_typo_tolerance(self, idx):
+        assert 2 in _ids(idx.search("petrenco"))
+
+    def test_empty_query_lists_by_name(self, idx):
+        assert _ids(idx.search("", limit=2)) == [1, 5]
+
+    def test_limit(self, idx):
+        assert len(idx.search("і", limit=1)) == 1
+
+
+class TestMaintenance:
+    def test_upsert_replaces_old_tokens(self, idx):
+        idx.upsert(_emp(2, "Сидоренко Петро", "Офіціант", "04:FF:00:11"))
+        assert _ids(idx.search("петренко")) == []
+        assert _ids(idx.search("сидор")) == [2]
+
+    def test_remove(self, idx):
+        idx.remove(3)
+        assert 3 not in _ids(idx.search("ivan"))
+
+    def test_staleness(self, idx, monkeypatch):
+        assert idx.is_stale()  # ще жодного build()
+        idx.built_at = es.time.monotonic()
+        monkeypatch.setattr(settings, "search_index_ttl_seconds", 300)
+        assert not idx.is_stale()
+        monkeypatch.setattr(es.time, "monotonic", lambda: idx.built_at + 301)
+        assert idx.is_stale()
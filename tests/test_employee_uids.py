@@ -0,0 +1,267 @@
+"""
+Тести мапи UID → працівник app/services/employee_uids.py.
+
+Перевіряють:
+- скан після завантаження мапи не читає employees
+- UID, якого немає в мапі, шукається в БД один раз і потрапляє в мапу
+- bump() в іншому воркері → мапа перебудовується після перевірки версії;
+  до перевірки (EMPLOYEE_UID_CACHE_CHECK_SECONDS) воркер не ходить у БД
+- UID, збережений в іншому регістрі чи з пробілами, знаходиться і з мапи,
+  і запитом до БД, і не потрапляє в кеш невідомих; API зберігає UID
+  нормалізованим
+- зміна UID прибирає старий ключ; створення/редагування через API та
+  first-scan оновлюють мапу і версію
+- first-scan не перезаписує ключ, зареєстрований іншим воркером
+- невідомий UID: повторні скани відхиляються з пам'яті до кінця TTL,
+  створення працівника з цим UID (і в іншому воркері — після перевірки
+  версії) або перезавантаження мапи скидає запис
+- first-scan з невідомим UID не робить діагностичного SELECT
+- лічильник terminal_unknown_uid_total обмежений за кількістю міток uid
+"""
+import time
+from dataclasses import replace
+
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.cache_version import CacheVersion
+from app.models.employee import Employee
+from app.models.terminal import Terminal
+from app.services import employee_uids
+
+
+def _seed(db):
+    db.add(Terminal(id=1, name="t1", api_key="k1"))
+    db.add(Employee(id=1, full_name="Анна", nfc_uid="AAA", position="Касир"))
+
+
+@pytest.fixture
+def env(make_app_env, monkeypatch):
+    monkeypatch.setattr(settings, "employee_uid_cache_check_seconds", 60)
+    env = make_app_env(_seed, statements=True)
+    metrics.reset()
+    with env["Session"]() as db:
+        employee_uids.load(db)
+    return env
+
+
+def _employee_selects(statements):
+    return [s for s in statements if "FROM employees" in s]
+
+
+def _version(Session):
+    with Session() as db:
+        return db.query(CacheVersion.version).filter(CacheVersion.name == "employees").scalar()
+
+
+class TestLookup:
+    def test_scan_does_not_read_employees(self, env):
+        env["statements"].clear()
+        r = env["client"].post("/api/terminal/scan", json={
+            "uid": " aaa ", "terminal_id": 1, "direction": "IN", "ts": int(time.time() * 1000),
+        })
+        assert r.status_code == 200, r.text
+        assert r.json()["employee_id"] == 1
+        assert _employee_selects(env["statements"]) == []
+        assert employee_uids.LOOKUPS.get(result="memory") >= 1
+
+    def test_miss_falls_back_to_db_once(self, env):
+        with env["Session"]() as db:
+            db.add(Employee(id=2, full_name="Богдан", nfc_uid="BBB"))  # повз bump()
+            db.commit()
+            env["statements"].clear()
+            assert employee_uids.lookup(db, "bbb").id == 2
+            assert employee_uids.lookup(db, "BBB").id == 2
+            assert employee_uids.lookup(db, "ZZZ") is None
+        assert len(_employee_selects(env["statements"])) == 2  # BBB один раз, ZZZ
+
+    def test_version_bump_from_other_worker_reloads(self, env, monkeypatch):
+        with env["Session"]() as db:
+            db.query(Employee).filter(Employee.id == 1).update({Employee.full_name: "Анна Коваль"})
+            employee_uids.bump(db)
+            db.commit()
+
+            # До перевірки версії мапа (обмежено) застаріла і БД не читається
+            env["statements"].clear()
+            assert employee_uids.lookup(db, "AAA").full_name == "Анна"
+            assert env["statements"] == []
+
+            monkeypatch.setattr(settings, "employee_uid_cache_check_seconds", 0)
+            assert employee_uids.lookup(db, "AAA").full_name == "Анна Коваль"
+
+    def test_unchanged_version_keeps_map(self, env, monkeypatch):
+        monkeypatch.setattr(settings, "employee_uid_cache_check_seconds", 0)
+        with env["Session"]() as db:
+            env["statements"].clear()
+            assert employee_uids.lookup(db, "AAA").id == 1
+        # лише SELECT версії за первинним ключем
+        assert len(env["statements"]) == 1
+        assert "cache_versions" in env["statements"][0]
+
+    def test_upsert_uid_change_drops_old_key(self, env):
+        with env["Session"]() as db:
+            ref = employee_uids.lookup(db, "AAA")
+        employee_uids.upsert(replace(ref, nfc_uid="CCC"))
+        assert employee_uids.size() == 1
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "CCC").id == 1
+
+    def test_mixed_case_stored_uid_in_map(self, env):
+        with env["Session"]() as db:
+            db.add(Employee(id=2, full_name="Богдан", nfc_uid=" abC1 "))
+            db.commit()
+            employee_uids.load(db)
+            env["statements"].clear()
+            assert employee_uids.lookup(db, "ABC1").id == 2
+        assert _employee_selects(env["statements"]) == []
+
+    def test_mixed_case_stored_uid_db_fallback(self, env):
+        with env["Session"]() as db:
+            db.add(Employee(id=2, full_name="Богдан", nfc_uid=" abC1 "))  # повз bump()
+            db.commit()
+        r = _scan(env["client"], "ABC1")
+        assert r.status_code == 200, r.text
+        assert r.json()["employee_id"] == 2
+        assert employee_uids.unknown_size() == 0
+        assert employee_uids.LOOKUPS.get(result="db") == 1
+        # Далі — з мапи, під нормалізованим ключем
+        env["statements"].clear()
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "abc1").id == 2
+        assert _employee_selects(env["statements"]) == []
+
+
+class TestInvalidation:
+    def test_create_and_update_via_api(self, env):
+        c = env["client"]
+        r = c.post("/api/employees/", json={"full_name": "Віра", "nfc_uid": "VVV"})
+        assert r.status_code == 201, r.text
+        emp_id = r.json()["id"]
+        assert _version(env["Session"]) == 1
+
+        r = c.patch(f"/api/employees/{emp_id}", json={"nfc_uid": "VVV2", "position": "Кухар"})
+        assert r.status_code == 200, r.text
+        assert _version(env["Session"]) == 2
+
+        env["statements"].clear()
+        with env["Session"]() as db:
+            ref = employee_uids.lookup(db, "VVV2")
+            assert (ref.id, ref.position) == (emp_id, "Кухар")
+        assert _employee_selects(env["statements"]) == []
+
+    def test_api_normalizes_uid(self, env):
+        c = env["client"]
+        r = c.post("/api/employees/", json={"full_name": "Віра", "nfc_uid": " vvv "})
+        assert r.status_code == 201, r.text
+        emp_id = r.json()["id"]
+        assert r.json()["nfc_uid"] == "VVV"
+        assert c.post("/api/employees/", json={"full_name": "Інша", "nfc_uid": "Vvv"}).status_code == 409
+
+        r = c.patch(f"/api/employees/{emp_id}", json={"nfc_uid": "vvv2"})
+        assert r.status_code == 200, r.text
+        with env["Session"]() as db:
+            assert db.get(Employee, emp_id).nfc_uid == "VVV2"
+        assert _scan(env["client"], "VVV2").json()["employee_id"] == emp_id
+
+    def test_terminal_registration(self, env):
+        r = env["client"].post("/api/terminal/register", json={
+            "uid": "rrr", "full_name": "Роман", "created_by_terminal_id": 1,
+        })
+        assert r.status_code == 200, r.text
+        assert _version(env["Session"]) == 1
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "RRR").full_name == "Роман"
+
+    def test_first_scan_saves_key_once(self, env):
+        c = env["client"]
+        body = {"employee_uid": "AAA", "terminal_id": "1", "public_key_b64": " pk1 "}
+        assert c.post("/api/register/first-scan", json=body).status_code == 200
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "AAA").public_key_b64 == "pk1"
+            assert db.get(Employee, 1).public_key_b64 == "pk1"
+        assert c.post("/api/register/first-scan", json={**body, "public_key_b64": "pk2"}).status_code == 400
+
+    def test_first_scan_with_stale_map_keeps_existing_key(self, env):
+        # Ключ зареєстровано через інший воркер; ця мапа ще не бачить його
+        with env["Session"]() as db:
+            db.query(Employee).filter(Employee.id == 1).update({Employee.public_key_b64: "other"})
+            db.commit()
+        r = env["client"].post("/api/register/first-scan", json={
+            "employee_uid": "AAA", "terminal_id": "1", "public_key_b64": "mine",
+        })
+        assert r.status_code == 400
+        with env["Session"]() as db:
+            assert db.get(Employee, 1).public_key_b64 == "other"
+
+
+def _scan(client, uid):
+    return client.post("/api/terminal/scan", json={
+        "uid": uid, "terminal_id": 1, "direction": "IN", "ts": int(time.time() * 1000),
+    })
+
+
+class TestUnknownUids:
+    def test_repeated_unknown_rejected_from_memory(self, env):
+        assert _scan(env["client"], "XXX").status_code == 400
+        env["statements"].clear()
+        for _ in range(3):
+            r = _scan(env["client"], "xxx")
+            assert r.status_code == 400
+            assert r.json()["detail"] == "Unknown UID (employee not registered)"
+        # лише перевірка терміналу — ні employees, ні terminal_scan_ids
+        assert _employee_selects(env["statements"]) == []
+        assert all("FROM terminals" in sql for sql in env["statements"])
+        assert employee_uids.UNKNOWN.get(uid="XXX") == 4
+        assert employee_uids.LOOKUPS.get(result="unknown_cached") == 3
+
+    def test_entry_expires(self, env, monkeypatch):
+        monkeypatch.setattr(settings, "unknown_uid_cache_ttl_seconds", 0.05)
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "XXX") is None
+            assert employee_uids.is_unknown(db, "XXX")
+            time.sleep(0.1)
+            assert not employee_uids.is_unknown(db, "XXX")
+
+    def test_created_employee_drops_entry(self, env):
+        assert _scan(env["client"], "NEW1").status_code == 400
+        r = env["client"].post("/api/employees/", json={"full_name": "Новий", "nfc_uid": "NEW1"})
+        assert r.status_code == 201, r.text
+        assert employee_uids.unknown_size() == 0
+        assert _scan(env["client"], "NEW1").status_code == 200
+
+    def test_created_by_other_worker_drops_entry(self, env, monkeypatch):
+        assert _scan(env["client"], "NEW2").status_code == 400
+        # Інший воркер: запис повз API цього процесу, лише bump() версії
+        with env["Session"]() as db:
+            db.add(Employee(id=5, full_name="Нова", nfc_uid="NEW2"))
+            employee_uids.bump(db)
+            db.commit()
+        monkeypatch.setattr(settings, "employee_uid_cache_check_seconds", 0)
+        r = _scan(env["client"], "NEW2")
+        assert r.status_code == 200, r.text
+        assert r.json()["employee_id"] == 5
+
+    def test_reload_clears_negative_cache(self, env):
+        with env["Session"]() as db:
+            assert employee_uids.lookup(db, "XXX") is None
+            assert employee_uids.unknown_size() == 1
+            employee_uids.load(db)
+        assert employee_uids.unknown_size() == 0
+
+    def test_first_scan_unknown_has_no_sampling_query(self, env):
+        env["statements"].clear()
+        r = env["client"].post("/api/register/first-scan", json={
+            "employee_uid": "XXX", "terminal_id": "1", "public_key_b64": "pk",
+        })
+        assert r.status_code == 404
+        assert len(_employee_selects(env["statements"])) == 1
+        assert not any("LIMIT" in sql for sql in env["statements"])
+
+    def test_per_uid_labels_bounded(self, env, monkeypatch):
+        monkeypatch.setattr(settings, "unknown_uid_metrics_max_uids", 2)
+        with env["Session"]() as db:
+            employee_uids.lookup_many(db, ["U1", "U2", "U3", "U4"])
+        labels = [key[0] for key, _ in employee_uids.UNKNOWN.snapshot()["values"]]
+        assert len(labels) == 3 and "other" in labels
+        assert employee_uids.UNKNOWN.get(uid="other") == 2
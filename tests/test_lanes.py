@@ -0,0 +1,174 @@
+"""
+Юніт-тести для app/api/lanes.py
+
+Перевіряють:
+- ліміт смуги: не більше <lane>_concurrency_limit обробників одночасно
+- запити іншої смуги не чекають, поки reports насичена
+- контроль допуску: повна черга, таймаут черги, насичений threadpool → 503
+  з Retry-After; terminal при насиченому threadpool не відкидається
+- get_db бере сесію з пулу смуги запиту
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+
+from app.api import lanes
+from app.core import metrics, threadpool
+from app.core.config import settings
+from app.db import session as db_session
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    threadpool.reset()
+    metrics.reset()
+    yield
+    threadpool.reset()
+    metrics.reset()
+
+
+def _make_app(state, sleep=0.1):
+    api = FastAPI()
+    reports = APIRouter()
+    terminal = APIRouter()
+
+    @reports.get("/report")
+    def report():
+        with state["lock"]:
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+        time.sleep(sleep)
+        with state["lock"]:
+            state["running"] -= 1
+        return {"ok": True}
+
+    @terminal.get("/scan")
+    def scan():
+        return {"ok": True}
+
+    api.include_router(reports, dependencies=[Depends(lanes.lane("reports"))])
+    api.include_router(terminal, dependencies=[Depends(lanes.lane("terminal"))])
+    return api
+
+
+def _state():
+    return {"lock": threading.Lock(), "running": 0, "max": 0}
+
+
+def _client(api):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://t")
+
+
+class TestConcurrency:
+    def test_capped(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 2)
+        monkeypatch.setattr(settings, "reports_queue_max", 0)
+        state = _state()
+
+        async def scenario():
+            async with _client(_make_app(state)) as c:
+                results = await asyncio.gather(*(c.get("/report") for _ in range(6)))
+            return [r.status_code for r in results]
+
+        assert asyncio.run(scenario()) == [200] * 6
+        assert state["max"] == 2
+
+    def test_terminal_not_blocked_by_reports(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 1)
+        monkeypatch.setattr(settings, "reports_queue_max", 0)
+        state = _state()
+
+        async def scenario():
+            async with _client(_make_app(state)) as c:
+                reports = [asyncio.create_task(c.get("/report")) for _ in range(4)]
+                await asyncio.sleep(0.05)
+                started = time.perf_counter()
+                r = await c.get("/scan")
+                scan_s = time.perf_counter() - started
+                await asyncio.gather(*reports)
+            return r.status_code, scan_s
+
+        status, scan_s = asyncio.run(scenario())
+        # 4 звіти по 0.1 с послідовно ≈ 0.4 с; скан не стоїть у їхній черзі
+        assert status == 200 and scan_s < 0.1
+
+
+class TestAdmission:
+    def test_queue_full(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 1)
+        monkeypatch.setattr(settings, "reports_queue_max", 1)
+        state = _state()
+
+        async def scenario():
+            async with _client(_make_app(state, sleep=0.2)) as c:
+                results = await asyncio.gather(*(c.get("/report") for _ in range(4)))
+            return results
+
+        results = asyncio.run(scenario())
+        codes = sorted(r.status_code for r in results)
+        assert codes == [200, 200, 503, 503]
+        shed = [r for r in results if r.status_code == 503]
+        assert shed[0].headers["retry-after"] == str(lanes.RETRY_AFTER_SECONDS)
+        assert lanes.SHED.get(lane="reports", reason="queue_full") == 2
+
+    def test_queue_timeout(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 1)
+        monkeypatch.setattr(settings, "reports_queue_max", 0)
+        monkeypatch.setattr(settings, "lane_queue_timeout_seconds", 0.05)
+        state = _state()
+
+        async def scenario():
+            async with _client(_make_app(state, sleep=0.3)) as c:
+                return await asyncio.gather(c.get("/report"), c.get("/report"))
+
+        codes = sorted(r.status_code for r in asyncio.run(scenario()))
+        assert codes == [200, 503]
+        assert lanes.SHED.get(lane="reports", reason="queue_timeout") == 1
+
+    def test_reports_shed_when_threadpool_saturated(self, monkeypatch):
+        monkeypatch.setattr(threadpool, "default_waiting", lambda: 3)
+
+        async def scenario():
+            async with _client(_make_app(_state())) as c:
+                return (await c.get("/report")).status_code, (await c.get("/scan")).status_code
+
+        assert asyncio.run(scenario()) == (503, 200)
+        assert lanes.SHED.get(lane="reports", reason="threadpool_saturated") == 1
+
+
+class TestSessionLane:
+    def test_get_db_uses_lane_factory(self, monkeypatch):
+        used = []
+
+        class _Session:
+            def __init__(self, lane):
+                used.append(lane)
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(db_session, "_session_factories", {
+            lane: (lambda lane=lane: _Session(lane)) for lane in db_session.LANES
+        })
+
+        api = FastAPI()
+        router = APIRouter()
+
+        @router.get("/x")
+        def x(db=Depends(db_session.get_db)):
+            return {"ok": True}
+
+        api.include_router(router, prefix="/t", dependencies=[Depends(lanes.lane("terminal"))])
+        api.include_router(router, prefix="/d")
+
+        async def scenario():
+            async with _client(api) as c:
+                await c.get("/t/x")
+                await c.get("/d/x")
+
+        asyncio.run(scenario())
+        assert used == ["terminal", db_session.DEFAULT_LANE]
@@ -0,0 +1,50 @@
+"""
+Юніт-тести для app/api/listing.py
+
+Перевіряють:
+- fields= проєкцію: порядок, дублікати, невідомі поля → 400
+- серіалізацію datetime / Enum однаково з orjson і без нього
+"""
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import app.api.listing as listing
+from app.models.user import UserRole
+
+
+class TestParseFields:
+    def test_empty_means_all(self):
+        assert listing.parse_fields(None, ["id", "name"]) == ["id", "name"]
+
+    def test_projection_keeps_order_and_dedups(self):
+        assert listing.parse_fields("name, id,name", ["id", "name"]) == ["name", "id"]
+
+    def test_unknown_field(self):
+        with pytest.raises(HTTPException) as exc:
+            listing.parse_fields("id,secret", ["id", "name"])
+        assert exc.value.status_code == 400
+
+
+class TestDumps:
+    ROW = {
+        "ts": datetime(2026, 1, 5, 8, 30, tzinfo=timezone.utc),
+        "naive": datetime(2026, 1, 5, 8, 30, 0, 123456),
+        "role": UserRole.ADMIN,
+        "name": "Кухар",
+    }
+    EXPECTED = {
+        "ts": "2026-01-05T08:30:00+00:00",
+        "naive": "2026-01-05T08:30:00.123456",
+        "role": "admin",
+        "name": "Кухар",
+    }
+
+    def test_default_backend(self):
+        assert json.loads(listing.dumps(self.ROW)) == self.EXPECTED
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(listing, "orjson", None)
+        assert json.loads(listing.dumps(self.ROW)) == self.EXPECTED
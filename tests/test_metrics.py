@@ -0,0 +1,154 @@
+"""
+Юніт-тести для app/core/metrics.py
+
+Перевіряють:
+- Counter / Gauge / Histogram і перевірку набору міток
+- gauge з callback (рахується в момент scrape)
+- текстовий формат Prometheus: HELP/TYPE, кумулятивні бакети, +Inf
+- злиття знімків воркерів: лічильники сумуються (і від завершених
+  воркерів), gauge — лише живі, режим max
+- multiprocess-режим через каталог зі знімками
+- middleware: гістограма латентності по шаблону маршруту
+"""
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestTypes:
+    def test_counter(self):
+        c = metrics.counter("test_things_total", "Things.", ("kind",))
+        c.inc(kind="a")
+        c.inc(2, kind="a")
+        assert c.get(kind="a") == 3
+        assert c.get(kind="b") == 0
+
+    def test_register_is_idempotent(self):
+        assert metrics.counter("test_same_total", "x") is metrics.counter("test_same_total", "x")
+        with pytest.raises(ValueError):
+            metrics.gauge("test_same_total", "x")
+
+    def test_wrong_labels(self):
+        c = metrics.counter("test_labels_total", "x", ("a",))
+        with pytest.raises(ValueError):
+            c.inc(b="1")
+
+    def test_gauge(self):
+        g = metrics.gauge("test_level", "x")
+        g.set(5)
+        g.dec(2)
+        assert g.get() == 3
+        g.set_max(1)
+        assert g.get() == 3
+
+    def test_gauge_callback(self):
+        box = {"n": 4}
+        metrics.gauge("test_cb", "x", callback=lambda: box["n"])
+        box["n"] = 7
+        assert "test_cb 7" in metrics.render()
+
+    def test_histogram(self):
+        h = metrics.histogram("test_latency_seconds", "x", buckets=(0.1, 1.0))
+        for v in (0.05, 0.5, 0.7, 3.0):
+            h.observe(v)
+        assert h.get() == (4, 4.25)
+        out = metrics.render()
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in out
+        assert 'test_latency_seconds_bucket{le="1"} 3' in out
+        assert 'test_latency_seconds_bucket{le="+Inf"} 4' in out
+        assert "test_latency_seconds_count 4" in out
+
+
+class TestRender:
+    def test_help_type_and_escaping(self):
+        c = metrics.counter("test_escaped_total", "Escaping.", ("q",))
+        c.inc(q='say "hi"')
+        out = metrics.render()
+        assert "# HELP test_escaped_total Escaping." in out
+        assert "# TYPE test_escaped_total counter" in out
+        assert 'test_escaped_total{q="say \\"hi\\""} 1' in out
+
+
+def _snap(kind, values, **extra):
+    return {"m": {"type": kind, "help": "x", "labels": ["k"], "values": values, **extra}}
+
+
+class TestMerge:
+    def test_counters_summed_including_dead_workers(self):
+        merged = metrics.merge([
+            (True, _snap("counter", [[["a"], 2.0]])),
+            (False, _snap("counter", [[["a"], 3.0], [["b"], 1.0]])),
+        ])
+        assert merged["m"]["values"] == {("a",): 5.0, ("b",): 1.0}
+
+    def test_gauges_only_live_workers(self):
+        merged = metrics.merge([
+            (True, _snap("gauge", [[["a"], 2.0]], mode="sum")),
+            (True, _snap("gauge", [[["a"], 4.0]], mode="sum")),
+            (False, _snap("gauge", [[["a"], 100.0]], mode="sum")),
+        ])
+        assert merged["m"]["values"] == {("a",): 6.0}
+
+    def test_gauge_max_mode(self):
+        merged = metrics.merge([
+            (True, _snap("gauge", [[["a"], 2.0]], mode="max")),
+            (True, _snap("gauge", [[["a"], 4.0]], mode="max")),
+        ])
+        assert merged["m"]["values"] == {("a",): 4.0}
+
+    def test_histograms_summed(self):
+        merged = metrics.merge([
+            (True, _snap("histogram", [[["a"], [[1, 0], 0.5, 1]]], buckets=[1.0])),
+            (True, _snap("histogram", [[["a"], [[0, 2], 6.0, 2]]], buckets=[1.0])),
+        ])
+        assert merged["m"]["values"] == {("a",): [[1, 2], 6.5, 3]}
+
+
+class TestMultiprocess:
+    def test_scrape_merges_snapshot_files(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+        c = metrics.counter("test_mp_total", "x")
+        c.inc(2)
+        # Знімок іншого воркера, який уже завершився (pid не існує)
+        other = {"test_mp_total": {"type": "counter", "help": "x", "labels": [], "values": [[[], 5.0]]}}
+        (tmp_path / "metrics-999999999.json").write_text(json.dumps(other))
+
+        assert "test_mp_total 7" in metrics.render()
+        assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+
+    def test_broken_file_skipped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+        (tmp_path / "metrics-1.json").write_text("{not json")
+        metrics.counter("test_mp2_total", "x").inc()
+        assert "test_mp2_total 1" in metrics.render()
+
+
+class TestMiddleware:
+    def test_latency_by_route_template(self):
+        api = FastAPI()
+        api.add_middleware(metrics.MetricsMiddleware)
+
+        @api.get("/things/{thing_id}")
+        def thing(thing_id: int):
+            return {"id": thing_id}
+
+        client = TestClient(api)
+        client.get("/things/1")
+        client.get("/things/2")
+        client.get("/missing")
+        h = metrics.HTTP_REQUEST_DURATION
+        assert h.get(method="GET", route="/things/{thing_id}", status=200)[0] == 2
+        assert h.get(method="GET", route=metrics.UNMATCHED_ROUTE, status=404)[0] == 1
@@ -0,0 +1,183 @@
+"""
+Юніт-тести для app/core/monitor.py
+
+Перевіряють:
+- кешування перевірки БД (один SELECT на HEALTH_DB_CACHE_SECONDS)
+- невдала перевірка БД → dispose() пулів усіх смуг; кожна смуга пінгується
+- насиченість пулу (QueuePool) і пропуск перевірки БД при вичерпаному пулі
+- затримку event loop: блокуючий виклик у циклі помітний семплеру
+- загальний результат readiness і список причин
+"""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core import monitor
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    monitor.reset()
+    yield
+    monitor.reset()
+
+
+class _FakeEngine:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.connects = 0
+        self.disposed = 0
+
+    def connect(self):
+        self.connects += 1
+        if self.fail:
+            raise ConnectionError("db down")
+        return create_engine("sqlite://").connect()
+
+    def dispose(self):
+        self.disposed += 1
+
+
+def _use_engines(monkeypatch, default, **lanes):
+    """Усі смуги — default (як при DB_LANES_ENABLED=false), окрім перелічених."""
+    monkeypatch.setattr(monitor, "engines", {
+        lane: lanes.get(lane, default) for lane in ("terminal", "dashboard", "reports")
+    })
+
+
+class TestDbStatus:
+    def test_cached(self, monkeypatch):
+        fake = _FakeEngine()
+        _use_engines(monkeypatch, fake)
+        monkeypatch.setattr(settings, "health_db_cache_seconds", 60)
+        assert monitor.db_status()["ok"] is True
+        assert monitor.db_status()["ok"] is True
+        assert fake.connects == 1
+
+    def test_expired_cache_rechecks(self, monkeypatch):
+        fake = _FakeEngine()
+        _use_engines(monkeypatch, fake)
+        monkeypatch.setattr(settings, "health_db_cache_seconds", 0)
+        monitor.db_status()
+        monitor.db_status()
+        assert fake.connects == 2
+
+    def test_shared_engine_pinged_once(self, monkeypatch):
+        fake = _FakeEngine()
+        _use_engines(monkeypatch, fake)
+        assert monitor.db_status()["ok"] is True
+        assert fake.connects == 1
+
+    def test_every_lane_pinged(self, monkeypatch):
+        default, terminal, reports = _FakeEngine(), _FakeEngine(), _FakeEngine()
+        _use_engines(monkeypatch, default, terminal=terminal, reports=reports)
+        assert monitor.db_status()["ok"] is True
+        assert (default.connects, terminal.connects, reports.connects) == (1, 1, 1)
+
+    def test_lane_failure_disposes_all_pools(self, monkeypatch):
+        default, terminal, reports = _FakeEngine(), _FakeEngine(fail=True), _FakeEngine()
+        _use_engines(monkeypatch, default, terminal=terminal, reports=reports)
+        result = monitor.db_status()
+        assert result["ok"] is False and result["lane"] == "terminal"
+        assert (default.disposed, terminal.disposed, reports.disposed) == (1, 1, 1)
+
+    def test_failure_disposes_pool(self, monkeypatch):
+        fake = _FakeEngine(fail=True)
+        _use_engines(monkeypatch, fake)
+        result = monitor.db_status()
+        assert result["ok"] is False
+        assert result["error"] == "ConnectionError"
+        assert fake.disposed == 1
+
+
+class TestPool:
+    def test_queue_pool_saturation(self, monkeypatch):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=2)
+        idle = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=2)
+        monkeypatch.setattr(monitor, "engines", {"terminal": engine, "dashboard": idle, "reports": engine})
+        monkeypatch.setattr(settings, "db_lanes_enabled", True)
+        monkeypatch.setattr(settings, "terminal_db_max_overflow", 2)
+        monkeypatch.setattr(settings, "reports_db_max_overflow", 2)
+        conns = [engine.connect() for _ in range(3)]
+        try:
+            status = monitor.pool_status()
+            assert status["lanes"]["terminal"]["checked_out"] == 3
+            assert status["lanes"]["dashboard"]["checked_out"] == 0
+            assert status["saturation"] == 0.75
+        finally:
+            for c in conns:
+                c.close()
+            engine.dispose()
+            idle.dispose()
+
+    def test_reports_lane_ignored_for_saturation(self, monkeypatch):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0)
+        idle = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0)
+        monkeypatch.setattr(monitor, "engines", {"terminal": idle, "dashboard": idle, "reports": engine})
+        monkeypatch.setattr(settings, "reports_db_max_overflow", 0)
+        conn = engine.connect()
+        try:
+            status = monitor.pool_status()
+            assert status["lanes"]["reports"]["saturation"] == 1.0
+            assert status["saturation"] == 0.0
+        finally:
+            conn.close()
+            engine.dispose()
+            idle.dispose()
+
+
+class TestReadiness:
+    def test_ready(self, monkeypatch):
+        _use_engines(monkeypatch, _FakeEngine())
+        monkeypatch.setattr(monitor, "pool_status", lambda: {"saturation": 0.1})
+        ready, checks = asyncio.run(monitor.readiness())
+        assert ready and checks["failed"] == []
+
+    def test_db_down(self, monkeypatch):
+        _use_engines(monkeypatch, _FakeEngine(fail=True))
+        monkeypatch.setattr(monitor, "pool_status", lambda: {"saturation": 0.1})
+        ready, checks = asyncio.run(monitor.readiness())
+        assert not ready and checks["failed"] == ["db"]
+
+    def test_saturated_pool_skips_db(self, monkeypatch):
+        fake = _FakeEngine()
+        _use_engines(monkeypatch, fake)
+        monkeypatch.setattr(monitor, "pool_status", lambda: {"saturation": 1.0})
+        ready, checks = asyncio.run(monitor.readiness())
+        assert not ready and checks["failed"] == ["pool"]
+        assert fake.connects == 0
+
+    def test_db_timeout(self, monkeypatch):
+        monkeypatch.setattr(monitor, "db_status", lambda: time.sleep(0.3) or {"ok": True})
+        monkeypatch.setattr(monitor, "pool_status", lambda: {"saturation": 0.0})
+        monkeypatch.setattr(settings, "health_db_timeout_seconds", 0.05)
+        ready, checks = asyncio.run(monitor.readiness())
+        assert not ready and checks["db"]["error"] == "timeout"
+
+    def test_loop_lag(self, monkeypatch):
+        _use_engines(monkeypatch, _FakeEngine())
+        monkeypatch.setattr(monitor, "pool_status", lambda: {"saturation": 0.0})
+        monkeypatch.setattr(settings, "health_loop_lag_max_ms", 100)
+        monkeypatch.setattr(monitor, "_loop_lag_ms", 250.0)
+        ready, checks = asyncio.run(monitor.readiness())
+        assert not ready and checks["failed"] == ["loop_lag"]
+
+
+class TestLoopLagSampler:
+    def test_blocking_call_measured(self, monkeypatch):
+        monkeypatch.setattr(settings, "loop_lag_sample_interval_ms", 20)
+
+        async def scenario():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            time.sleep(0.2)  # блокує цикл
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        assert monitor.loop_lag_ms() >= 150
+        assert monitor.LOOP_LAG.get() >= 0.15
@@ -0,0 +1,220 @@
+"""
+Регресійні тести кількості SQL-запитів на гарячих маршрутах.
+
+Перевіряють:
+- зв'язки Event (employee/terminal/created_by) не підвантажуються неявно
+  (lazy="raise_on_sql"): випадковий доступ одразу падає, а не робить SELECT
+- скан терміналу: фіксована кількість запитів, WS-пейлоад без повторних SELECT
+- статистика працівника: кількість запитів не залежить від кількості подій
+- стрічка сканів dashboard: без limit і курсора — увесь день, з курсором —
+  сторінки за RECENT_SCANS_DEFAULT_LIMIT
+- експорт: кількість запитів не залежить від кількості працівників (без N+1)
+- ручні події: створення / список / видалення дня; невідомий terminal_id
+  (поодинока подія і пакет) → 404 без запису
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app.api.routes import stats as stats_routes
+from app.core.config import settings
+from app.models.employee import Employee
+from app.models.event import Event
+from app.models.terminal import Terminal
+from app.models.user import User
+from app.services import employee_uids
+
+
+def _seed(db):
+    db.add(User(id=1, username="admin", password_hash="x", role="admin"))
+    db.add(Terminal(id=1, name="t1", api_key="k1"))
+
+
+@pytest.fixture
+def env(make_app_env):
+    env = make_app_env(_seed, statements=True)
+    statements = env["statements"]
+
+    @contextmanager
+    def count():
+        statements.clear()
+        counter = {}
+        yield counter
+        counter["n"] = len(statements)
+        counter["sql"] = list(statements)
+
+    env["count"] = count
+    return env
+
+
+def _add_employees(Session, n, events_per_employee=0, start=None):
+    start = start or datetime(2026, 3, 2, 8, 0)
+    with Session() as db:
+        base = db.query(Employee).count()
+        for i in range(n):
+            emp = Employee(full_name=f"Працівник {base + i}", nfc_uid=f"UID{base + i:04d}")
+            db.add(emp)
+            db.flush()
+            for k in range(events_per_employee):
+                db.add(Event(
+                    employee_id=emp.id, terminal_id=1,
+                    direction="IN" if k % 2 == 0 else "OUT",
+                    ts=start + timedelta(days=k // 2, hours=8 * (k % 2)),
+                ))
+        db.commit()
+
+
+class TestRaiseOnSql:
+    def test_relationship_access_raises(self, env):
+        _add_employees(env["Session"], 1, events_per_employee=1)
+        with env["Session"]() as db:
+            ev = db.query(Event).first()
+            with pytest.raises(InvalidRequestError):
+                _ = ev.employee
+
+    def test_query_event_is_single_statement(self, env):
+        _add_employees(env["Session"], 1, events_per_employee=4)
+        with env["Session"]() as db, env["count"]() as c:
+            db.query(Event).all()
+        assert c["n"] == 1
+
+
+def _warm_uid_map(Session):
+    # Як у lifespan: мапу UID завантажено до першого скану
+    with Session() as db:
+        employee_uids.load(db)
+
+
+class TestScan:
+    @pytest.fixture(autouse=True)
+    def _no_version_checks(self, monkeypatch):
+        monkeypatch.setattr(settings, "employee_uid_cache_check_seconds", 60)
+
+    def _scan(self, client, uid="UID0000"):
+        return client.post("/api/terminal/scan", json={
+            "uid": uid, "terminal_id": 1, "direction": "IN", "ts": int(time.time() * 1000),
+        })
+
+    def test_scan_query_count(self, env):
+        _add_employees(env["Session"], 1, events_per_employee=10)
+        _warm_uid_map(env["Session"])
+        with env["count"]() as c:
+            r = self._scan(env["client"])
+        assert r.status_code == 200, r.text
+        # термінал, остання подія, умовний INSERT, версія статистики
+        # (cache_versions) — працівник з мапи UID, нічого для WS
+        assert c["n"] == 4, c["sql"]
+        assert not any("FROM employees" in sql for sql in c["sql"])
+
+    def test_scan_count_independent_of_history(self, env):
+        _add_employees(env["Session"], 1, events_per_employee=2)
+        _warm_uid_map(env["Session"])
+        with env["count"]() as few:
+            self._scan(env["client"])
+        _add_employees(env["Session"], 1, events_per_employee=60)
+        _warm_uid_map(env["Session"])
+        with env["count"]() as many:
+            self._scan(env["client"], uid="UID0001")
+        assert few["n"] == many["n"]
+
+
+class TestStats:
+    def test_employee_stats_count_independent_of_events(self, env):
+        _add_employees(env["Session"], 2, events_per_employee=2)
+        _add_employees(env["Session"], 1, events_per_employee=40)
+        with env["count"]() as few:
+            assert env["client"].get("/api/stats/employee/1").status_code == 200
+        with env["count"]() as many:
+            assert env["client"].get("/api/stats/employee/3").status_code == 200
+        # версія статистики в cache_versions + один запит подій
+        assert few["n"] == many["n"] == 2
+
+    def test_recent_scans_whole_day_by_default(self, env, monkeypatch):
+        monkeypatch.setattr(stats_routes, "RECENT_SCANS_DEFAULT_LIMIT", 2)
+        _add_employees(env["Session"], 5, events_per_employee=1)
+        body = env["client"].get("/api/stats/recent-scans", params={"scan_date": "2026-03-02"}).json()
+        assert (body["count"], body["has_more"], body["next_before_id"]) == (5, False, None)
+
+        page = env["client"].get("/api/stats/recent-scans", params={
+            "scan_date": "2026-03-02", "before_id": body["events"][0]["id"],
+        }).json()
+        assert page["count"] == 2 and page["has_more"] is True
+
+
+class TestExport:
+    URL = "/api/export/worktime.csv?date_from=2026-03-01&date_to=2026-03-31"
+
+    def test_no_query_per_employee(self, env):
+        _add_employees(env["Session"], 2, events_per_employee=4)
+        with env["count"]() as few:
+            assert env["client"].get(self.URL).status_code == 200
+        _add_employees(env["Session"], 20, events_per_employee=4)
+        with env["count"]() as many:
+            r = env["client"].get(self.URL)
+        assert r.status_code == 200
+        assert few["n"] == many["n"] == 2
+        assert r.text.count("\n") == 23  # заголовок + 22 працівники
+
+
+class TestManualEvents:
+    def test_create(self, env):
+        _add_employees(env["Session"], 1)
+        with env["count"]() as c:
+            r = env["client"].post("/api/events/manual", json={
+                "employee_id": 1, "timestamp": "2026-03-02T09:00:00",
+                "direction": "IN", "comment": "забув картку",
+            })
+        assert r.status_code == 200, r.text
+        assert c["n"] <= 6, c["sql"]
+
+    def test_unknown_terminal_rejected(self, env):
+        _add_employees(env["Session"], 2)
+        r = env["client"].post("/api/events/manual", json={
+            "employee_id": 1, "timestamp": "2026-03-02T09:00:00",
+            "direction": "IN", "terminal_id": 99, "comment": "x",
+        })
+        assert r.status_code == 404, r.text
+        r = env["client"].post("/api/events/manual/bulk", json={
+            "action": "create", "employee_ids": [1, 2], "dates": ["2026-03-02"],
+            "time": "08:00", "direction": "IN", "terminal_id": 99, "comment": "x",
+        })
+        assert r.status_code == 404, r.text
+        with env["Session"]() as db:
+            assert db.query(Event).count() == 0
+
+    def test_bulk_with_known_terminal(self, env):
+        _add_employees(env["Session"], 2)
+        r = env["client"].post("/api/events/manual/bulk", json={
+            "action": "create", "employee_ids": [1, 2], "dates": ["2026-03-02"],
+            "time": "08:00", "direction": "IN", "terminal_id": 1,
+        })
+        assert r.status_code == 200, r.text
+        with env["Session"]() as db:
+            assert db.query(Event).filter(Event.terminal_id == 1).count() == 2
+
+    def test_list_is_single_join(self, env):
+        _add_employees(env["Session"], 3)
+        for emp_id in (1, 2, 3):
+            env["client"].post("/api/events/manual", json={
+                "employee_id": emp_id, "timestamp": "2026-03-02T09:00:00",
+                "direction": "IN", "comment": "x",
+            })
+        with env["count"]() as c:
+            r = env["client"].get("/api/events/manual")
+        assert r.status_code == 200 and len(r.json()) == 3
+        assert c["n"] == 1
+
+    def test_clear_day(self, env):
+        _add_employees(env["Session"], 1)
+        for hh in ("09", "17"):
+            env["client"].post("/api/events/manual", json={
+                "employee_id": 1, "timestamp": f"2026-03-02T{hh}:00:00",
+                "direction": "IN", "comment": "x",
+            })
+        with env["count"]() as c:
+            r = env["client"].delete("/api/events/manual/day/1/2026-03-02")
+        assert r.status_code == 200, r.text
+        assert c["n"] <= 5, c["sql"]
@@ -0,0 +1,139 @@
+"""
+Юніт-тести для app/db/query_stats.py
+
+Перевіряють:
+- нормалізацію SQL у відбиток: літерали, плейсхолдери, IN-списки, VALUES
+- підрахунок запитів і часу БД у межах одного HTTP-запиту (contextvar)
+- заголовок Server-Timing і метрики по шаблону маршруту (app/core/metrics.py)
+- журнал повільних запитів і обмеження кількості відбитків
+"""
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core import metrics
+from app.core.config import settings
+from app.db import query_stats as qs
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    qs.reset()
+    metrics.reset()
+    yield
+    qs.reset()
+    metrics.reset()
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    qs.install(engine)
+    qs.install(engine)  # повторний виклик не дублює слухачів
+
+    def get_conn():
+        with engine.connect() as conn:
+            yield conn
+
+    api = FastAPI()
+    api.add_middleware(qs.QueryStatsMiddleware)
+
+    @api.get("/items/{item_id}")
+    def item(item_id: int, conn=Depends(get_conn)):
+        for _ in range(item_id):
+            conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    yield TestClient(api)
+    engine.dispose()
+
+
+class TestFingerprint:
+    def test_literals_and_placeholders(self):
+        assert qs.fingerprint("SELECT * FROM t WHERE a = 'x''y' AND b = 42 AND c = ?") == (
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?"
+        )
+
+    def test_named_and_pyformat(self):
+        assert qs.fingerprint("UPDATE t SET a = %(a)s WHERE id = %s") == "UPDATE t SET a = ? WHERE id = ?"
+        assert qs.fingerprint("DELETE FROM t WHERE id = :id_1") == "DELETE FROM t WHERE id = ?"
+
+    def test_in_list_collapsed(self):
+        assert qs.fingerprint("SELECT id FROM t WHERE id IN (1, 2, 3)") == qs.fingerprint(
+            "SELECT id FROM t WHERE id IN (?, ?)"
+        ) == "SELECT id FROM t WHERE id IN (?+)"
+
+    def test_multi_row_values_collapsed(self):
+        assert qs.fingerprint("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+            "INSERT INTO t (a, b) VALUES (?, ?)+"
+        )
+
+    def test_whitespace(self):
+        assert qs.fingerprint("SELECT\n  a\n FROM   t") == "SELECT a FROM t"
+
+    def test_identifiers_with_digits_kept(self):
+        assert qs.fingerprint("SELECT t1.a FROM t1") == "SELECT t1.a FROM t1"
+
+
+class TestRequestStats:
+    def test_server_timing_header(self, client):
+        r = client.get("/items/3")
+        assert r.status_code == 200
+        assert 'desc="3 queries"' in r.headers["server-timing"]
+        assert "app;dur=" in r.headers["server-timing"]
+
+    def test_aggregated_by_route_template(self, client):
+        client.get("/items/2")
+        client.get("/items/5")
+        assert qs.STATEMENTS.get(route="/items/{item_id}") == 7
+        assert qs.STATEMENTS_PER_REQUEST.get(route="/items/{item_id}") == (2, 7)
+        assert qs.DB_TIME.get(route="/items/{item_id}") > 0
+
+    def test_unmatched_route(self, client):
+        assert client.get("/nope").status_code == 404
+        assert qs.STATEMENTS_PER_REQUEST.get(route=metrics.UNMATCHED_ROUTE) == (1, 0)
+
+    def test_outside_request_not_attributed(self):
+        qs.record("SELECT 1", 1.0)
+        assert qs.current() is None
+        assert metrics.snapshot()["db_statements_total"]["values"] == []
+
+    def test_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "query_stats_enabled", False)
+        r = client.get("/items/1")
+        assert "server-timing" not in r.headers
+        assert metrics.snapshot()["db_statements_total"]["values"] == []
+
+    def test_render_metrics(self, client):
+        client.get("/items/1")
+        out = metrics.render()
+        assert 'db_statements_total{route="/items/{item_id}"} 1' in out
+        assert "# TYPE db_time_seconds_total counter" in out
+
+
+class TestSlowLog:
+    def test_slow_query_logged_by_fingerprint(self, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "slow_query_ms", 100)
+        qs.record("SELECT * FROM t WHERE id = 1", 150.0)
+        qs.record("SELECT * FROM t WHERE id = 2", 250.0)
+        qs.record("SELECT * FROM t WHERE id = 3", 50.0)
+        fp = "SELECT * FROM t WHERE id = ?"
+        assert [k for k, _ in metrics.snapshot()["db_slow_queries_total"]["values"]] == [[fp]]
+        assert qs.SLOW_QUERIES.get(fingerprint=fp) == 2
+        assert qs.SLOW_QUERY_MAX.get(fingerprint=fp) == 0.25
+        assert "Slow query 150.0 ms" in caplog.text
+
+    def test_disabled_with_zero(self, monkeypatch):
+        monkeypatch.setattr(settings, "slow_query_ms", 0)
+        qs.record("SELECT 1", 10_000.0)
+        assert metrics.snapshot()["db_slow_queries_total"]["values"] == []
+
+    def test_fingerprint_cap(self, monkeypatch):
+        monkeypatch.setattr(settings, "slow_query_ms", 1)
+        monkeypatch.setattr(settings, "slow_query_max_fingerprints", 2)
+        for table in ("a", "b", "c", "d"):
+            qs.record(f"SELECT * FROM {table}", 5.0)
+        assert len(metrics.snapshot()["db_slow_queries_total"]["values"]) == 3
+        assert qs.SLOW_QUERIES.get(fingerprint=qs.OTHER_FINGERPRINT) == 2
@@ -0,0 +1,113 @@
+"""
+Юніт-тести для app/services/retention.py
+
+Перевіряють:
+- архівація аудиту: старі рядки → помісячні .jsonl.gz, видалення з БД
+- свіжі рядки лишаються, робота пакетами
+- повторний запуск дописує в той самий архів (gzip members)
+- очищення старих ключів ідемпотентності сканів (terminal_scan_ids)
+- генерацію помісячних партицій і межі для VALUES LESS THAN
+"""
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401 — реєструє всі таблиці в metadata
+from app.db.base import Base
+from app.models.audit_log import AuditLog
+from app.models.terminal import Terminal
+from app.models.terminal_scan_id import TerminalScanId
+from app.services import retention
+
+NOW = datetime(2026, 6, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _add(db, *created):
+    for i, ts in enumerate(created):
+        db.add(AuditLog(admin_username="admin", action=f"a{i}", created_at=ts.replace(tzinfo=None)))
+    db.commit()
+
+
+def _read(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestArchiveAuditLogs:
+    def test_old_rows_archived_by_month_and_deleted(self, db, tmp_path):
+        _add(db,
+             datetime(2025, 1, 10, tzinfo=timezone.utc),
+             datetime(2025, 1, 20, tzinfo=timezone.utc),
+             datetime(2025, 2, 5, tzinfo=timezone.utc),
+             NOW - timedelta(days=1))
+        result = retention.archive_audit_logs(
+            db, older_than_days=90, archive_dir=str(tmp_path), batch_size=2, now=NOW,
+        )
+        assert result["archived"] == 3
+        assert result["batches"] == 2
+        assert [a.action for a in db.query(AuditLog).all()] == ["a3"]
+        assert [r["action"] for r in _read(tmp_path / "audit_logs-2025-01.jsonl.gz")] == ["a0", "a1"]
+        assert [r["action"] for r in _read(tmp_path / "audit_logs-2025-02.jsonl.gz")] == ["a2"]
+
+    def test_second_run_appends_to_same_archive(self, db, tmp_path):
+        _add(db, datetime(2025, 1, 10, tzinfo=timezone.utc))
+        retention.archive_audit_logs(db, older_than_days=90, archive_dir=str(tmp_path), now=NOW)
+        _add(db, datetime(2025, 1, 11, tzinfo=timezone.utc))
+        retention.archive_audit_logs(db, older_than_days=90, archive_dir=str(tmp_path), now=NOW)
+        assert len(_read(tmp_path / "audit_logs-2025-01.jsonl.gz")) == 2
+
+    def test_disabled_with_zero_days(self, db, tmp_path):
+        _add(db, datetime(2020, 1, 1, tzinfo=timezone.utc))
+        result = retention.archive_audit_logs(db, older_than_days=0, archive_dir=str(tmp_path), now=NOW)
+        assert result["archived"] == 0
+        assert db.query(AuditLog).count() == 1
+
+
+class TestPruneScanIds:
+    def test_old_ids_deleted_in_batches(self, db):
+        db.add(Terminal(id=1, name="t1", api_key="k1"))
+        for i, age in enumerate((40, 35, 31, 2)):
+            db.add(TerminalScanId(
+                terminal_id=1, scan_id=f"s{i}", message="m",
+                created_at=(NOW - timedelta(days=age)).replace(tzinfo=None),
+            ))
+        db.commit()
+        assert retention.prune_scan_ids(db, older_than_days=30, batch_size=2, now=NOW) == 3
+        assert [r.scan_id for r in db.query(TerminalScanId).all()] == ["s3"]
+
+    def test_disabled_with_zero_days(self, db):
+        assert retention.prune_scan_ids(db, older_than_days=0, now=NOW) == 0
+
+
+class TestPartitions:
+    def test_month_partitions_bounds(self):
+        parts = retention.month_partitions(date(2025, 11, 20), date(2026, 1, 3))
+        assert parts == [
+            ("p202511", date(2025, 12, 1)),
+            ("p202512", date(2026, 1, 1)),
+            ("p202601", date(2026, 2, 1)),
+        ]
+
+    def test_partition_clause(self):
+        assert retention.partition_clause("p202601", date(2026, 2, 1)) == (
+            "PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01'))"
+        )
+
+    def test_partition_helpers_noop_on_sqlite(self, db):
+        assert retention.ensure_future_partitions(db) == []
+        assert retention.drop_expired_partitions(db, "events", date(2026, 1, 1)) == []
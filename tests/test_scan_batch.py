@@ -0,0 +1,199 @@
+"""
+Тести пакетного вивантаження сканів POST /api/terminal/scan/batch.
+
+Перевіряють:
+- скани кожного працівника обробляються в порядку ts (toggle IN/OUT),
+  незалежно від порядку в пакеті
+- cooldown між сканами пакета і відносно останньої події в БД
+- невідомий UID не зриває пакет і не запам'ятовується
+- ідемпотентність: повтор пакета і повтор scan_id всередині пакета
+  не створюють подій, повертають початковий результат
+- одне агреговане WS-повідомлення на пакет, ліміт розміру пакета
+- пакет виконується в потоці пулу (не блокує event loop) і чекає на
+  блокування бейджів, зайняті поодинокими сканами цього воркера
+"""
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+import pytest
+
+from app.core.config import settings
+from app.crud import event as event_crud
+from app.models.employee import Employee
+from app.models.event import Event
+from app.models.terminal import Terminal
+from app.models.terminal_scan_id import TerminalScanId
+from app.services import scan_locks
+
+T0 = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+
+
+def _ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+def _seed(db):
+    db.add(Terminal(id=1, name="t1", api_key="k1"))
+    db.add(Employee(id=1, full_name="Анна", nfc_uid="AAA"))
+    db.add(Employee(id=2, full_name="Борис", nfc_uid="BBB"))
+
+
+@pytest.fixture
+def env(make_app_env, monkeypatch):
+    monkeypatch.setattr(settings, "terminal_scan_cooldown_seconds", 5)
+    return make_app_env(_seed)
+
+
+def _post(client, *scans):
+    return client.post("/api/terminal/scan/batch", json={
+        "terminal_id": 1,
+        "scans": [{"scan_id": sid, "uid": uid, "ts": _ms(ts)} for sid, uid, ts in scans],
+    })
+
+
+def _events(Session):
+    with Session() as db:
+        return [(e.employee_id, e.direction) for e in db.query(Event).order_by(Event.ts, Event.id).all()]
+
+
+class TestOrdering:
+    def test_toggle_in_ts_order(self, env):
+        r = _post(
+            env["client"],
+            ("s3", "AAA", T0 + timedelta(hours=9)),
+            ("s1", "AAA", T0),
+            ("s2", "AAA", T0 + timedelta(hours=8)),
+            ("b1", "bbb", T0 + timedelta(minutes=1)),
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert [x["direction"] for x in body["results"]] == ["IN", "IN", "OUT", "IN"]
+        assert body["registered"] == 4
+        assert _events(env["Session"]) == [(1, "IN"), (2, "IN"), (1, "OUT"), (1, "IN")]
+
+    def test_continues_from_last_db_event(self, env):
+        with env["Session"]() as db:
+            db.add(Event(
+                employee_id=1, terminal_id=1, direction="IN", ts=(T0 - timedelta(hours=1)).replace(tzinfo=None),
+            ))
+            db.commit()
+        body = _post(env["client"], ("s1", "AAA", T0)).json()
+        assert body["results"][0]["direction"] == "OUT"
+
+
+class TestRules:
+    def test_cooldown_inside_batch(self, env):
+        body = _post(
+            env["client"],
+            ("s1", "AAA", T0),
+            ("s2", "AAA", T0 + timedelta(seconds=2)),
+        ).json()
+        assert [x["status"] for x in body["results"]] == ["registered", "cooldown"]
+        assert body["results"][1]["message"].startswith("cooldown_wait_")
+        assert len(_events(env["Session"])) == 1
+
+    def test_unknown_uid_not_stored(self, env):
+        body = _post(env["client"], ("s1", "ZZZ", T0), ("s2", "AAA", T0)).json()
+        assert [x["status"] for x in body["results"]] == ["unknown_employee", "registered"]
+        with env["Session"]() as db:
+            assert [r.scan_id for r in db.query(TerminalScanId).all()] == ["s2"]
+
+
+class TestIdempotency:
+    def test_replayed_batch(self, env):
+        scans = [
+            ("s1", "AAA", T0),
+            ("s2", "AAA", T0 + timedelta(hours=8)),
+            ("s3", "AAA", T0 + timedelta(hours=8, seconds=1)),
+        ]
+        first = _post(env["client"], *scans).json()
+        second = _post(env["client"], *scans).json()
+        assert len(_events(env["Session"])) == 2
+        assert second["registered"] == 0 and second["duplicates"] == 3
+        for a, b in zip(first["results"], second["results"]):
+            assert b["duplicate"] is True
+            assert (a["status"], a["event_id"], a["direction"], a["message"]) == \
+                (b["status"], b["event_id"], b["direction"], b["message"])
+
+    def test_repeated_scan_id_inside_batch(self, env):
+        body = _post(env["client"], ("s1", "AAA", T0), ("s1", "AAA", T0)).json()
+        assert [x["duplicate"] for x in body["results"]] == [False, True]
+        assert body["results"][1]["event_id"] == body["results"][0]["event_id"]
+        assert len(_events(env["Session"])) == 1
+
+
+class TestBroadcast:
+    def test_single_aggregated_message(self, env):
+        _post(env["client"], ("s1", "AAA", T0), ("s2", "BBB", T0), ("s3", "AAA", T0 + timedelta(seconds=1)))
+        assert len(env["broadcasts"]) == 1
+        msg = env["broadcasts"][0]
+        assert msg["type"] == "scan_batch" and msg["terminal_name"] == "t1"
+        assert [(e["employee_id"], e["direction"]) for e in msg["events"]] == [(1, "IN"), (2, "IN")]
+
+    def test_no_message_when_nothing_registered(self, env):
+        _post(env["client"], ("s1", "ZZZ", T0))
+        assert env["broadcasts"] == []
+
+
+class TestLimits:
+    def test_too_many_scans(self, env, monkeypatch):
+        monkeypatch.setattr(settings, "terminal_scan_batch_max", 2)
+        r = _post(env["client"], *[(f"s{i}", "AAA", T0) for i in range(3)])
+        assert r.status_code == 413
+
+    def test_unknown_terminal(self, env):
+        r = env["client"].post("/api/terminal/scan/batch", json={
+            "terminal_id": 9, "scans": [{"scan_id": "s1", "uid": "AAA", "ts": _ms(T0)}],
+        })
+        assert r.status_code == 400
+
+
+class TestConcurrency:
+    def test_runs_in_threadpool(self, env, monkeypatch):
+        threads = []
+        original = event_crud.create_events_from_terminal_batch
+
+        def _spy(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(event_crud, "create_events_from_terminal_batch", _spy)
+        assert _post(env["client"], ("s1", "AAA", T0)).status_code == 200
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_waits_for_badge_lock(self, env):
+        async def scenario():
+            transport = httpx.ASGITransport(app=env["api"])
+            async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+                lock = scan_locks.lock_for("AAA")
+                await lock.acquire()  # поодинокий скан цього бейджа ще триває
+                task = asyncio.create_task(c.post("/api/terminal/scan/batch", json={
+                    "terminal_id": 1,
+                    "scans": [
+                        {"scan_id": "b1", "uid": "bbb", "ts": _ms(T0)},
+                        {"scan_id": "a1", "uid": "aaa", "ts": _ms(T0)},
+                    ],
+                }))
+                await asyncio.sleep(0.1)
+                waiting = not task.done() and _events(env["Session"]) == []
+                lock.release()
+                return waiting, await task
+
+        waiting, r = asyncio.run(scenario())
+        assert waiting
+        assert r.status_code == 200 and r.json()["registered"] == 2
+
+    def test_stripes_taken_in_order(self):
+        async def scenario():
+            uids = [f"U{i}" for i in range(50)]
+            # Два пакети з тими самими бейджами в різному порядку не блокують один одного
+            async def batch(order):
+                async with scan_locks.hold(order):
+                    await asyncio.sleep(0.01)
+
+            await asyncio.wait_for(asyncio.gather(batch(uids), batch(uids[::-1])), timeout=2)
+
+        asyncio.run(scenario())
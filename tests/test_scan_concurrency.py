@@ -0,0 +1,178 @@
+"""
+Стрес-тест паралельних сканів одного бейджа.
+
+Перевіряють:
+- одночасні скани одного UID (кілька терміналів) дають строго
+  чергування IN/OUT — жодних двох IN поспіль
+- без блокувань воркера (інший процес) чергування тримає умовний INSERT:
+  прострочене рішення відкидається, скан перечитує останню подію
+- застаріле читання "останньої події" не призводить до дубля напрямку —
+  і в поодинокому скані, і в пакеті (apply_terminal_scans)
+- скани різних працівників не чекають один на одного (різні смуги блокувань)
+"""
+import asyncio
+import contextlib
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.crud import event as event_crud
+from app.models.employee import Employee
+from app.models.event import Event
+from app.models.terminal import Terminal
+from app.schemas.terminal import TerminalScanRequest
+from app.services import scan_locks
+
+PARALLEL = 20
+
+
+def _seed(db):
+    for t in range(1, 5):
+        db.add(Terminal(id=t, name=f"t{t}", api_key=f"k{t}"))
+    db.add(Employee(id=1, full_name="Анна", nfc_uid="AAA"))
+    db.add(Employee(id=2, full_name="Борис", nfc_uid="BBB"))
+
+
+@pytest.fixture
+def env(make_app_env, monkeypatch):
+    # Без cooldown кожен скан має перемкнути напрямок
+    monkeypatch.setattr(settings, "terminal_scan_cooldown_seconds", 0)
+    return make_app_env(_seed, file_db=True)
+
+
+def _fire(api, uids):
+    ts = int(time.time() * 1000)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await asyncio.gather(*(
+                c.post("/api/terminal/scan", json={
+                    "uid": uid, "terminal_id": i % 4 + 1, "direction": "IN", "ts": ts,
+                })
+                for i, uid in enumerate(uids)
+            ))
+
+    return asyncio.run(scenario())
+
+
+def _directions(Session, employee_id=1):
+    with Session() as db:
+        rows = db.query(Event.direction).filter(Event.employee_id == employee_id).order_by(Event.id).all()
+    return [d for (d,) in rows]
+
+
+def _alternating(directions):
+    return directions == ["IN", "OUT"] * (len(directions) // 2) + ["IN"] * (len(directions) % 2)
+
+
+class TestSameBadge:
+    def test_parallel_scans_alternate(self, env):
+        responses = _fire(env["api"], ["AAA"] * PARALLEL)
+        assert [r.status_code for r in responses] == [200] * PARALLEL
+        directions = _directions(env["Session"])
+        assert len(directions) == PARALLEL
+        assert _alternating(directions)
+
+    def test_guard_without_worker_locks(self, env, monkeypatch):
+        # Кожен запит — ніби з окремого воркера: спільного блокування немає
+        monkeypatch.setattr(scan_locks, "lock_for", lambda uid: contextlib.nullcontext())
+        responses = _fire(env["api"], ["AAA"] * 8)
+        # Програвші гонку перечитують; після SCAN_INSERT_ATTEMPTS — 409
+        assert {r.status_code for r in responses} <= {200, 409}
+        directions = _directions(env["Session"])
+        assert len(directions) == sum(r.status_code == 200 for r in responses)
+        assert _alternating(directions)
+
+    def test_two_employees(self, env):
+        _fire(env["api"], ["AAA", "BBB"] * 6)
+        assert _alternating(_directions(env["Session"], 1))
+        assert _alternating(_directions(env["Session"], 2))
+        assert len(_directions(env["Session"], 2)) == 6
+
+
+class TestConditionalInsert:
+    def test_stale_read_is_retried(self, env, monkeypatch):
+        t0 = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+        with env["Session"]() as db:
+            db.add(Event(employee_id=1, terminal_id=1, direction="IN", ts=t0.replace(tzinfo=None)))
+            db.commit()
+
+        real = event_crud.get_last_event_for_employee
+        reads = []
+
+        def stale_then_real(db, employee_id):
+            reads.append(employee_id)
+            # Перше читання — до того, як інший воркер закомітив IN
+            return None if len(reads) == 1 else real(db, employee_id)
+
+        monkeypatch.setattr(event_crud, "get_last_event_for_employee", stale_then_real)
+        with env["Session"]() as db:
+            result = event_crud.create_event_from_terminal_scan(db, TerminalScanRequest(
+                uid="AAA", terminal_id=2, direction="IN", ts=int((t0 + timedelta(hours=8)).timestamp() * 1000),
+            ))
+
+        assert len(reads) == 2
+        assert result["direction"] == "OUT"
+        assert _directions(env["Session"]) == ["IN", "OUT"]
+
+    def test_gives_up_after_attempts(self, env, monkeypatch):
+        with env["Session"]() as db:
+            db.add(Event(employee_id=1, terminal_id=1, direction="IN", ts=datetime(2026, 3, 2, 8, 0)))
+            db.commit()
+        monkeypatch.setattr(event_crud, "get_last_event_for_employee", lambda db, employee_id: None)
+        with env["Session"]() as db, pytest.raises(event_crud.ScanConflictError):
+            event_crud.create_event_from_terminal_scan(db, TerminalScanRequest(
+                uid="AAA", terminal_id=1, direction="IN", ts=int(time.time() * 1000),
+            ))
+        assert _directions(env["Session"]) == ["IN"]
+
+    def test_batch_stale_read_is_retried(self, env, monkeypatch):
+        t0 = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+        with env["Session"]() as db:
+            db.add(Event(employee_id=1, terminal_id=1, direction="IN", ts=t0.replace(tzinfo=None)))
+            db.commit()
+
+        # Пакет прочитав останні події до того, як інший воркер закомітив IN
+        monkeypatch.setattr(event_crud, "_last_events", lambda db, employee_ids: {})
+        with env["Session"]() as db:
+            results = event_crud.apply_terminal_scans(db, [
+                event_crud.ScanInput(terminal_id=2, uid="AAA", ts=int((t0 + timedelta(hours=8)).timestamp() * 1000)),
+                event_crud.ScanInput(terminal_id=2, uid="AAA", ts=int((t0 + timedelta(hours=9)).timestamp() * 1000)),
+                event_crud.ScanInput(terminal_id=2, uid="BBB", ts=int((t0 + timedelta(hours=8)).timestamp() * 1000)),
+            ])
+
+        assert [r["direction"] for r in results] == ["OUT", "IN", "IN"]
+        assert _directions(env["Session"]) == ["IN", "OUT", "IN"]
+        assert _directions(env["Session"], 2) == ["IN"]
+
+    def test_batch_gives_up_after_attempts(self, env, monkeypatch):
+        with env["Session"]() as db:
+            db.add(Event(employee_id=1, terminal_id=1, direction="IN", ts=datetime(2026, 3, 2, 8, 0)))
+            db.commit()
+        monkeypatch.setattr(event_crud, "_last_events", lambda db, employee_ids: {})
+        monkeypatch.setattr(event_crud, "get_last_event_for_employee", lambda db, employee_id, locking=False: None)
+
+        r = TestClient(env["api"]).post("/api/terminal/scan/batch", json={"terminal_id": 1, "scans": [
+            {"scan_id": "b1", "uid": "BBB", "ts": int(time.time() * 1000)},
+            {"scan_id": "a1", "uid": "AAA", "ts": int(time.time() * 1000)},
+        ]})
+        assert r.status_code == 409
+        # Пакет відкочено цілком — і скан іншого працівника теж
+        assert _directions(env["Session"]) == ["IN"]
+        assert _directions(env["Session"], 2) == []
+
+
+class TestStripes:
+    def test_same_uid_same_lock(self):
+        async def scenario():
+            return (
+                scan_locks.lock_for("aaa ") is scan_locks.lock_for("AAA"),
+                len({id(scan_locks.lock_for(f"UID{i}")) for i in range(64)}) > 32,
+            )
+
+        assert asyncio.run(scenario()) == (True, True)
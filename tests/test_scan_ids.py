@@ -0,0 +1,163 @@
+"""
+Тести ідемпотентності поодиноких сканів (scan_id) і LRU app/services/scan_ids.py.
+
+Перевіряють:
+- повтор /scan з тим самим scan_id не створює події і не розсилає WS,
+  повертає початковий результат з duplicate=True
+- повтор, що потрапив у той самий воркер, обробляється з пам'яті без SQL
+- повтор в іншому воркері (порожній LRU) знаходить результат у terminal_scan_ids
+- відхилений cooldown'ом скан теж запам'ятовується
+- /secure-scan: повтор повертає результат без перевірки (вже спожитого)
+  challenge, але лише з дійсним підписом і для того ж працівника
+- скани без scan_id працюють як раніше; LRU обмежений за розміром
+"""
+import time
+
+import pytest
+
+from app.api.routes import terminals
+from app.core.config import settings
+from app.models.employee import Employee
+from app.models.event import Event
+from app.models.terminal import Terminal
+from app.models.terminal_scan_id import TerminalScanId
+from app.services import scan_ids
+
+
+def _seed(db):
+    db.add(Terminal(id=1, name="t1", api_key="k1"))
+    db.add(Employee(id=1, full_name="Анна", nfc_uid="AAA", public_key_b64="pk"))
+    db.add(Employee(id=2, full_name="Борис", nfc_uid="BBB", public_key_b64="pk2"))
+
+
+@pytest.fixture
+def env(make_app_env, monkeypatch):
+    monkeypatch.setattr(settings, "terminal_scan_cooldown_seconds", 5)
+    return make_app_env(_seed, statements=True)
+
+
+def _scan(client, scan_id=None, ts_ms=None):
+    body = {"uid": "AAA", "terminal_id": 1, "direction": "IN", "ts": ts_ms or int(time.time() * 1000)}
+    if scan_id:
+        body["scan_id"] = scan_id
+    return client.post("/api/terminal/scan", json=body)
+
+
+def _event_count(Session):
+    with Session() as db:
+        return db.query(Event).count()
+
+
+class TestScanRetry:
+    def test_retry_returns_original_without_db(self, env):
+        first = _scan(env["client"], "s1")
+        env["statements"].clear()
+        second = _scan(env["client"], "s1")
+
+        assert first.json()["duplicate"] is False
+        assert second.json() == {**first.json(), "duplicate": True}
+        assert env["statements"] == []
+        assert _event_count(env["Session"]) == 1
+        assert len(env["broadcasts"]) == 1
+        assert terminals.SCAN_OUTCOMES.get(endpoint="scan", outcome="duplicate") >= 1
+
+    def test_retry_in_other_worker_uses_table(self, env):
+        ts = int(time.time() * 1000)
+        first = _scan(env["client"], "s1", ts).json()
+        scan_ids.clear()  # інший воркер: порожній LRU
+        second = _scan(env["client"], "s1", ts + 60_000).json()
+
+        assert second["duplicate"] is True
+        assert second["message"] == first["message"]
+        assert _event_count(env["Session"]) == 1
+        assert scan_ids.get(1, "s1") is not None
+
+    def test_cooldown_result_remembered(self, env):
+        ts = int(time.time() * 1000)
+        _scan(env["client"], "s1", ts)
+        cooled = _scan(env["client"], "s2", ts + 1000).json()
+        assert cooled["message"].startswith("cooldown_wait_")
+        # Повтор пізніше за cooldown — все одно початкова відповідь, без нової події
+        scan_ids.clear()
+        again = _scan(env["client"], "s2", ts + 60_000).json()
+        assert again["message"] == cooled["message"] and again["duplicate"] is True
+        assert _event_count(env["Session"]) == 1
+
+    def test_without_scan_id_unchanged(self, env):
+        ts = int(time.time() * 1000)
+        _scan(env["client"], ts_ms=ts)
+        _scan(env["client"], ts_ms=ts + 60_000)
+        assert _event_count(env["Session"]) == 2
+        with env["Session"]() as db:
+            assert db.query(TerminalScanId).count() == 0
+
+    def test_unknown_uid_not_remembered(self, env):
+        r = env["client"].post("/api/terminal/scan", json={
+            "uid": "ZZZ", "terminal_id": 1, "direction": "IN", "ts": int(time.time() * 1000), "scan_id": "s1",
+        })
+        assert r.status_code == 400
+        assert scan_ids.get(1, "s1") is None
+
+
+class TestSecureScanRetry:
+    @pytest.fixture(autouse=True)
+    def _crypto(self, monkeypatch):
+        challenges = {"c1", "c2"}
+
+        def _consume(challenge, terminal_id):
+            if challenge not in challenges:
+                return False
+            challenges.remove(challenge)
+            return True
+
+        monkeypatch.setattr(terminals, "consume_challenge", _consume)
+        # Дійсний підпис — "sig-<ключ працівника>"
+        monkeypatch.setattr(
+            terminals, "verify_signature",
+            lambda public_key_b64, challenge_b64, signature_b64: signature_b64 == f"sig-{public_key_b64}",
+        )
+
+    def _post(self, client, **overrides):
+        body = {
+            "employee_uid": "AAA", "terminal_id": 1, "direction": "IN", "ts": int(time.time() * 1000),
+            "challenge_b64": "c1", "signature_b64": "sig-pk", "scan_id": "s1",
+        }
+        return client.post("/api/terminal/secure-scan", json={**body, **overrides})
+
+    def test_retry_skips_consumed_challenge(self, env):
+        first = self._post(env["client"]).json()
+        second = self._post(env["client"]).json()
+
+        assert first["ok"] and first["direction"] == "IN"
+        assert second == {**first, "duplicate": True}
+        assert _event_count(env["Session"]) == 1
+
+    def test_retry_without_valid_signature_reveals_nothing(self, env):
+        self._post(env["client"])
+        r = self._post(env["client"], signature_b64="forged").json()
+        assert r["ok"] is False and r["message"] == "bad_signature"
+        assert r["employee_name"] is None and r["employee_id"] is None
+
+    def test_scan_id_of_other_employee(self, env):
+        self._post(env["client"])
+        r = self._post(env["client"], employee_uid="BBB", signature_b64="sig-pk2", challenge_b64="c2")
+        assert r.status_code == 409
+        assert "Анна" not in r.text
+        assert _event_count(env["Session"]) == 1
+
+
+class TestLru:
+    def test_bounded(self, monkeypatch):
+        monkeypatch.setattr(settings, "scan_id_cache_max_entries", 2)
+        scan_ids.clear()
+        for i in range(3):
+            scan_ids.put(1, f"s{i}", {"message": "m", "employee_id": 1})
+        assert scan_ids.size() == 2
+        assert scan_ids.get(1, "s0") is None
+        assert scan_ids.get(1, "s2")["duplicate"] is True
+        scan_ids.clear()
+
+    def test_orm_objects_not_kept(self):
+        scan_ids.put(1, "s1", {"message": "m", "employee": object(), "event": object()})
+        assert set(scan_ids.get(1, "s1")) == {"message", "duplicate"}
+        scan_ids.clear()
@@ -0,0 +1,139 @@
+"""
+Юніт-тести для app/services/scan_writer.py (group commit сканів).
+
+Перевіряють:
+- паралельні скани комітяться групами (менше транзакцій, ніж сканів),
+  кожен запит отримує id своєї події
+- порядок по працівнику: скани одного UID у групі чергуються IN/OUT
+- невідомий UID → 400, як і без writer'а; повтор scan_id → duplicate
+- група, де умовний INSERT одного працівника раз у раз відхиляється,
+  повторюється поштучно: решта сканів групи записуються
+- stop_writer() дописує все, що лишилось у черзі
+"""
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud import event as event_crud
+from app.crud.event import ScanInput
+from app.models.employee import Employee
+from app.models.event import Event
+from app.models.terminal import Terminal
+from app.services import scan_ids, scan_writer
+
+EMPLOYEES = 20
+
+
+def _seed(db):
+    db.add(Terminal(id=1, name="t1", api_key="k1"))
+    for i in range(EMPLOYEES):
+        db.add(Employee(id=i + 1, full_name=f"Працівник {i}", nfc_uid=f"UID{i:03d}"))
+
+
+@pytest.fixture
+def env(make_app_env, monkeypatch):
+    monkeypatch.setattr(settings, "terminal_scan_cooldown_seconds", 5)
+    monkeypatch.setattr(settings, "scan_group_commit_enabled", True)
+    monkeypatch.setattr(settings, "scan_group_commit_interval_ms", 50)
+    env = make_app_env(_seed, file_db=True)
+    monkeypatch.setattr(scan_writer, "session_factory", lambda lane: env["Session"])
+
+    metrics.reset()
+    scan_writer.start_writer()
+    yield env
+    scan_writer.stop_writer()
+    metrics.reset()
+
+
+def _body(uid, ts_ms, scan_id=None):
+    body = {"uid": uid, "terminal_id": 1, "direction": "IN", "ts": ts_ms}
+    if scan_id:
+        body["scan_id"] = scan_id
+    return body
+
+
+def _post_all(api, bodies):
+    async def scenario():
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await asyncio.gather(*(c.post("/api/terminal/scan", json=b) for b in bodies))
+
+    return asyncio.run(scenario())
+
+
+class TestGroupCommit:
+    def test_concurrent_scans_grouped(self, env):
+        now = int(time.time() * 1000)
+        responses = _post_all(env["api"], [_body(f"UID{i:03d}", now) for i in range(EMPLOYEES)])
+
+        assert [r.status_code for r in responses] == [200] * EMPLOYEES
+        assert all(r.json()["message"].startswith("Registered IN") for r in responses)
+        groups, scans = scan_writer.GROUP_SIZE.get()
+        assert scans == EMPLOYEES and groups < EMPLOYEES
+        with env["Session"]() as db:
+            assert db.query(Event).count() == EMPLOYEES
+
+    def test_same_employee_alternates(self, env):
+        now = int(time.time() * 1000)
+        # 6 сканів одного UID з кроком 10 с (більше за cooldown), надіслані одночасно
+        _post_all(env["api"], [_body("UID000", now + k * 10_000) for k in range(6)])
+        with env["Session"]() as db:
+            directions = [e.direction for e in db.query(Event).order_by(Event.ts).all()]
+        assert directions == ["IN", "OUT"] * 3
+
+    def test_unknown_uid(self, env):
+        r = _post_all(env["api"], [_body("NOPE", int(time.time() * 1000))])[0]
+        assert r.status_code == 400
+
+    def test_retry_with_scan_id(self, env):
+        now = int(time.time() * 1000)
+        first = _post_all(env["api"], [_body("UID001", now, "s1")])[0].json()
+        scan_ids.clear()  # повтор має пройти через writer, а не LRU маршруту
+        second = _post_all(env["api"], [_body("UID001", now + 60_000, "s1")])[0].json()
+        assert second == {**first, "duplicate": True}
+        with env["Session"]() as db:
+            assert db.query(Event).count() == 1
+
+    def test_guard_conflict_retried_one_by_one(self, env, monkeypatch):
+        with env["Session"]() as db:
+            db.add(Event(employee_id=1, terminal_id=1, direction="IN", ts=datetime(2026, 3, 2, 8, 0)))
+            db.commit()
+        real_last, real_read = event_crud._last_events, event_crud.get_last_event_for_employee
+        # Для працівника 1 читання завжди "застаріле" — його INSERT не пройде
+        monkeypatch.setattr(
+            event_crud, "_last_events",
+            lambda db, employee_ids: {k: v for k, v in real_last(db, employee_ids).items() if k != 1},
+        )
+        monkeypatch.setattr(
+            event_crud, "get_last_event_for_employee",
+            lambda db, employee_id, locking=False: None if employee_id == 1 else real_read(db, employee_id, locking),
+        )
+
+        now = int(time.time() * 1000)
+        responses = _post_all(env["api"], [_body("UID000", now), _body("UID001", now), _body("UID002", now)])
+        assert [r.status_code for r in responses] == [409, 200, 200]
+        with env["Session"]() as db:
+            assert sorted(e.employee_id for e in db.query(Event).all()) == [1, 2, 3]
+
+
+class TestStop:
+    def test_stop_flushes_queue(self, env, monkeypatch):
+        monkeypatch.setattr(scan_writer, "_IDLE_POLL_SECONDS", 0.01)
+
+        async def scenario():
+            futures = [
+                asyncio.ensure_future(scan_writer.submit(ScanInput(terminal_id=1, uid=f"UID{i:03d}", ts=0)))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0)
+            scan_writer.stop_writer()
+            return await asyncio.gather(*futures)
+
+        results = asyncio.run(scenario())
+        assert [r["status"] for r in results] == ["registered"] * 3
+        assert not scan_writer.running()
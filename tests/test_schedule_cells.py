@@ -0,0 +1,48 @@
+"""
+Юніт-тести для normalize_cell() з app/crud/schedule.py
+
+Перевіряють правила, спільні для поштучного і масового збереження графіку:
+- очищення комірки / пустий графік
+- формат коду 'Г-Г' і довільні коди
+- явні start/end і валідацію часу
+"""
+import pytest
+
+from app.crud.schedule import CELL_DELETE, CELL_EMPTY, CELL_SET, normalize_cell
+
+
+class TestNormalizeCell:
+    def test_all_empty_is_delete(self):
+        assert normalize_cell(None, None, None)[0] == CELL_DELETE
+        assert normalize_cell("  ", "", None)[0] == CELL_DELETE
+
+    def test_midnight_without_code_is_empty(self):
+        assert normalize_cell("", "00:00", "00:00") == (CELL_EMPTY, "00:00", "00:00", None)
+
+    def test_hours_code(self):
+        assert normalize_cell("5-7") == (CELL_SET, "05:00", "07:00", "5-7")
+
+    def test_free_text_code(self):
+        assert normalize_cell("В") == (CELL_SET, "00:00", "00:00", "В")
+
+    def test_explicit_times_win_over_code(self):
+        assert normalize_cell("ОФ", "8", "17:30") == (CELL_SET, "08:00", "17:30", "ОФ")
+
+    def test_explicit_times_without_code(self):
+        assert normalize_cell(None, "09:00", "18:00") == (CELL_SET, "09:00", "18:00", "")
+
+    def test_start_after_end_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_cell(None, "18:00", "09:00")
+
+    def test_bad_hour_in_code_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_cell("25-7")
+
+    def test_bad_minutes_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_cell(None, "09:75", "18:00")
+
+    def test_only_start_rejected(self):
+        with pytest.raises(ValueError):
+            normalize_cell(None, "09:00", None)
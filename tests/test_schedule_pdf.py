@@ -0,0 +1,115 @@
+"""
+Юніт-тести для app/services/schedule_pdf.py
+
+Перевіряють:
+- розбиття діапазону на календарні місяці
+- групування працівників за посадою
+- ключ кешу: змінюється при зміні комірки / діапазону
+- кеш готових PDF (рендер у процесі запиту, SCHEDULE_PDF_WORKERS=0);
+  копія з кешу — з часом "Сформовано" першого рендеру
+- таймаут рендеру в пулі: RenderTimeoutError, процеси пулу зупинено,
+  наступний рендер створює новий пул
+"""
+from concurrent.futures import Future
+from datetime import date, datetime
+
+import pytest
+
+import app.services.schedule_pdf as sp
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def in_process_render(monkeypatch):
+    monkeypatch.setattr(settings, "schedule_pdf_workers", 0)
+    monkeypatch.setattr(settings, "schedule_pdf_cache_max_entries", 2)
+    sp.clear_cache()
+    yield
+    sp.clear_cache()
+
+
+EMPLOYEES = [(1, "Іваненко Іван", "Кухар"), (2, "Петренко Петро", None), (3, "Сидоренко Олег", "Бармен")]
+
+
+class TestSections:
+    def test_month_chunks_split_on_month_boundary(self):
+        chunks = sp.month_chunks(date(2026, 1, 30), date(2026, 3, 2))
+        assert [len(c) for c in chunks] == [2, 28, 2]
+        assert chunks[1][0] == date(2026, 2, 1)
+
+    def test_single_day(self):
+        assert sp.month_chunks(date(2026, 5, 5), date(2026, 5, 5)) == [[date(2026, 5, 5)]]
+
+    def test_group_by_position_sorted_no_position_last(self):
+        groups = sp.group_by_position(EMPLOYEES)
+        assert [name for name, _ in groups] == ["Бармен", "Кухар", sp.NO_POSITION]
+        assert groups[2][1] == [EMPLOYEES[1]]
+
+
+class TestCache:
+    def test_key_depends_on_cells_and_range(self):
+        cells = {(1, date(2026, 1, 5)): ("09:00", "18:00", None)}
+        base = sp.cache_key(date(2026, 1, 1), date(2026, 1, 31), EMPLOYEES, cells)
+        assert base == sp.cache_key(date(2026, 1, 1), date(2026, 1, 31), EMPLOYEES, dict(cells))
+        assert base != sp.cache_key(date(2026, 1, 1), date(2026, 1, 30), EMPLOYEES, cells)
+        changed = {(1, date(2026, 1, 5)): ("09:00", "17:00", None)}
+        assert base != sp.cache_key(date(2026, 1, 1), date(2026, 1, 31), EMPLOYEES, changed)
+
+    def test_repeated_download_is_not_rerendered(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(sp, "render_schedule_pdf", lambda *a: calls.append(a) or b"%PDF-x")
+        args = (date(2026, 1, 1), date(2026, 1, 31), EMPLOYEES, {})
+        assert sp.get_schedule_pdf(*args) == b"%PDF-x"
+        assert sp.get_schedule_pdf(*args) == b"%PDF-x"
+        assert len(calls) == 1
+        assert isinstance(calls[0][4], datetime)  # час "Сформовано" — з першого рендеру
+
+    def test_lru_limit(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(sp, "render_schedule_pdf", lambda *a: calls.append(a) or b"%PDF-x")
+        for day in (1, 2, 3, 1):
+            sp.get_schedule_pdf(date(2026, 1, day), date(2026, 1, 31), EMPLOYEES, {})
+        assert len(calls) == 4  # перший ключ витіснено третім
+
+    def test_real_render_produces_pdf(self):
+        cells = {(1, date(2026, 1, 31)): (None, None, "В")}
+        pdf = sp.get_schedule_pdf(date(2026, 1, 30), date(2026, 2, 2), EMPLOYEES, cells)
+        assert pdf.startswith(b"%PDF-")
+
+
+class _StuckProcess:
+    def __init__(self):
+        self.terminated = False
+
+    def terminate(self):
+        self.terminated = True
+
+
+class _StuckPool:
+    """Пул, у якому рендер ніколи не завершується."""
+
+    def __init__(self):
+        self.future = Future()
+        self._processes = {1: _StuckProcess()}
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        return self.future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+class TestTimeout:
+    def test_timeout_recycles_pool(self, monkeypatch):
+        pool = _StuckPool()
+        monkeypatch.setattr(settings, "schedule_pdf_workers", 1)
+        monkeypatch.setattr(settings, "schedule_pdf_timeout_seconds", 0.05)
+        monkeypatch.setattr(sp, "_pool", pool)
+
+        with pytest.raises(sp.RenderTimeoutError):
+            sp.get_schedule_pdf(date(2026, 1, 1), date(2026, 1, 31), EMPLOYEES, {})
+
+        assert pool.future.cancelled()
+        assert pool._processes[1].terminated and pool.shut_down
+        assert sp._pool is None
@@ -3,7 +3,7 @@
 """
 import os
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 
 import pytest
 from jose import jwt
@@ -15,7 +15,7 @@ os.environ.setdefault("ADMIN_PASSWORD", "testpassword123")
 
 from app.core.security import hash_password, verify_password, create_access_token
 from app.core.config import settings
-from app.core.time import ensure_utc, to_warsaw, to_utc, local_date_str, WARSAW
+from app.core.time import ensure_utc, to_warsaw, to_utc, local_date_str, local_day_bounds_utc, WARSAW
 
 
 # ─── hash_password / verify_password ─────────────────────────────────────────
@@ -199,3 +199,19 @@ class TestLocalDateStr:
         result = local_date_str(dt)
         assert len(result) == 10
         assert result[4] == "-" and result[7] == "-"
+
+
+class TestLocalDayBoundsUtc:
+    def test_summer_day(self):
+        start, end = local_day_bounds_utc(date(2024, 6, 1))
+        assert (start, end) == (datetime(2024, 5, 31, 22, 0), datetime(2024, 6, 1, 22, 0))
+
+    def test_dst_switch_day_is_23_hours(self):
+        """31.03.2024 годинник переводять вперед — доба коротша."""
+        start, end = local_day_bounds_utc(date(2024, 3, 31))
+        assert start == datetime(2024, 3, 30, 23, 0)
+        assert end - start == timedelta(hours=23)
+
+    def test_naive_utc(self):
+        start, end = local_day_bounds_utc(date(2024, 1, 15))
+        assert start.tzinfo is None and end.tzinfo is None
@@ -0,0 +1,144 @@
+"""
+Юніт-тести для app/services/stats_cache.py
+
+Перевіряють:
+- hit / miss і лічильники
+- інвалідацію по співробітнику (і глобальну версію для агрегатів)
+- захист від гонки: запис, що відбувся під час обчислення, робить значення застарілим
+- TTL і ліміт розміру (LRU)
+- між воркерами: лічильник працівника в cache_versions збільшується в
+  транзакції запису (локальна інвалідація — лише після коміту), get(db=)
+  звіряє його не частіше за STATS_CACHE_CHECK_SECONDS
+"""
+import pytest
+
+import app.services.stats_cache as sc
+from app.core.config import settings
+from app.models.cache_version import CacheVersion
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    monkeypatch.setattr(settings, "stats_cache_ttl_seconds", 60)
+    monkeypatch.setattr(settings, "stats_cache_max_entries", 100)
+    sc.clear()
+    yield
+    sc.clear()
+
+
+def _put(endpoint, employee_id, params, value):
+    sc.put(endpoint, employee_id, params, value, sc.version(employee_id))
+
+
+class TestHitMiss:
+    def test_empty_cache_is_miss(self):
+        assert sc.get("employee_stats", 1) is sc.MISS
+
+    def test_put_then_get_hits(self):
+        _put("employee_stats", 1, (), {"total": 5})
+        assert sc.get("employee_stats", 1) == {"total": 5}
+
+    def test_params_are_part_of_key(self):
+        _put("employee_daily_stats", 1, ("2026-01-01", "2026-01-31"), "jan")
+        assert sc.get("employee_daily_stats", 1, ("2026-02-01", "2026-02-28")) is sc.MISS
+
+    def test_counters(self):
+        sc.get("employee_stats", 1)
+        _put("employee_stats", 1, (), "x")
+        sc.get("employee_stats", 1)
+        stats = sc.cache_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["endpoints"]["employee_stats"] == {"hits": 1, "misses": 1}
+
+
+class TestInvalidation:
+    def test_invalidate_employee_drops_its_entries(self):
+        _put("employee_stats", 1, (), "old")
+        sc.invalidate_employee(1)
+        assert sc.get("employee_stats", 1) is sc.MISS
+
+    def test_other_employees_untouched(self):
+        _put("employee_stats", 2, (), "keep")
+        sc.invalidate_employee(1)
+        assert sc.get("employee_stats", 2) == "keep"
+
+    def test_aggregate_entries_invalidated_by_any_employee(self):
+        _put("recent_scans", None, ("2026-01-05",), "day")
+        sc.invalidate_employee(7)
+        assert sc.get("recent_scans", None, ("2026-01-05",)) is sc.MISS
+
+    def test_write_during_computation_is_not_served(self):
+        v = sc.version(1)
+        sc.invalidate_employee(1)  # подія додалась, поки рахували статистику
+        sc.put("employee_stats", 1, (), "computed-before-write", v)
+        assert sc.get("employee_stats", 1) is sc.MISS
+
+
+class TestLimits:
+    def test_disabled_when_ttl_zero(self, monkeypatch):
+        monkeypatch.setattr(settings, "stats_cache_ttl_seconds", 0)
+        _put("employee_stats", 1, (), "x")
+        assert sc.get("employee_stats", 1) is sc.MISS
+
+    def test_expired_entry_is_miss(self, monkeypatch):
+        _put("employee_stats", 1, (), "x")
+        real = sc.time.monotonic
+        monkeypatch.setattr(sc.time, "monotonic", lambda: real() + 61)
+        assert sc.get("employee_stats", 1) is sc.MISS
+
+    def test_lru_eviction(self, monkeypatch):
+        monkeypatch.setattr(settings, "stats_cache_max_entries", 2)
+        _put("employee_stats", 1, (), "a")
+        _put("employee_stats", 2, (), "b")
+        sc.get("employee_stats", 1)        # 1 — найсвіжіший
+        _put("employee_stats", 3, (), "c")  # витісняє 2
+        assert sc.get("employee_stats", 2) is sc.MISS
+        assert sc.get("employee_stats", 1) == "a"
+        assert sc.cache_stats()["size"] == 2
+
+
+class TestSharedVersion:
+    @pytest.fixture
+    def Session(self, make_app_env):
+        return make_app_env()["Session"]
+
+    def _shared(self, Session, employee_id):
+        with Session() as db:
+            return db.query(CacheVersion.version).filter(CacheVersion.name == f"stats:{employee_id}").scalar()
+
+    def test_write_bumps_counter_on_commit(self, Session):
+        _put("employee_stats", 1, (), "old")
+        with Session() as db:
+            sc.invalidate_employee(1, db)
+            assert sc.get("employee_stats", 1) == "old"  # ще не закомічено
+            db.commit()
+        assert sc.get("employee_stats", 1) is sc.MISS
+        with Session() as db:
+            sc.invalidate_employees(db, [1, 2])
+            db.commit()
+        assert (self._shared(Session, 1), self._shared(Session, 2)) == (2, 1)
+
+    def test_rollback_keeps_entries(self, Session):
+        _put("employee_stats", 1, (), "keep")
+        with Session() as db:
+            sc.invalidate_employee(1, db)
+            db.rollback()
+            db.commit()
+        assert sc.get("employee_stats", 1) == "keep"
+        assert self._shared(Session, 1) is None
+
+    def test_write_from_other_worker(self, Session, monkeypatch):
+        monkeypatch.setattr(settings, "stats_cache_check_seconds", 60)
+        with Session() as db:
+            assert sc.get("employee_stats", 1, db=db) is sc.MISS
+            sc.put("employee_stats", 1, (), "old", sc.version(1))
+
+            # Інший воркер: лічильник у БД змінився, локальні версії — ні
+            db.add(CacheVersion(name="stats:1", version=1))
+            db.commit()
+
+            # До перевірки — з пам'яті; після — застарілий запис відкидається
+            assert sc.get("employee_stats", 1, db=db) == "old"
+            monkeypatch.setattr(settings, "stats_cache_check_seconds", 0)
+            assert sc.get("employee_stats", 1, db=db) is sc.MISS
@@ -0,0 +1,91 @@
+"""
+Юніт-тести для app/core/threadpool.py
+
+Перевіряють:
+- limiter(): створюється один раз на групу, 0 = без ліміту
+- sample(): зайняті потоки, черга групи, THREADPOOL_TOKENS
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+
+from app.api.lanes import lane
+from app.core import metrics, threadpool
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    threadpool.reset()
+    metrics.reset()
+    yield
+    threadpool.reset()
+    metrics.reset()
+
+
+def _make_app(state):
+    api = FastAPI()
+    reports = APIRouter(dependencies=[Depends(lane("reports"))])
+
+    @reports.get("/report")
+    def report():
+        with state["lock"]:
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+        time.sleep(0.1)
+        with state["lock"]:
+            state["running"] -= 1
+        return {"ok": True}
+
+    @api.get("/scan")
+    def scan():
+        return {"ok": True}
+
+    api.include_router(reports)
+    return api
+
+
+def _state():
+    return {"lock": threading.Lock(), "running": 0, "max": 0}
+
+
+async def _client(api):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://t")
+
+
+class TestLimiter:
+    def test_created_once(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 3)
+        group = threadpool.limiter("reports")
+        assert group is threadpool.limiter("reports")
+        assert group.total_tokens == 3
+
+    def test_zero_is_unlimited(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 0)
+        assert threadpool.limiter("reports") is None
+
+
+class TestSample:
+    def test_sample_reports_groups(self, monkeypatch):
+        monkeypatch.setattr(settings, "reports_concurrency_limit", 1)
+        monkeypatch.setattr(settings, "threadpool_tokens", 12)
+        state = _state()
+
+        async def scenario():
+            threadpool.configure()
+            async with await _client(_make_app(state)) as c:
+                tasks = [asyncio.create_task(c.get("/report")) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                snap = threadpool.sample()
+                await asyncio.gather(*tasks)
+            return snap
+
+        snap = asyncio.run(scenario())
+        assert snap["tokens"] == 12
+        assert snap["busy"] >= 1
+        assert snap["groups"]["reports"] == {"active": 1, "waiting": 2}
+        assert threadpool.GROUP_WAITING.get(group="reports") == 2